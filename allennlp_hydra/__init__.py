@@ -1,4 +1,11 @@
-try:
-    from allennlp_hydra import commands
-except ImportError:
-    pass
\ No newline at end of file
+import sys
+
+# The commands are registered when the `allennlp` CLI imports this package as a
+# plugin, after it imported `allennlp.commands`. They import AllenNLP, and
+# with it torch, so they are not imported when this package is used as a
+# library, e.g. to compose configs with `allennlp_hydra.config.compose`.
+if "allennlp.commands" in sys.modules:
+    try:
+        from allennlp_hydra import commands
+    except ImportError:
+        pass
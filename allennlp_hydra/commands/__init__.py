@@ -1,2 +1,6 @@
 from allennlp_hydra.commands.compose_config import ComposeConfig
+from allennlp_hydra.commands.compose_batch import ComposeBatch
+from allennlp_hydra.commands.defaults_schema import BuildDefaultsSchema
 from allennlp_hydra.commands.hydra_train import HydraTrain
+from allennlp_hydra.commands.config_diff import DiffConfigs
+from allennlp_hydra.commands.config_pack import PackConfigs
@@ -1,19 +1,19 @@
 """
 Command to convert a class to a yaml. Registered as `cls2yml`
 """
-import sys
 from typing import Dict
 
 import argparse
 import logging
 from pathlib import Path
 
-from allennlp.common import Registrable
 from allennlp.commands.subcommand import Subcommand
+from allennlp.common import Registrable
 from overrides import overrides
 import re
-import yaml
 
+from allennlp_hydra.config import registry_index
+from allennlp_hydra.config.config_formats import save_config
 from allennlp_hydra.config.fill_defaults import (
     fill_config_with_default_values,
     get_positional_arguments,
@@ -80,15 +80,10 @@ def class_to_yaml(
         cls_name: str, base_cls_name: str, serialization_dir: str, force: bool = False
 ) -> Dict:
     print(f"Looking for the '{base_cls_name}' registered as {cls_name}")
-    base_class = None
-
-    # Go through the registered classes and find the `base_cls_name`
-    for base_class_object in Registrable.__subclasses__():
-        if base_class_object.__name__ == base_cls_name:
-            base_class = base_class_object
-            break
 
-    if base_class is None:
+    # Find the `base_cls_name` in the classes that have registered subclasses.
+    base_class = registry_index.get_base_class_by_name(base_cls_name)
+    if base_class is None or not issubclass(base_class, Registrable):
         raise ValueError(
             f"The class '{base_cls_name}' could not be found as a"
             f" subclass of Registrable."
@@ -107,19 +102,18 @@ def class_to_yaml(
         # not filled.
         config_for_class[postional_arg] = "???"
 
-    serialization_dir = Path(serialization_dir)
-    if not serialization_dir.exists():
-        raise ValueError(f"{serialization_dir} does not exist")
+    output_dir = Path(serialization_dir)
+    if not output_dir.exists():
+        raise ValueError(f"{output_dir} does not exist")
 
     file_name = re.sub(r"[^\w\._]+", "_", cls_name)
-    out_path = serialization_dir.joinpath(f"{file_name}.yaml")
+    out_path = output_dir.joinpath(f"{file_name}.yaml")
     if out_path.exists() and not force:
         raise ValueError(f"{out_path} already exists. use --force to override.")
-    with out_path.open("w", encoding="utf-8") as out_file:
-        yaml.dump(config_for_class, out_file, yaml.Dumper)
+    save_config(config_for_class, out_path, "yaml")
 
     print(f"Config for {base_cls_name}.{cls_name}:")
     print("")
-    yaml.dump(config_for_class, sys.stdout, yaml.Dumper)
+    print(out_path.read_text("utf-8"), end="")
 
     return config_for_class
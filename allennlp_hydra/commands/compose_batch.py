@@ -0,0 +1,524 @@
+"""
+The `compose-batch` command composes many configs from the same root config in
+one invocation, e.g. for the variants of an experiment grid. Each variant is a
+set of overrides, and composing them in one process (or a pool of worker
+processes) only pays for the startup of AllenNLP and Hydra once.
+
+# Parameters
+
+config_path: `Union[str, PathLike]`
+    Path to the root config directory, or to a pack of it created by the
+    `config-pack` command.
+
+config_name: `str`
+    The name of the root config file. Do NOT include the `.yaml`.
+
+job_name: `str`
+    The job name. This is passed to Hydra and is not used here.
+
+overrides_file: `Union[str, PathLike]`
+    The file with the override sets, one per line. A line is either the
+    overrides separated by spaces, quoted like in a shell, or a JSON list of
+    overrides, or a JSON object with the `overrides` and optionally the
+    `name` of the config. Empty lines and lines starting with `#` are skipped.
+    Configs without a name are named `{config_name}_{index}`, where `index`
+    counts the override sets from 0.
+
+    ```
+    # A comment
+    model.dropout=0.1 trainer.num_epochs=5
+    ["model.dropout=0.2", "trainer.num_epochs=5"]
+    {"name": "no_dropout", "overrides": ["model.dropout=0.0"]}
+    ```
+
+-s/--serialization-dir: `Union[str, PathLike]`
+    Save every config to `{name}.json` in this directory, or with the suffix
+    of `--output-format`. The configs that could not be composed are listed
+    in `errors.jsonl`. Either this or `--output-file` is required.
+
+--output-format: `str`, optional (default=`json`)
+    The format of the configs saved with `--serialization-dir`, see the
+    `compose` command.
+
+--output-file: `Union[str, PathLike]`
+    Save all of the configs to this file instead. It is an SQLite database
+    with the table `configs(name, overrides, config, error)` if the file
+    ends with `.db`, `.sqlite` or `.sqlite3`, and a JSONL file with one
+    object per config otherwise.
+
+-w/--workers: `int`, optional (default=`1`)
+    The number of processes composing the configs.
+
+--fill-defaults: `bool`, optional (default=`False`)
+    Flag. Add the arguments and their default values of every class to the
+    configs.
+
+--prune-defaults: `bool`, optional (default=`False`)
+    Flag. Remove every argument whose value is the same as its default.
+
+A config that cannot be composed, e.g. because of a bad override, does not
+stop the batch. Its error is logged and saved with the outputs.
+"""
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+import argparse
+import json
+import logging
+import multiprocessing
+from os import PathLike
+from pathlib import Path
+import shlex
+import sqlite3
+
+from allennlp.commands.subcommand import Subcommand
+from allennlp.common.util import import_module_and_submodules
+from overrides import overrides
+
+from allennlp_hydra.commands.compose_config import add_output_format_argument
+from allennlp_hydra.config.config_formats import get_config_file_name, save_config
+from allennlp_hydra.utils import file_utils
+
+if TYPE_CHECKING:
+    from allennlp_hydra.config.compose import ComposeSession
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+
+
+class BatchItem(NamedTuple):
+    """
+    One config of a batch.
+    """
+
+    name: str
+    overrides: List[str]
+
+
+class BatchResult(NamedTuple):
+    """
+    The result of composing a `BatchItem`. Exactly one of `config` and
+    `error` is set.
+    """
+
+    name: str
+    overrides: List[str]
+    config: Optional[Dict] = None
+    error: Optional[str] = None
+
+
+@Subcommand.register("compose-batch")
+class ComposeBatch(Subcommand):
+    @overrides
+    def add_subparser(
+        self, parser: argparse._SubParsersAction
+    ) -> argparse.ArgumentParser:
+        description = """Compose a config with Hydra for every set of overrides in a file"""
+        subparser = parser.add_parser(
+            self.name, description=description, help=description
+        )
+
+        subparser.add_argument(
+            "config_path", type=str, help="Path to the config directory or config pack."
+        )
+        subparser.add_argument(
+            "config_name", type=str, help="Name of the config file to use."
+        )
+        subparser.add_argument("job_name", type=str, help="Name of the job.")
+        subparser.add_argument(
+            "overrides_file",
+            type=str,
+            help="File with a set of overrides on each line, either separated "
+            "by spaces or as JSON.",
+        )
+
+        output_group = subparser.add_mutually_exclusive_group(required=True)
+        output_group.add_argument(
+            "-s",
+            "--serialization-dir",
+            type=str,
+            help="Directory to save the configs to. The name of each config "
+            "will be `{name}.json`",
+        )
+        output_group.add_argument(
+            "--output-file",
+            type=str,
+            help="Save all of the configs to this JSONL file, or SQLite "
+            "database if it ends with .db, .sqlite or .sqlite3.",
+        )
+        add_output_format_argument(subparser)
+
+        subparser.add_argument(
+            "-w",
+            "--workers",
+            type=int,
+            default=1,
+            help="The number of processes composing the configs.",
+        )
+
+        defaults_group = subparser.add_mutually_exclusive_group()
+        defaults_group.add_argument(
+            "--fill-defaults",
+            action="store_true",
+            default=False,
+            help="Add default arguments from each loaded class to the configs.",
+        )
+        defaults_group.add_argument(
+            "--prune-defaults",
+            action="store_true",
+            default=False,
+            help="Remove the arguments whose values are the same as their "
+            "defaults from the configs.",
+        )
+
+        subparser.set_defaults(func=compose_batch_from_args)
+
+        return subparser
+
+
+def compose_batch_from_args(args: argparse.Namespace) -> List[BatchResult]:
+    """
+    Wrapper for `compose_batch` so that it can be called with `argparse`
+    arguments from the CLI.
+
+    # Returns
+        The results of every config, in the order of the overrides file.
+    """
+    items = read_batch_items(args.overrides_file, args.config_name)
+    results = compose_batch(
+        config_path=args.config_path,
+        config_name=args.config_name,
+        job_name=args.job_name,
+        items=items,
+        num_workers=args.workers,
+        fill_defaults=args.fill_defaults,
+        prune_defaults=args.prune_defaults,
+        include_package=getattr(args, "include_package", None) or [],
+    )
+    reported = write_batch_results(
+        results,
+        serialization_dir=args.serialization_dir,
+        output_file=args.output_file,
+        config_format=args.output_format,
+    )
+    report_batch_results(reported)
+    return reported
+
+
+def read_batch_items(
+    overrides_file: Union[str, PathLike], config_name: str
+) -> List[BatchItem]:
+    """
+    Read the override sets from `overrides_file`. See the documentation of
+    the command for its format.
+    """
+    items: List[BatchItem] = []
+    names = set()
+    lines = Path(overrides_file).read_text("utf-8").splitlines()
+    for line_index, line in enumerate(lines):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+
+        name = f"{config_name}_{len(items)}"
+        try:
+            # No override starts with a bracket, so these lines are JSON.
+            if line[0] in "[{":
+                value = json.loads(line)
+                if isinstance(value, dict):
+                    name = str(value.get("name", name))
+                    value = value.get("overrides", [])
+                if not isinstance(value, list) or not all(
+                    isinstance(override, str) for override in value
+                ):
+                    raise ValueError("expected a list of overrides")
+                line_overrides = value
+            else:
+                line_overrides = shlex.split(line)
+        except ValueError as e:
+            raise ValueError(f"Line {line_index + 1} of '{overrides_file}': {e}")
+
+        if name in names:
+            raise ValueError(f"More than one config is named '{name}'")
+        names.add(name)
+        items.append(BatchItem(name, line_overrides))
+    return items
+
+
+def compose_batch(
+    config_path: Union[str, PathLike],
+    config_name: str,
+    job_name: str,
+    items: Iterable[BatchItem],
+    num_workers: int = 1,
+    fill_defaults: bool = False,
+    prune_defaults: bool = False,
+    include_package: Iterable[str] = (),
+) -> Iterator[BatchResult]:
+    """
+    Compose a config for every item in `items`. Each worker composes with its
+    own `ComposeSession`. Errors are returned in the results instead of being
+    raised, so one bad item does not stop the others.
+
+    # Parameters
+
+    config_path: `Union[str, PathLike]`
+        Path to the root config directory.
+
+    config_name: `str`
+        The name of the root config file.
+
+    job_name: `str`
+        The job name. This is passed to Hydra and is not used here.
+
+    items: `Iterable[BatchItem]`
+        The names and overrides of the configs.
+
+    num_workers: `int`, optional (default=`1`)
+        The number of processes composing the configs. If it is `1`, they are
+        composed in this process.
+
+    fill_defaults: `bool`, optional (default=`False`)
+        Add arguments and their default values to the configs.
+
+    prune_defaults: `bool`, optional (default=`False`)
+        Remove the arguments whose values are the same as their defaults.
+
+    include_package: `Iterable[str]`, optional (default=`()`)
+        The packages to import in the workers, for the registered classes
+        used when filling or pruning the defaults.
+
+    # Returns
+
+    `Iterator[BatchResult]`
+        The result of every item, in order.
+    """
+    if fill_defaults and prune_defaults:
+        raise ValueError("Defaults cannot be both filled and pruned")
+    if num_workers < 1:
+        raise ValueError(f"The number of workers must be positive, got {num_workers}")
+
+    from allennlp_hydra.config.compose import ComposeSession
+
+    # Fail before starting the workers if the config path is invalid.
+    session = ComposeSession(config_path, job_name=job_name)
+
+    if num_workers == 1:
+        if fill_defaults or prune_defaults:
+            from allennlp_hydra.config.defaults_schema import load_defaults_schema
+
+            load_defaults_schema(include_package)
+        worker = _BatchWorker(session, config_name, fill_defaults, prune_defaults)
+        return map(worker.compose, items)
+
+    worker_args = (
+        session.config_path,
+        config_name,
+        job_name,
+        list(include_package),
+        fill_defaults,
+        prune_defaults,
+    )
+    return _compose_with_pool(list(items), num_workers, worker_args)
+
+
+def write_batch_results(
+    results: Iterable[BatchResult],
+    serialization_dir: Optional[Union[str, PathLike]] = None,
+    output_file: Optional[Union[str, PathLike]] = None,
+    config_format: str = "json",
+) -> List[BatchResult]:
+    """
+    Save the results of `compose_batch` as they are composed, either as one
+    file per config in `serialization_dir` in `config_format` or to
+    `output_file`. See the documentation of the command for the formats.
+
+    # Returns
+        The results, for reporting. The configs are removed to free memory.
+    """
+    if serialization_dir is not None and output_file is None:
+        return _write_to_serialization_dir(
+            results, Path(serialization_dir), config_format
+        )
+    if serialization_dir is not None or output_file is None:
+        raise ValueError("Pass exactly one of serialization_dir and output_file")
+
+    output_path = Path(output_file)
+    if output_path.suffix in SQLITE_SUFFIXES:
+        return _write_to_sqlite(results, output_path)
+    return _write_to_jsonl(results, output_path)
+
+
+def report_batch_results(results: List[BatchResult]) -> None:
+    """
+    Print how many configs were composed and log how many failed.
+    """
+    num_failed = sum(result.error is not None for result in results)
+    print(f"Composed {len(results) - num_failed} of {len(results)} configs")
+    if num_failed:
+        logger.error(f"{num_failed} configs could not be composed")
+
+
+class _BatchWorker:
+    """
+    Composes the items of a batch with one `ComposeSession`. Items that only
+    change values of the config composed for the same config groups are
+    patched from it, see `Recomposer`.
+    """
+
+    def __init__(
+        self,
+        session: "ComposeSession",
+        config_name: str,
+        fill_defaults: bool,
+        prune_defaults: bool,
+    ):
+        from allennlp_hydra.config.recompose import Recomposer
+
+        self.recomposer = Recomposer(session, config_name)
+        self.fill_defaults = fill_defaults
+        self.prune_defaults = prune_defaults
+
+    def compose(self, item: BatchItem) -> BatchResult:
+        try:
+            config = self.recomposer.compose(
+                item.overrides,
+                fill_defaults=self.fill_defaults,
+                prune_defaults=self.prune_defaults,
+            )
+        except Exception as e:
+            logger.error(f"Could not compose '{item.name}': {e}")
+            return BatchResult(
+                item.name, item.overrides, error=f"{type(e).__name__}: {e}"
+            )
+        return BatchResult(item.name, item.overrides, config=config)
+
+
+def _compose_with_pool(
+    items: List[BatchItem], num_workers: int, worker_args: tuple
+) -> Iterator[BatchResult]:
+    with multiprocessing.Pool(
+        num_workers, initializer=_init_worker, initargs=worker_args
+    ) as pool:
+        yield from pool.imap(
+            _compose_in_worker,
+            items,
+            chunksize=max(1, len(items) // (num_workers * 8)),
+        )
+
+
+# The worker of the current process in the pool, created by `_init_worker`.
+_worker: Optional[_BatchWorker] = None
+
+
+def _init_worker(
+    config_path: Path,
+    config_name: str,
+    job_name: str,
+    include_package: List[str],
+    fill_defaults: bool,
+    prune_defaults: bool,
+) -> None:
+    global _worker
+    from allennlp_hydra.config.compose import ComposeSession
+    from allennlp_hydra.config.defaults_schema import load_defaults_schema
+
+    # The packages are already imported when the workers are forked, but not
+    # when they are spawned.
+    for package in include_package:
+        import_module_and_submodules(package)
+    if fill_defaults or prune_defaults:
+        load_defaults_schema(include_package)
+
+    _worker = _BatchWorker(
+        ComposeSession(config_path, job_name=job_name),
+        config_name,
+        fill_defaults,
+        prune_defaults,
+    )
+
+
+def _compose_in_worker(item: BatchItem) -> BatchResult:
+    if _worker is None:
+        raise RuntimeError("The batch worker was not initialized")
+    return _worker.compose(item)
+
+
+def _write_to_serialization_dir(
+    results: Iterable[BatchResult], serialization_dir: Path, config_format: str
+) -> List[BatchResult]:
+    serialization_dir.mkdir(parents=True, exist_ok=True)
+    reported = []
+    errors = []
+    for result in results:
+        if result.error is None and Path(result.name).name != result.name:
+            result = result._replace(
+                config=None, error=f"'{result.name}' is not a valid file name"
+            )
+
+        if result.config is not None:
+            config_path = serialization_dir.joinpath(
+                get_config_file_name(result.name, config_format)
+            )
+            save_config(result.config, config_path, config_format)
+        else:
+            errors.append(_result_to_json(result))
+        reported.append(result._replace(config=None))
+
+    errors_path = serialization_dir.joinpath("errors.jsonl")
+    if errors:
+        with file_utils.atomic_open(errors_path) as errors_file:
+            errors_file.writelines(f"{error}\n" for error in errors)
+    elif errors_path.exists():
+        # Do not report the errors of a previous batch.
+        errors_path.unlink()
+    return reported
+
+
+def _write_to_jsonl(
+    results: Iterable[BatchResult], output_file: Path
+) -> List[BatchResult]:
+    reported = []
+    with file_utils.atomic_open(output_file) as jsonl_file:
+        for result in results:
+            jsonl_file.write(f"{_result_to_json(result)}\n")
+            reported.append(result._replace(config=None))
+    return reported
+
+
+def _write_to_sqlite(
+    results: Iterable[BatchResult], output_file: Path
+) -> List[BatchResult]:
+    reported = []
+    connection = sqlite3.connect(str(output_file))
+    try:
+        # Everything is written in one transaction, so readers never see a
+        # partially written batch.
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS configs ("
+                "name TEXT PRIMARY KEY, overrides TEXT NOT NULL, config TEXT, error TEXT)"
+            )
+            for result in results:
+                connection.execute(
+                    "INSERT OR REPLACE INTO configs VALUES (?, ?, ?, ?)",
+                    (
+                        result.name,
+                        json.dumps(result.overrides),
+                        None if result.config is None else json.dumps(result.config),
+                        result.error,
+                    ),
+                )
+                reported.append(result._replace(config=None))
+    finally:
+        connection.close()
+    return reported
+
+
+def _result_to_json(result: BatchResult) -> str:
+    value: Dict[str, Any] = {"name": result.name, "overrides": result.overrides}
+    if result.error is None:
+        value["config"] = result.config
+    else:
+        value["error"] = result.error
+    return json.dumps(value)
@@ -7,17 +7,27 @@ is also supported.
 # Parameters
 
 config_path: `Union[str, PathLike]`
-    Path to the root config directory.
+    Path to the root config directory, or to a pack of it created by the
+    `config-pack` command.
 
 config_name: `str`
-    The name of the root config file. Do NOT include the `.yaml`.
+    The name of the root config file. Do NOT include the `.yaml`. Not needed
+    with `--list`.
 
 job_name: `str`
-    The job name. This is passed to Hydra and is not used here.
+    The job name. This is passed to Hydra and is not used here. Not needed
+    with `--list`.
 
 -s/--serialization-dir: `Union[str, PathLike]`
     The directory where the new AllenNLP config will be saved to. The name used
-     for saving will be the `config_name` and it will be a `.json` file.
+     for saving will be the `config_name` and the suffix of the output format.
+    Required unless `--list` or `--check` is passed.
+
+--output-format: `str`, optional (default=`json`)
+    The format of the saved config: `json`, `compact-json`, `pickle` or
+    `yaml`, see `allennlp_hydra.config.config_formats`. `hydra-train` can
+    train from a saved config in any of them, and loads `pickle` the
+    fastest. Configs are always saved atomically.
 
 -o/--overrides: `List[str]`, optional (default=`[]`)
     Keyword arguments passed will be used as a list of overrides using Hydra's
@@ -30,6 +40,69 @@ job_name: `str`
     ```
     Will be interpreted as overrides `['A=B', 'C="D"']`
 
+--fill-defaults: `bool`, optional (default=`False`)
+    Flag. Add the arguments and their default values of every class to the
+    config.
+
+--prune-defaults: `bool`, optional (default=`False`)
+    Flag. The opposite of `--fill-defaults`: remove every argument whose value
+    is the same as its default. Filling the pruned config gives back the
+    original config. Cannot be combined with `--fill-defaults`.
+
+--cache-dir: `str`, optional (default=`None`)
+    Use the compose cache in this directory, see
+    `allennlp_hydra.config.compose_cache`. If the flag is passed without a
+    directory, `~/.allennlp_hydra/compose` is used. A cached config is reused
+    until one of the yaml files it was composed from changes.
+
+--fill-defaults-stats: `str`, optional (default=`None`)
+    Collect statistics about filling the defaults (classes visited, cache hits
+    and misses, time per class, ...) and write them as JSON to this file. If
+    the flag is passed without a file, they are printed instead. Only used
+    with `--fill-defaults`.
+
+-m/--multirun: `bool`, optional (default=`False`)
+    Flag. The overrides may use Hydra's sweep syntax, e.g. `model=C,D` or
+    `model.layers=range(1,5)`, and a config is composed for every point of
+    the sweep, see `allennlp_hydra.config.sweep`. Each config is saved to
+    `{config_name}_{index}` with the suffix of the output format, and the points that could not be composed
+    are listed in `errors.jsonl`. `--cache-dir` is not used.
+
+--shard: `Tuple[int, int]`, optional (default=`None`)
+    With `--multirun`, only compose the points of the shard `INDEX` out of
+    `NUM_SHARDS`, e.g. `--shard 0 4` composes every fourth point.
+
+--sample: `int`, optional (default=`None`)
+    With `--multirun`, only compose this many randomly sampled points. Can
+    be combined with `--shard` to sample from a shard.
+
+--sample-seed: `int`, optional (default=`None`)
+    The random seed for `--sample`.
+
+--watch: `bool`, optional (default=`False`)
+    Flag. Keep running after saving the config, and compose and save it
+    again whenever one of the yaml files in its defaults list changes, until
+    interrupted with `Ctrl+C`. The files are polled for changes, and the
+    yaml files that did not change are not read again. Cannot be combined
+    with `--multirun`.
+
+--list: `str`, optional (default=`None`)
+    List the options of every config group instead of composing, or only of
+    the given group, e.g. `--list model`. The options are read from the
+    index of the config directory, see `allennlp_hydra.config.config_index`,
+    which also completes overrides in a shell.
+
+--check: `bool`, optional (default=`False`)
+    Flag. Only check the overrides, without composing.
+
+Before composing, the overrides are checked against the index of the config
+directory. Overrides with options or groups that do not exist, or with keys
+that are not in the config, are reported in milliseconds with a suggestion
+for the typo, e.g. `'model=simple_tager': 'simple_tager' is not an option of
+'model', did you mean 'simple_tagger'?`. They fail with `--check`, and are
+logged as warnings otherwise, because the index does not know every key that
+Hydra can compose.
+
 
 
 # Example
@@ -153,26 +226,46 @@ Produces the file `project/experiments/config.json`
 ```
 """
 
-from typing import Dict, Union, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence
 
 import argparse
-import json
-from os import PathLike
+from contextlib import nullcontext
 import logging
-from pathlib import Path
+import time
 
-from allennlp.data import DataLoader, DatasetReader
-from allennlp.training import Trainer
-from allennlp.models import Model
 from allennlp.commands.subcommand import Subcommand
-import hydra
-from omegaconf import OmegaConf
 from overrides import overrides
 
-from allennlp_hydra.config.fill_defaults import fill_config_with_default_values
+from allennlp_hydra.config.config_formats import CONFIG_FORMATS
+from allennlp_hydra.config.fill_stats import collect_fill_stats, write_fill_stats
+
+if TYPE_CHECKING:
+    from allennlp_hydra.config.sweep import Sweep
 
 logger = logging.getLogger(__name__)
 
+# The names that were moved to `allennlp_hydra.config.compose`. This module is
+# imported by every `allennlp` command through the plugin, so they are only
+# imported from there, along with Hydra, when they are used.
+_COMPOSE_NAMES = {
+    "WATCH_POLL_INTERVAL",
+    "ComposeSession",
+    "compose_config",
+    "watch_config",
+}
+
+
+def __getattr__(name: str):
+    if name == "FILLED_SECTIONS":
+        from allennlp_hydra.config.compose import get_filled_sections
+
+        return get_filled_sections()
+    if name in _COMPOSE_NAMES:
+        from allennlp_hydra.config import compose
+
+        return getattr(compose, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 @Subcommand.register("compose")
 class ComposeConfig(Subcommand):
@@ -186,18 +279,18 @@ class ComposeConfig(Subcommand):
         )
 
         subparser.add_argument(
-            "config_path", type=str, help="Path to the config directory."
+            "config_path", type=str, help="Path to the config directory or config pack."
         )
 
         subparser.add_argument(
-            "config_name", type=str, help="Name of the config file to use."
+            "config_name", nargs="?", type=str, help="Name of the config file to use."
         )
-        subparser.add_argument("job_name", type=str, help="Name of the job.")
+        subparser.add_argument("job_name", nargs="?", type=str, help="Name of the job.")
 
         subparser.add_argument(
             "-s",
             "--serialization-dir",
-            required=True,
+            default=None,
             type=str,
             help="Directory to save the config to. The name of the config will "
             "be `{config_name}.json`",
@@ -209,118 +302,317 @@ class ComposeConfig(Subcommand):
             help="Any key=value arguments to override config values "
             "(use dots for.nested=overrides)",
         )
+        add_output_format_argument(subparser)
 
-        subparser.add_argument(
+        defaults_group = subparser.add_mutually_exclusive_group()
+        defaults_group.add_argument(
             "--fill-defaults",
             action="store_true",
             default=False,
             help="Add default arguments from each loaded class to the config.",
         )
+        defaults_group.add_argument(
+            "--prune-defaults",
+            action="store_true",
+            default=False,
+            help="Remove the arguments whose values are the same as their "
+            "defaults from the config.",
+        )
+        subparser.add_argument(
+            "--cache-dir",
+            nargs="?",
+            const="",
+            default=None,
+            help="Reuse the configs composed before from this cache directory. "
+            "Uses the default cache directory if no directory is given. Configs "
+            "using resolvers such as `oc.env`, `now` or `file_lines` are not cached.",
+        )
+        add_fill_defaults_stats_argument(subparser)
+        add_multirun_arguments(subparser)
+        subparser.add_argument(
+            "--watch",
+            action="store_true",
+            default=False,
+            help="Compose and save the config again whenever one of its yaml "
+            "files changes.",
+        )
+        subparser.add_argument(
+            "--list",
+            nargs="?",
+            const="",
+            default=None,
+            metavar="GROUP",
+            help="List the options of every config group, or of this group, "
+            "instead of composing.",
+        )
+        subparser.add_argument(
+            "--check",
+            action="store_true",
+            default=False,
+            help="Only check the overrides, without composing.",
+        )
 
         subparser.set_defaults(func=compose_config_from_args)
 
         return subparser
 
 
-def compose_config_from_args(args: argparse.Namespace) -> Dict:
+def add_fill_defaults_stats_argument(subparser: argparse.ArgumentParser) -> None:
     """
-    Wrapper for compose so that it can be called with `argparse` arguments from
-    the CLI.
-    # Parameters
-    args: `argparse.Namespace`
-        The parsed args from `argparse`.
+    Add the `--fill-defaults-stats` argument shared by the commands that fill
+    defaults.
+    """
+    subparser.add_argument(
+        "--fill-defaults-stats",
+        nargs="?",
+        const="-",
+        default=None,
+        metavar="OUTPUT_FILE",
+        help="Collect statistics about filling the defaults and write them as "
+        "JSON to this file. Prints them if no file is given.",
+    )
 
-    # Returns
-        The composed config.
 
+def add_output_format_argument(subparser: argparse.ArgumentParser) -> None:
+    """
+    Add the `--output-format` argument shared by the commands that save
+    configs.
     """
-    return compose_config(
-        config_path=args.config_path,
-        config_name=args.config_name,
-        job_name=args.job_name,
-        serialization_dir=args.serialization_dir,
-        config_overrides=args.overrides,
+    subparser.add_argument(
+        "--output-format",
+        choices=list(CONFIG_FORMATS),
+        default="json",
+        help="The format of the saved configs.",
     )
 
 
-def compose_config(
-    config_path: Union[str, PathLike],
-    config_name: str,
-    job_name: str,
-    serialization_dir: Optional[Union[str, PathLike]] = None,
-    config_overrides: List[str] = None,
-    fill_defaults: bool = False,
-) -> Dict:
+def add_multirun_arguments(subparser: argparse.ArgumentParser) -> None:
     """
-    Create an AllenNLP config by composing a set of `yaml` files with Hydra's
-    [`Compose API`](https://hydra.cc/docs/advanced/compose_api). Overriding
-    using Hydra's [`Override Grammar`](https://hydra.cc/docs/advanced/compose_api)
-    is also supported.
+    Add the `--multirun` argument and the arguments for selecting the points
+    of the sweep, shared by the commands that compose configs.
+    """
+    subparser.add_argument(
+        "-m",
+        "--multirun",
+        action="store_true",
+        default=False,
+        help="Expand the sweeps in the overrides, e.g. `model=C,D`, and run "
+        "every point of the sweep.",
+    )
+    subparser.add_argument(
+        "--shard",
+        nargs=2,
+        type=int,
+        default=None,
+        metavar=("INDEX", "NUM_SHARDS"),
+        help="With --multirun, only run the points in this shard of the sweep.",
+    )
+    subparser.add_argument(
+        "--sample",
+        type=int,
+        default=None,
+        metavar="NUM_POINTS",
+        help="With --multirun, only run this many random points of the sweep.",
+    )
+    subparser.add_argument(
+        "--sample-seed",
+        type=int,
+        default=None,
+        help="The random seed for --sample.",
+    )
 
-    # Parameters
 
-    config_path: `Union[str, PathLike]`
-        Path to the root config directory.
+def get_sweep_indices(args: argparse.Namespace, sweep: "Sweep") -> Sequence[int]:
+    """
+    Get the indices of the points of `sweep` selected with `--shard` and
+    `--sample`.
+    """
+    indices: Sequence[int] = range(len(sweep))
+    if args.shard is not None:
+        indices = sweep.get_shard(*args.shard)
+    if args.sample is not None:
+        indices = sweep.sample_indices(args.sample, args.sample_seed, indices)
+    logger.info(f"Running {len(indices)} of the {len(sweep)} points of the sweep")
+    return indices
 
-    config_name: `str`
-        The name of the root config file.
 
-    job_name: `str`
-        The job name. This is passed to Hydra and is not used here.
+def fill_defaults_stats_context(args: argparse.Namespace):
+    """
+    Get the context manager that collects the fill statistics requested with
+    `--fill-defaults-stats`, or one that does nothing.
+    """
+    if getattr(args, "fill_defaults_stats", None) is None:
+        return nullcontext()
+    if not (args.fill_defaults or getattr(args, "prune_defaults", False)):
+        logger.warning("--fill-defaults-stats has no effect without --fill-defaults")
+    return collect_fill_stats()
 
-    serialization_dir: `Optional[Union[str, PathLike]]`, optional (default=`None`)
-        If this is passed, it is the directory where the new AllenNLP config
-        will be saved to. The name used for saving will be the `config_name` and
-         it will be a `.json` file.
 
-    config_overrides: `List[str]`, optional (default=`[]`)
-        List of overrides using Hydra's override grammar for the config.
+def check_overrides_from_args(args: argparse.Namespace) -> None:
+    """
+    Check the overrides against the index of the config directory before
+    composing, see `allennlp_hydra.config.config_index`. With `--check`,
+    raises a `ValueError` listing the overrides that cannot be composed.
+    Otherwise they are logged as warnings and Hydra reports the real errors.
+    """
+    from allennlp_hydra.config.config_index import load_config_index
+
+    index = load_config_index(args.config_path)
+    problems = index.check_overrides(args.config_name, args.overrides or [])
+    if problems and getattr(args, "check", False):
+        raise ValueError(
+            "The overrides cannot be composed:\n"
+            + "\n".join(f"  {problem}" for problem in problems)
+        )
+    for problem in problems:
+        logger.warning(f"The override may not be composed: {problem}")
 
-    fill_defaults: `bool`, optional (default=`False`)
-        Add arguments and their default values to the config if they are not
-        specified.
 
-    # Returns
+def compose_config_from_args(args: argparse.Namespace) -> Optional[Dict]:
+    """
+    Wrapper for compose so that it can be called with `argparse` arguments from
+    the CLI.
+    # Parameters
+    args: `argparse.Namespace`
+        The parsed args from `argparse`.
 
-    `Dict`
-        The dictionary config generated by Hydra.
+    # Returns
+        The composed config, or the result of every point with `--multirun`.
+        The listed options with `--list`, and `None` with `--check`.
 
     """
-    if config_overrides is None:
-        config_overrides = []
-
-    # Make the config path relative to the location of THIS file. I.E. make it
-    # relative to the `allennlp_hydra/commands` subdirectory.
-    config_path = Path(config_path).absolute().resolve()
-    if not config_path.exists():
-        raise ValueError(f"Config path '{config_path}' does not exist")
-    if not config_path.is_dir():
-        raise ValueError(f"Config path '{config_path}' is not a directory")
-
-    # Compose the config with hydra.
-    with hydra.initialize_config_dir(config_dir=str(config_path), job_name=job_name):
-        cfg = hydra.compose(config_name=config_name, overrides=config_overrides)
-
-    # cfg is a `DictConfig` object, so we need to convert it to a normal dict
-    # using OmegaConf in order to save it.
-    cfg = OmegaConf.to_container(cfg, resolve=True)
-
-    # If filling the defaults, fill them here.
-    if fill_defaults:
-        cfg["data_loader"] = fill_config_with_default_values(
-            DataLoader, cfg["data_loader"]
-        )
-        cfg["dataset_reader"] = fill_config_with_default_values(
-            DatasetReader, cfg["dataset_reader"]
+    from allennlp_hydra.config.compose import compose_config
+    from allennlp_hydra.config.compose_cache import ComposeCache
+
+    if getattr(args, "list", None) is not None:
+        return _list_configs_from_args(args)
+
+    include_package = getattr(args, "include_package", None) or []
+    watch = getattr(args, "watch", False)
+    multirun = getattr(args, "multirun", False)
+    if multirun and watch:
+        raise ValueError("--watch cannot be combined with --multirun")
+    if args.config_name is None or args.job_name is None:
+        raise ValueError("config_name and job_name are required to compose a config")
+
+    check_overrides_from_args(args)
+    if getattr(args, "check", False):
+        print("The overrides can be composed")
+        return None
+    if args.serialization_dir is None:
+        raise ValueError("-s/--serialization-dir is required to compose a config")
+
+    if multirun:
+        return _compose_sweep_from_args(args, include_package)
+
+    compose_cache = None
+    if args.cache_dir is not None:
+        compose_cache = ComposeCache(
+            cache_dir=args.cache_dir or None, include_package=include_package
         )
-        cfg["model"] = fill_config_with_default_values(Model, cfg["model"])
-        cfg["trainer"] = fill_config_with_default_values(Trainer, cfg["trainer"])
 
-    # We only save if a serialization dir was passed.
-    if serialization_dir is not None:
-        cfg_save_path = Path(serialization_dir).joinpath(f"{config_name}.json")
-        with cfg_save_path.open("w", encoding="utf-8") as cfg_file:
-            # Add the extra options for readability.
-            json.dump(cfg, cfg_file, indent=True, sort_keys=True)
+    with fill_defaults_stats_context(args) as stats:
+        if args.fill_defaults or args.prune_defaults:
+            # Imported here, so composing without the defaults does not load
+            # the schema module and its dependencies. The schema is only
+            # loaded once a config is filled, i.e. not for cached configs.
+            from allennlp_hydra.config.defaults_schema import load_defaults_schema_lazily
+
+            load_defaults_schema_lazily(include_package)
+
+        if watch:
+            if compose_cache is not None:
+                logger.warning("--cache-dir is not used with --watch")
+            cfg = _watch_config_from_args(args)
+        else:
+            cfg = compose_config(
+                config_path=args.config_path,
+                config_name=args.config_name,
+                job_name=args.job_name,
+                serialization_dir=args.serialization_dir,
+                config_overrides=args.overrides,
+                fill_defaults=args.fill_defaults,
+                prune_defaults=args.prune_defaults,
+                compose_cache=compose_cache,
+                output_format=args.output_format,
+            )
+
+    if stats is not None:
+        write_fill_stats(stats, args.fill_defaults_stats)
+    return cfg
+
 
+def _list_configs_from_args(args: argparse.Namespace) -> Dict[str, List[str]]:
+    from allennlp_hydra.config.config_index import format_config_index, load_config_index
+
+    index = load_config_index(args.config_path)
+    if args.list:
+        options = {args.list: index.get_options(args.list)}
+        print("\n".join(options[args.list]))
+    else:
+        options = index.groups
+        print(format_config_index(index))
+    return options
+
+
+def _watch_config_from_args(args: argparse.Namespace) -> Optional[Dict]:
+    from allennlp_hydra.config.compose import watch_config
+
+    cfg = None
+    try:
+        for cfg in watch_config(
+            config_path=args.config_path,
+            config_name=args.config_name,
+            job_name=args.job_name,
+            serialization_dir=args.serialization_dir,
+            config_overrides=args.overrides,
+            fill_defaults=args.fill_defaults,
+            prune_defaults=args.prune_defaults,
+            output_format=args.output_format,
+        ):
+            print(f"Saved '{args.config_name}' at {time.strftime('%X')}, watching for changes")
+    except KeyboardInterrupt:
+        pass
     return cfg
+
+
+def _compose_sweep_from_args(args: argparse.Namespace, include_package: List[str]):
+    from allennlp_hydra.commands.compose_batch import (
+        BatchItem,
+        compose_batch,
+        report_batch_results,
+        write_batch_results,
+    )
+    from allennlp_hydra.config.compose import ComposeSession
+
+    if args.cache_dir is not None:
+        logger.warning("--cache-dir is not used with --multirun")
+
+    session = ComposeSession(args.config_path, job_name=args.job_name)
+    sweep = session.sweep(args.overrides or [])
+    items = (
+        BatchItem(f"{args.config_name}_{index}", sweep[index])
+        for index in get_sweep_indices(args, sweep)
+    )
+
+    with fill_defaults_stats_context(args) as stats:
+        # The defaults schema is loaded by `compose_batch`.
+        results = compose_batch(
+            config_path=args.config_path,
+            config_name=args.config_name,
+            job_name=args.job_name,
+            items=items,
+            fill_defaults=args.fill_defaults,
+            prune_defaults=args.prune_defaults,
+            include_package=include_package,
+        )
+        reported = write_batch_results(
+            results,
+            serialization_dir=args.serialization_dir,
+            config_format=args.output_format,
+        )
+
+    if stats is not None:
+        write_fill_stats(stats, args.fill_defaults_stats)
+    report_batch_results(reported)
+    return reported
@@ -0,0 +1,100 @@
+"""
+The `config-diff` command shows the keys whose values differ between composed
+configs, e.g. between the runs of a sweep, as a table with a row for every
+config and a column for every varying key. See
+`allennlp_hydra.config.config_diff`.
+
+# Parameters
+
+paths: `List[Union[str, PathLike]]`
+    The configs to compare. Each path is a config file in any of the output
+    formats of `compose`, a JSONL file or SQLite database written by
+    `compose-batch`, or a directory. A directory is searched for the
+    `config.json` files of serialization dirs, and if there are none, every
+    config file directly in it is used, e.g. the output of
+    `compose --multirun`.
+
+--json: `bool`, optional (default=`False`)
+    Flag. Print the varying keys and their values in every config as JSON
+    instead of a table.
+
+# Example
+
+```zsh
+allennlp config-diff experiments/sweep
+```
+
+```
+name  model.encoder.hidden_size  trainer.optimizer.lr
+0     3                          0.1
+1     5                          0.1
+2     5                          0.01
+```
+"""
+from typing import TYPE_CHECKING
+
+import argparse
+import json
+import logging
+
+from allennlp.commands.subcommand import Subcommand
+from overrides import overrides
+
+if TYPE_CHECKING:
+    from allennlp_hydra.config.config_diff import ConfigDiff
+
+logger = logging.getLogger(__name__)
+
+
+@Subcommand.register("config-diff")
+class DiffConfigs(Subcommand):
+    @overrides
+    def add_subparser(
+        self, parser: argparse._SubParsersAction
+    ) -> argparse.ArgumentParser:
+        description = """Show the keys whose values differ between composed configs"""
+        subparser = parser.add_parser(
+            self.name, description=description, help=description
+        )
+
+        subparser.add_argument(
+            "paths",
+            nargs="+",
+            type=str,
+            help="The config files, compose-batch outputs or directories of "
+            "configs to compare.",
+        )
+        subparser.add_argument(
+            "--json",
+            action="store_true",
+            default=False,
+            help="Print the varying keys and their values as JSON.",
+        )
+
+        subparser.set_defaults(func=config_diff_from_args)
+
+        return subparser
+
+
+def config_diff_from_args(args: argparse.Namespace) -> "ConfigDiff":
+    """
+    Wrapper for `diff_configs` so that it can be called with `argparse`
+    arguments from the CLI.
+
+    # Returns
+        The diff of the configs.
+    """
+    from allennlp_hydra.config.config_diff import diff_configs, format_diff_table, load_configs
+
+    configs = load_configs(args.paths)
+    if not configs:
+        raise ValueError(f"No configs found in {', '.join(args.paths)}")
+
+    diff = diff_configs(configs)
+    if args.json:
+        print(json.dumps(diff.to_json(), indent=2))
+    elif not diff.varying_keys:
+        print(f"The {len(diff.names)} configs are the same")
+    else:
+        print(format_diff_table(diff))
+    return diff
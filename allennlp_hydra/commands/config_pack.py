@@ -0,0 +1,71 @@
+"""
+The `config-pack` command packs a config directory into a single file that
+can be used instead of the directory by `compose`, `compose-batch` and
+`hydra-train`. Composing from a pack does not read any yaml files, which is
+much faster for large config trees, especially on network filesystems. See
+`allennlp_hydra.config.config_pack`.
+
+# Parameters
+
+config_path: `Union[str, PathLike]`
+    Path to the root config directory.
+
+pack_path: `Union[str, PathLike]`
+    The file to write the pack to. It must end with `.pack`, and is replaced
+    if it exists.
+
+# Example
+
+```zsh
+allennlp config-pack conf conf.pack
+allennlp compose conf.pack config example -s experiments
+```
+"""
+import argparse
+import logging
+
+from allennlp.commands.subcommand import Subcommand
+from overrides import overrides
+
+logger = logging.getLogger(__name__)
+
+
+@Subcommand.register("config-pack")
+class PackConfigs(Subcommand):
+    @overrides
+    def add_subparser(
+        self, parser: argparse._SubParsersAction
+    ) -> argparse.ArgumentParser:
+        description = """Pack a config directory into a single file to compose from"""
+        subparser = parser.add_parser(
+            self.name, description=description, help=description
+        )
+
+        subparser.add_argument(
+            "config_path", type=str, help="Path to the config directory."
+        )
+        subparser.add_argument(
+            "pack_path", type=str, help="The file to write the pack to, ending with .pack."
+        )
+
+        subparser.set_defaults(func=config_pack_from_args)
+
+        return subparser
+
+
+def config_pack_from_args(args: argparse.Namespace) -> int:
+    """
+    Wrapper for `pack_config_dir` so that it can be called with `argparse`
+    arguments from the CLI.
+
+    # Returns
+        The number of packed configs.
+    """
+    from allennlp_hydra.config.config_pack import PACK_SUFFIX, pack_config_dir
+
+    if not args.pack_path.endswith(PACK_SUFFIX):
+        raise ValueError(f"The path of the pack must end with '{PACK_SUFFIX}'")
+
+    num_configs = pack_config_dir(args.config_path, args.pack_path)
+    logger.info(f"Packed {num_configs} configs from '{args.config_path}' into '{args.pack_path}'")
+    return num_configs
@@ -0,0 +1,82 @@
+"""
+The `defaults-schema` command builds the schema of the keyword parameters and
+default values of every registered class. The schema is used by
+`--fill-defaults` instead of reflecting over every class with `inspect`.
+
+`compose --fill-defaults` and `hydra-train --fill-defaults` build the schema
+automatically when there is none for the current environment, so this command
+is only needed to build it ahead of time, to force a rebuild (e.g. after
+changing an included package without changing its version), or to save it to
+a specific file.
+
+# Parameters
+
+-o/--output-file: `Union[str, PathLike]`, optional (default=`None`)
+    Save the schema to this file instead of the schema cache.
+
+--force: `bool`, optional (default=`False`)
+    Flag. Rebuild the schema even if one exists for the current environment.
+"""
+from typing import TYPE_CHECKING
+
+import argparse
+import logging
+
+from allennlp.commands.subcommand import Subcommand
+from overrides import overrides
+
+if TYPE_CHECKING:
+    from allennlp_hydra.config.defaults_schema import DefaultsSchema
+
+logger = logging.getLogger(__name__)
+
+
+@Subcommand.register("defaults-schema")
+class BuildDefaultsSchema(Subcommand):
+    @overrides
+    def add_subparser(
+        self, parser: argparse._SubParsersAction
+    ) -> argparse.ArgumentParser:
+        description = """Build the schema of the default values of every registered class"""
+        subparser = parser.add_parser(
+            self.name, description=description, help=description
+        )
+
+        subparser.add_argument(
+            "-o",
+            "--output-file",
+            type=str,
+            default=None,
+            help="Save the schema to this file instead of the schema cache.",
+        )
+
+        subparser.add_argument(
+            "--force",
+            action="store_true",
+            default=False,
+            help="Rebuild the schema even if one exists for the current environment.",
+        )
+
+        subparser.set_defaults(func=build_defaults_schema_from_args)
+
+        return subparser
+
+
+def build_defaults_schema_from_args(args: argparse.Namespace) -> "DefaultsSchema":
+    from allennlp_hydra.config.defaults_schema import (
+        build_defaults_schema,
+        get_schema_fingerprint,
+        load_defaults_schema,
+    )
+
+    include_package = getattr(args, "include_package", None) or []
+
+    if args.output_file is not None:
+        schema = build_defaults_schema(get_schema_fingerprint(include_package))
+        schema.to_file(args.output_file)
+        print(f"Saved the defaults schema to {args.output_file}")
+    else:
+        schema = load_defaults_schema(include_package, force_rebuild=args.force)
+
+    print(f"Defaults schema {schema.fingerprint} has {len(schema)} classes")
+    return schema
@@ -13,13 +13,19 @@ use that documentation for understanding the composition of `.yaml` files.
 # Parameters
 
 config_path: `Union[str, PathLike]`
-    Path to the root config directory.
+    Path to the root config directory, or to a pack of it created by the
+    `config-pack` command. It can also be the path of a config
+    saved by the `compose` command, in any of its output formats, which is
+    then trained without composing it again. Configs saved as `pickle` are
+    loaded without parsing.
 
 config_name: `str`
-    The name of the root config file. Do NOT include the `.yaml`.
+    The name of the root config file. Do NOT include the `.yaml`. Not used
+    when `config_path` is a saved config.
 
 job_name: `str`
-    The job name. This is passed to Hydra and is not used here.
+    The job name. This is passed to Hydra and is not used here. Not used
+    when `config_path` is a saved config.
 
 -s/--serialization-dir: `Union[str, PathLike]`
     The directory where everything is saved.
@@ -50,17 +56,53 @@ job_name: `str`
     --overrides A=B C="D"
     ```
     Will be interpreted as overrides `['A=B', 'C="D"']`
+
+--fill-defaults: `bool`, optional (default=`False`)
+    Flag. Add the arguments and their default values of every class to the
+    config.
+
+--fill-defaults-stats: `str`, optional (default=`None`)
+    Collect statistics about filling the defaults and write them as JSON to
+    this file, or print them if no file is given. See the `compose` command.
+
+-m/--multirun: `bool`, optional (default=`False`)
+    Flag. The overrides may use Hydra's sweep syntax, e.g. `model=C,D`, and a
+    model is trained for every point of the sweep, one after the other. The
+    model of the point with index `i` is saved to `serialization_dir/i`.
+    `--shard`, `--sample` and `--sample-seed` select the points like for the
+    `compose` command.
+
+When `hydra_train_model_from_args` is called from Python, the namespace may
+also have `configs`, a mapping of config paths to configs in memory, e.g.
+`{"model/tagger": {...}}`. They are used instead of the files with the same
+paths, and `config_path` can be `None` if every config is in memory. See
+`allennlp_hydra.config.memory_source`.
 """
 
+from typing import TYPE_CHECKING, List, Optional
+
 import argparse
 import logging
+from pathlib import Path
 
 from overrides import overrides
 
 from allennlp.commands.subcommand import Subcommand
-from allennlp.commands.train import train_model
 from allennlp.common import Params
 
+from allennlp_hydra.commands.compose_config import (
+    add_fill_defaults_stats_argument,
+    add_multirun_arguments,
+    check_overrides_from_args,
+    fill_defaults_stats_context,
+    get_sweep_indices,
+)
+from allennlp_hydra.config.config_formats import load_config
+from allennlp_hydra.config.fill_stats import write_fill_stats
+
+if TYPE_CHECKING:
+    from allennlp.models import Model
+
 logger = logging.getLogger(__name__)
 
 
@@ -78,13 +120,18 @@ class HydraTrain(Subcommand):
         )
 
         subparser.add_argument(
-            "config_path", type=str, help="Path to the config directory."
+            "config_path",
+            type=str,
+            help="Path to the config directory or config pack, or to a config saved "
+            "by compose.",
         )
 
         subparser.add_argument(
-            "config_name", type=str, help="Name of the config file to use."
+            "config_name", type=str, nargs="?", help="Name of the config file to use."
+        )
+        subparser.add_argument(
+            "job_name", type=str, nargs="?", help="Name of the job."
         )
-        subparser.add_argument("job_name", type=str, help="Name of the job.")
 
         subparser.add_argument(
             "-s",
@@ -146,6 +193,8 @@ class HydraTrain(Subcommand):
             default=False,
             help="Add default arguments from each loaded class to the config.",
         )
+        add_fill_defaults_stats_argument(subparser)
+        add_multirun_arguments(subparser)
 
         subparser.set_defaults(func=hydra_train_model_from_args)
 
@@ -157,22 +206,63 @@ def hydra_train_model_from_args(args: argparse.Namespace):
     Just converts from an `argparse.Namespace` object to string paths.
     """
 
-    # Load the hydra config, overrides will be used here.
-    from allennlp_hydra.commands import compose_config
-
-    # We do NOT pass a serialization dir to the compose because we do not want
-    # to save the config here. `train_model` handles that for us.
-    config = compose_config.compose_config(
-        config_path=args.config_path,
-        config_name=args.config_name,
-        job_name=args.job_name,
-        serialization_dir=None,
-        config_overrides=args.overrides,
-        fill_defaults=args.fill_defaults,
+    from allennlp_hydra.config.compose import compose_config, get_filled_sections
+    from allennlp_hydra.config.config_pack import is_config_pack
+    from allennlp_hydra.config.defaults_schema import load_defaults_schema
+    from allennlp_hydra.config.fill_defaults import fill_config_with_default_values
+
+    # Config packs are files too, but they are composed like directories.
+    from_saved_config = (
+        args.config_path is not None
+        and Path(args.config_path).is_file()
+        and not is_config_pack(args.config_path)
     )
+    if from_saved_config:
+        if args.overrides or getattr(args, "multirun", False):
+            raise ValueError("Overrides cannot be applied to a saved config")
+    elif args.config_name is None or args.job_name is None:
+        raise ValueError("config_name and job_name are required to compose a config")
+    elif getattr(args, "configs", None) is None:
+        # Warns about typos in milliseconds, before composing.
+        check_overrides_from_args(args)
+
+    if getattr(args, "multirun", False):
+        return _hydra_train_sweep_from_args(args)
+
+    with fill_defaults_stats_context(args) as stats:
+        if args.fill_defaults:
+            load_defaults_schema(args.include_package)
+
+        if from_saved_config:
+            params = Params(load_config(args.config_path))
+        else:
+            # Load the hydra config, overrides will be used here. We do NOT
+            # pass a serialization dir to the compose because we do not want
+            # to save the config here. `train_model` handles that for us.
+            params = Params(
+                compose_config(
+                    config_path=args.config_path,
+                    config_name=args.config_name,
+                    job_name=args.job_name,
+                    serialization_dir=None,
+                    config_overrides=args.overrides,
+                    configs=getattr(args, "configs", None),
+                )
+            )
+
+        # The defaults are added to the `Params` directly so that the config
+        # is not copied again.
+        if args.fill_defaults:
+            for section, base_class in get_filled_sections().items():
+                fill_config_with_default_values(
+                    base_class, params.params[section], in_place=True
+                )
+
+    if stats is not None:
+        write_fill_stats(stats, args.fill_defaults_stats)
 
     return train_model(
-        params=Params(config),
+        params=params,
         serialization_dir=args.serialization_dir,
         recover=args.recover,
         force=args.force,
@@ -181,3 +271,65 @@ def hydra_train_model_from_args(args: argparse.Namespace):
         dry_run=args.dry_run,
         file_friendly_logging=args.file_friendly_logging,
     )
+
+
+def _hydra_train_sweep_from_args(args: argparse.Namespace) -> List[Optional["Model"]]:
+    """
+    Train a model for every point of the sweep in the overrides.
+    """
+    from allennlp_hydra.config.compose import ComposeSession, get_filled_sections
+    from allennlp_hydra.config.defaults_schema import load_defaults_schema
+    from allennlp_hydra.config.fill_defaults import fill_config_with_default_values
+    from allennlp_hydra.config.recompose import Recomposer
+
+    session = ComposeSession(
+        args.config_path, job_name=args.job_name, configs=getattr(args, "configs", None)
+    )
+    recomposer = Recomposer(session, args.config_name)
+    sweep = session.sweep(args.overrides or [])
+    if args.fill_defaults:
+        load_defaults_schema(args.include_package)
+
+    # Every config is composed before training, so that a bad point fails
+    # before any model is trained.
+    point_params = {}
+    with fill_defaults_stats_context(args) as stats:
+        for index in get_sweep_indices(args, sweep):
+            params = Params(recomposer.compose(sweep[index]))
+            if args.fill_defaults:
+                for section, base_class in get_filled_sections().items():
+                    fill_config_with_default_values(
+                        base_class, params.params[section], in_place=True
+                    )
+            point_params[index] = params
+
+    if stats is not None:
+        write_fill_stats(stats, args.fill_defaults_stats)
+
+    models = []
+    for index, params in point_params.items():
+        logger.info(f"Training point {index} of the sweep: {' '.join(sweep[index])}")
+        models.append(
+            train_model(
+                params=params,
+                serialization_dir=str(Path(args.serialization_dir).joinpath(str(index))),
+                recover=args.recover,
+                force=args.force,
+                node_rank=args.node_rank,
+                include_package=args.include_package,
+                dry_run=args.dry_run,
+                file_friendly_logging=args.file_friendly_logging,
+            )
+        )
+    return models
+
+
+def train_model(*args, **kwargs) -> Optional["Model"]:
+    """
+    Calls AllenNLP's `train_model`. It is imported when training starts
+    because importing it imports the training code and torch, which would slow
+    down every `allennlp` command that loads this plugin.
+    """
+    from allennlp.commands.train import train_model as allennlp_train_model
+
+    return allennlp_train_model(*args, **kwargs)
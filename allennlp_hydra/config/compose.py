@@ -0,0 +1,655 @@
+"""
+Composing AllenNLP configs from a set of `yaml` files with Hydra. This is the
+engine behind the `compose`, `compose-batch` and `hydra-train` commands, see
+`allennlp_hydra.commands.compose_config` for how configs are composed.
+
+Importing this module does not import AllenNLP or torch. They are only
+imported to fill or prune the default values of a config. It registers the
+resolvers of `allennlp_hydra.config.resolvers`.
+
+Configs are composed with a config loader owned by a `ComposeSession`, not
+with Hydra's global state, so they can be composed from many threads at
+once, and from inside a Hydra app. `compose_config_async` and
+`ComposeSession.compose_async` compose in an executor for asyncio
+applications.
+"""
+from typing import (
+    TYPE_CHECKING, Any, Dict, Iterable, Iterator, Mapping, Union, List, Optional, Set, Tuple, cast
+)
+
+import asyncio
+from concurrent.futures import Executor
+import copy
+import functools
+import os
+from os import PathLike
+import logging
+from pathlib import Path
+import re
+import threading
+import time
+
+from hydra._internal.config_loader_impl import ConfigLoaderImpl
+from hydra._internal.config_repository import ConfigRepository
+from hydra._internal.utils import create_config_search_path
+from hydra.core.config_search_path import ConfigSearchPath, SearchPathQuery
+from hydra.core.default_element import DefaultsTreeNode
+from hydra.core.override_parser.overrides_parser import OverridesParser
+from hydra.core.override_parser.types import Override
+from hydra.types import RunMode
+from hydra.plugins.config_source import ConfigResult
+from omegaconf import DictConfig, OmegaConf, open_dict
+
+from allennlp_hydra.config.config_formats import (
+    CONFIG_FORMATS,
+    get_config_file_name,
+    save_config,
+)
+from allennlp_hydra.config.config_pack import PackConfigSource, is_config_pack
+from allennlp_hydra.config.memory_source import MemoryConfigs
+from allennlp_hydra.config.resolvers import register_resolvers
+from allennlp_hydra.config.sweep import Sweep
+
+if TYPE_CHECKING:
+    from allennlp_hydra.config.compose_cache import ComposeCache
+
+logger = logging.getLogger(__name__)
+
+# Makes `${file_lines:...}` and the other file resolvers available to every
+# composed config.
+register_resolvers()
+
+# The seconds between checking the files of a watched config for changes.
+WATCH_POLL_INTERVAL = 0.5
+
+# Hydra's own configs, e.g. `hydra/job_logging/default`, are loaded by every
+# session. They never change, so they are only loaded once per process.
+_HYDRA_CONFIG_SOURCE = "pkg://hydra.conf"
+_HYDRA_CONFIGS: Dict[str, ConfigResult] = {}
+
+# Held while creating the config loader of a session. Hydra discovers its
+# plugins the first time they are used, which is not thread-safe.
+_SESSION_LOCK = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def get_filled_sections() -> Dict[str, type]:
+    """
+    Get the sections of an AllenNLP config that are filled with
+    `fill_defaults` and the base class of each. Their base classes import
+    torch, so they are only imported when they are needed.
+    """
+    from allennlp.data import DataLoader, DatasetReader
+    from allennlp.models import Model
+    from allennlp.training import Trainer
+
+    return {
+        "data_loader": DataLoader,
+        "dataset_reader": DatasetReader,
+        "model": Model,
+        "trainer": Trainer,
+    }
+
+
+def compose_config(
+    config_path: Optional[Union[str, PathLike]],
+    config_name: str,
+    job_name: str,
+    serialization_dir: Optional[Union[str, PathLike]] = None,
+    config_overrides: List[str] = None,
+    fill_defaults: bool = False,
+    prune_defaults: bool = False,
+    compose_cache: Optional["ComposeCache"] = None,
+    output_format: str = "json",
+    configs: Optional[Mapping[str, Any]] = None,
+) -> Dict:
+    """
+    Create an AllenNLP config by composing a set of `yaml` files with Hydra's
+    [`Compose API`](https://hydra.cc/docs/advanced/compose_api). Overriding
+    using Hydra's [`Override Grammar`](https://hydra.cc/docs/advanced/compose_api)
+    is also supported.
+
+    # Parameters
+
+    config_path: `Optional[Union[str, PathLike]]`
+        Path to the root config directory, or to a pack of it created with
+        `allennlp_hydra.config.config_pack.pack_config_dir`. It can be `None`
+        if `configs` are passed.
+
+    config_name: `str`
+        The name of the root config file.
+
+    job_name: `str`
+        The job name. This is passed to Hydra and is not used here.
+
+    serialization_dir: `Optional[Union[str, PathLike]]`, optional (default=`None`)
+        If this is passed, it is the directory where the new AllenNLP config
+        will be saved to. The name used for saving will be the `config_name` and
+         the suffix of `output_format`.
+
+    config_overrides: `List[str]`, optional (default=`[]`)
+        List of overrides using Hydra's override grammar for the config.
+
+    fill_defaults: `bool`, optional (default=`False`)
+        Add arguments and their default values to the config if they are not
+        specified. The default configs of nested objects are filled in lazily,
+        see `LazyConfig`.
+
+    prune_defaults: `bool`, optional (default=`False`)
+        Remove the arguments whose values are the same as their defaults from
+        the config. Cannot be combined with `fill_defaults`.
+
+    compose_cache: `Optional[ComposeCache]`, optional (default=`None`)
+        If this is passed, the config is read from this cache when it was
+        composed before and none of its yaml files changed. Otherwise it is
+        composed and stored in the cache. Configs read from the cache are
+        plain JSON, so tuples are lists. Configs using resolvers that are not
+        in `compose_cache.CACHEABLE_RESOLVERS`, e.g. `${oc.env:...}`, are
+        composed every time.
+
+    output_format: `str`, optional (default=`"json"`)
+        The format of the saved config, one of
+        `allennlp_hydra.config.config_formats.CONFIG_FORMATS`.
+
+    configs: `Optional[Mapping[str, Any]]`, optional (default=`None`)
+        Configs in memory, keyed by their config path, e.g. `model/tagger`.
+        They are used instead of the files with the same paths in
+        `config_path`. See `allennlp_hydra.config.memory_source`. They cannot
+        be combined with `compose_cache`.
+
+    # Returns
+
+    `Dict`
+        The dictionary config generated by Hydra.
+
+    """
+    if fill_defaults and prune_defaults:
+        raise ValueError("Defaults cannot be both filled and pruned")
+    if output_format not in CONFIG_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'")
+    if config_overrides is None:
+        config_overrides = []
+    if configs is not None and compose_cache is not None:
+        raise ValueError("Configs in memory cannot be cached")
+
+    if config_path is not None:
+        config_path = _resolve_config_path(config_path)
+
+    if compose_cache is None:
+        cfg = _compose_with_hydra(
+            config_path, config_name, job_name, config_overrides, configs=configs
+        )
+        _apply_defaults(cfg, fill_defaults, prune_defaults)
+    elif config_path is None:
+        raise ValueError("Configs without a config path cannot be cached")
+    else:
+        from allennlp_hydra.config.compose_cache import CACHEABLE_RESOLVERS
+
+        cache_key = compose_cache.get_key(
+            config_path, config_name, config_overrides, fill_defaults, prune_defaults
+        )
+        cached = compose_cache.get(cache_key)
+        if cached is None:
+            # Another process may be composing the same config, in which case
+            # this waits for it and uses its entry.
+            with compose_cache.lock(cache_key):
+                cached = compose_cache.get(cache_key)
+                if cached is None:
+                    dependencies: List[str] = []
+                    resolvers: Set[str] = set()
+                    cached = _compose_with_hydra(
+                        config_path,
+                        config_name,
+                        job_name,
+                        config_overrides,
+                        dependencies,
+                        resolvers=resolvers,
+                    )
+                    _apply_defaults(cached, fill_defaults, prune_defaults)
+                    uncacheable = resolvers - CACHEABLE_RESOLVERS
+                    if uncacheable:
+                        logger.debug(
+                            f"Not caching '{config_name}', it uses the resolvers "
+                            f"{sorted(uncacheable)}"
+                        )
+                    else:
+                        compose_cache.put(cache_key, cached, config_path, dependencies)
+        cfg = cached
+
+    # We only save if a serialization dir was passed.
+    if serialization_dir is not None:
+        _save_config(cfg, serialization_dir, config_name, output_format)
+
+    return cfg
+
+
+async def compose_config_async(*args, executor: Optional[Executor] = None, **kwargs) -> Dict:
+    """
+    Run `compose_config` with the same arguments in `executor`, or in the
+    default executor of the event loop, without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        executor, functools.partial(compose_config, *args, **kwargs)
+    )
+
+
+def watch_config(
+    config_path: Union[str, PathLike],
+    config_name: str,
+    job_name: str,
+    serialization_dir: Union[str, PathLike],
+    config_overrides: Optional[List[str]] = None,
+    fill_defaults: bool = False,
+    prune_defaults: bool = False,
+    output_format: str = "json",
+    poll_interval: float = WATCH_POLL_INTERVAL,
+) -> Iterator[Dict]:
+    """
+    Compose and save a config like `compose_config`, then compose and save it
+    again whenever one of the yaml files in its defaults list changes. The
+    config is only saved again if it changed.
+
+    The files are polled for changes every `poll_interval` seconds, and only
+    the yaml files that changed are read again. If the config cannot be
+    composed, the error is logged and the files of the last composed config
+    are watched, or every yaml file in the config directory if there is none.
+    Packed config directories cannot be watched.
+
+    # Returns
+
+    `Iterator[Dict]`
+        Every config after it is saved. It never stops, so the caller decides
+        when to stop watching.
+    """
+    if fill_defaults and prune_defaults:
+        raise ValueError("Defaults cannot be both filled and pruned")
+    config_dir = _resolve_config_path(config_path)
+    if is_config_pack(config_dir):
+        raise ValueError("Config packs cannot be watched, watch their config directory")
+    session = ComposeSession(config_dir, job_name=job_name)
+    config_overrides = list(config_overrides or [])
+
+    # The state of each watched file, keyed by its config path.
+    watched: Dict[str, Optional[Tuple[int, int]]] = {}
+    last_cfg = None
+    while True:
+        # The states are read before composing, so changes made while
+        # composing are not missed.
+        states_before = dict(watched)
+        try:
+            cfg = session.compose(
+                config_name, config_overrides, fill_defaults, prune_defaults
+            )
+            dependencies = session.get_dependencies(config_name, config_overrides)
+        except Exception as e:
+            logger.error(f"Could not compose '{config_name}': {e}")
+            if not watched:
+                watched = _get_file_states(
+                    config_dir,
+                    (
+                        str(yaml_path.relative_to(config_dir).with_suffix(""))
+                        for yaml_path in config_dir.rglob("*.yaml")
+                    ),
+                )
+        else:
+            current_states = _get_file_states(
+                config_dir,
+                [dependency for dependency in dependencies if dependency not in watched],
+            )
+            watched = {
+                dependency: states_before[dependency]
+                if dependency in states_before
+                else current_states[dependency]
+                for dependency in dependencies
+            }
+            if cfg != last_cfg:
+                _save_config(cfg, serialization_dir, config_name, output_format)
+                last_cfg = cfg
+                yield cfg
+
+        changed = _wait_for_changes(config_dir, watched, poll_interval)
+        logger.info(f"Changed: {', '.join(changed)}")
+        session.clear_cache(changed)
+
+
+def _get_missing_optional_defaults(tree: DefaultsTreeNode) -> Iterator[str]:
+    # Hydra keeps the optional defaults it did not find in the defaults tree,
+    # marked as deleted.
+    for child in tree.children or []:
+        if isinstance(child, DefaultsTreeNode):
+            yield from _get_missing_optional_defaults(child)
+        elif child.is_deleted() and child.is_optional() and child.get_name() is not None:
+            yield child.get_config_path()
+
+
+def _get_file_states(
+    config_dir: Path, config_paths: Iterable[str]
+) -> Dict[str, Optional[Tuple[int, int]]]:
+    states: Dict[str, Optional[Tuple[int, int]]] = {}
+    for config_path in config_paths:
+        try:
+            stat = os.stat(config_dir.joinpath(f"{config_path}.yaml"))
+            states[config_path] = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            states[config_path] = None
+    return states
+
+
+def _wait_for_changes(
+    config_dir: Path,
+    watched: Dict[str, Optional[Tuple[int, int]]],
+    poll_interval: float,
+) -> List[str]:
+    while True:
+        time.sleep(poll_interval)
+        current = _get_file_states(config_dir, watched)
+        changed = [path for path, state in current.items() if state != watched[path]]
+        if changed:
+            return changed
+
+
+def _save_config(
+    cfg: Dict,
+    serialization_dir: Union[str, PathLike],
+    config_name: str,
+    output_format: str,
+) -> None:
+    cfg_save_path = Path(serialization_dir).joinpath(
+        get_config_file_name(config_name, output_format)
+    )
+    save_config(cfg, cfg_save_path, output_format)
+
+
+def _compose_with_hydra(
+    config_path: Optional[Path],
+    config_name: str,
+    job_name: str,
+    config_overrides: List[str],
+    dependencies: Optional[List[str]] = None,
+    configs: Optional[Mapping[str, Any]] = None,
+    resolvers: Optional[Set[str]] = None,
+) -> Dict:
+    """
+    Compose the config with Hydra. If `dependencies` is passed, the config
+    paths in the defaults list of the config are added to it. If `resolvers`
+    is passed, the names of the resolvers the config uses are added to it.
+    """
+    # A new session for every config, so changes to the yaml files are seen
+    # and Hydra's global state is not used.
+    session = ComposeSession(config_path, job_name=job_name, configs=configs)
+    if dependencies is not None:
+        dependencies.extend(session.get_dependencies(config_name, config_overrides))
+    if resolvers is None:
+        return session.compose(config_name, config_overrides)
+
+    from allennlp_hydra.config.compose_cache import get_resolver_names
+
+    unresolved = session.compose_unresolved(config_name, config_overrides)
+    resolvers.update(get_resolver_names(OmegaConf.to_container(unresolved, resolve=False)))
+    return cast(Dict, OmegaConf.to_container(unresolved, resolve=True))
+
+
+def _apply_defaults(cfg: Dict, fill_defaults: bool, prune_defaults: bool) -> None:
+    # If filling the defaults, fill them here. `cfg` was just created, so it
+    # does not need to be copied. The default configs of nested objects are
+    # only created once they are accessed or saved.
+    if not (fill_defaults or prune_defaults):
+        return
+    from allennlp_hydra.config.fill_defaults import (
+        fill_config_with_default_values,
+        prune_default_values,
+    )
+
+    if fill_defaults:
+        for section, base_class in get_filled_sections().items():
+            cfg[section] = fill_config_with_default_values(
+                base_class, cfg[section], share_structure=True, lazy=True
+            )
+    else:
+        for section, base_class in get_filled_sections().items():
+            cfg[section] = prune_default_values(base_class, cfg[section])
+
+
+class ComposeSession:
+    """
+    Composes configs from one config directory without setting up Hydra for
+    every config. `compose_config` creates a new session each time it is
+    called, which searches for the config sources and plugins again. The
+    session does this once, so composing many configs in one process, e.g.
+    for a sweep, is much faster:
+
+    ```python
+    session = ComposeSession("conf")
+    configs = [
+        session.compose("config", [f"model.input_dim={dim}"])
+        for dim in range(1, 100)
+    ]
+    ```
+
+    The session does not use Hydra's global state, so it can be used inside
+    of `hydra.initialize` or a `@hydra.main` app, and by many threads at once.
+    Every yaml file is only read the first time it is used, so call
+    `clear_cache` after changing them.
+
+    # Parameters
+
+    config_path: `Optional[Union[str, PathLike]]`, optional (default=`None`)
+        Path to the root config directory, or to a pack of it. Either this or
+        `configs` is required.
+
+    job_name: `str`, optional (default=`"compose"`)
+        The job name. This is passed to Hydra and is not used here.
+
+    configs: `Optional[Mapping[str, Any]]`, optional (default=`None`)
+        Configs in memory, keyed by their config path, e.g. `model/tagger`.
+        They are used instead of the files with the same paths in
+        `config_path`. See `allennlp_hydra.config.memory_source`.
+    """
+
+    def __init__(
+        self,
+        config_path: Optional[Union[str, PathLike]] = None,
+        job_name: str = "compose",
+        configs: Optional[Mapping[str, Any]] = None,
+    ):
+        if config_path is None and configs is None:
+            raise ValueError("Either a config path or configs are required")
+        self.config_path = None if config_path is None else _resolve_config_path(config_path)
+        self.memory_configs = None if configs is None else MemoryConfigs(configs)
+        self.job_name = job_name
+
+        if self.config_path is None:
+            search_path_dir = cast(MemoryConfigs, self.memory_configs).uri
+        elif is_config_pack(self.config_path):
+            search_path_dir = f"{PackConfigSource.scheme()}://{self.config_path}"
+        else:
+            search_path_dir = str(self.config_path)
+        with _SESSION_LOCK:
+            config_search_path = create_config_search_path(search_path_dir)
+            if self.config_path is not None and self.memory_configs is not None:
+                config_search_path.prepend(
+                    "memory", self.memory_configs.uri, anchor=SearchPathQuery(provider="main")
+                )
+            self._config_loader = ConfigLoaderImpl(config_search_path=config_search_path)
+            self._repository = _SessionConfigRepository(config_search_path)
+            self._config_loader.repository = self._repository
+
+    def sweep(self, overrides: List[str]) -> Sweep:
+        """
+        Expand the sweeps in `overrides`, see `Sweep`. Glob sweeps of config
+        groups, e.g. `model=glob(*)`, use the configs in this session's
+        directory.
+        """
+        return Sweep(overrides, config_loader=self._config_loader)
+
+    def parse_overrides(self, overrides: List[str]) -> List[Override]:
+        """
+        Parse overrides with Hydra's override grammar.
+        """
+        parser = OverridesParser.create(config_loader=self._config_loader)
+        return parser.parse_overrides(list(overrides))
+
+    def group_exists(self, group: str) -> bool:
+        """
+        If `group`, e.g. `model` or `trainer/optimizer`, is a config group.
+        """
+        return self._config_loader.repository.group_exists(group)
+
+    def get_dependencies(
+        self, config_name: str, overrides: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Get the config paths in the defaults list of a config, e.g.
+        `model/C`, including Hydra's own configs and the optional configs
+        that do not exist, which change the config once they are created.
+        """
+        defaults_list = self._config_loader.compute_defaults_list(
+            config_name, list(overrides or []), RunMode.RUN
+        )
+        dependencies = [
+            default.config_path
+            for default in defaults_list.defaults
+            if default.config_path is not None
+        ]
+        dependencies.extend(
+            config_path
+            for config_path in _get_missing_optional_defaults(defaults_list.defaults_tree)
+            if config_path not in dependencies
+        )
+        return dependencies
+
+    def clear_cache(self, config_paths: Optional[Iterable[str]] = None) -> None:
+        """
+        Forget the yaml files that were read, so they are read again. If
+        `config_paths` is passed, e.g. `["model/C"]`, only forget those.
+        """
+        loaded = self._repository.loaded
+        if config_paths is None:
+            loaded.clear()
+        else:
+            for config_path in config_paths:
+                loaded.pop(config_path, None)
+
+    def compose(
+        self,
+        config_name: str,
+        overrides: Optional[List[str]] = None,
+        fill_defaults: bool = False,
+        prune_defaults: bool = False,
+    ) -> Dict:
+        """
+        Compose a config. The arguments are the same as for `compose_config`.
+
+        # Returns
+
+        `Dict`
+            The dictionary config generated by Hydra.
+        """
+        if fill_defaults and prune_defaults:
+            raise ValueError("Defaults cannot be both filled and pruned")
+
+        cfg = cast(
+            Dict,
+            OmegaConf.to_container(self.compose_unresolved(config_name, overrides), resolve=True),
+        )
+        _apply_defaults(cfg, fill_defaults, prune_defaults)
+        return cfg
+
+    async def compose_async(
+        self,
+        config_name: str,
+        overrides: Optional[List[str]] = None,
+        fill_defaults: bool = False,
+        prune_defaults: bool = False,
+        executor: Optional[Executor] = None,
+    ) -> Dict:
+        """
+        Run `compose` in `executor`, or in the default executor of the event
+        loop, without blocking the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor,
+            functools.partial(self.compose, config_name, overrides, fill_defaults, prune_defaults),
+        )
+
+    def compose_unresolved(
+        self, config_name: str, overrides: Optional[List[str]] = None
+    ) -> DictConfig:
+        """
+        Compose a config without resolving its interpolations, and without
+        Hydra's own config.
+        """
+        # Hydra takes the job name from its global state unless it is set.
+        hydra_overrides = [*(overrides or []), _get_job_name_override(self.job_name)]
+        cfg = self._config_loader.load_configuration(
+            config_name=config_name,
+            overrides=hydra_overrides,
+            run_mode=RunMode.RUN,
+            from_shell=False,
+        )
+        with open_dict(cfg):
+            del cfg["hydra"]
+        return cfg
+
+
+class _SessionConfigRepository(ConfigRepository):
+    """
+    A `ConfigRepository` that keeps the configs it loaded from files for the
+    lifetime of the session. Hydra wraps the repository in a new
+    `CachingConfigRepository` for every composition, which deep copies it, so
+    the copies share the loaded configs. Hydra modifies the configs while
+    composing them, so every call gets its own copy.
+    """
+
+    def initialize_sources(self, config_search_path: ConfigSearchPath) -> None:
+        super().initialize_sources(config_search_path)
+        # Called by `__init__` and when the search path of a composition
+        # changes, when the loaded configs may come from other sources.
+        self.loaded: Dict[str, Optional[ConfigResult]] = {}
+
+    def load_config(self, config_path: str) -> Optional[ConfigResult]:
+        if config_path in self.loaded:
+            result = self.loaded[config_path]
+        elif config_path in _HYDRA_CONFIGS:
+            result = _HYDRA_CONFIGS[config_path]
+        else:
+            result = super().load_config(config_path)
+            # Configs from the `ConfigStore` can change at any time.
+            if result is None or not result.path.startswith("structured://"):
+                self.loaded[config_path] = result
+            # Hydra's package is always the first source.
+            if result is not None and result.path == _HYDRA_CONFIG_SOURCE:
+                _HYDRA_CONFIGS[config_path] = result
+
+        if result is None:
+            return None
+        result = copy.copy(result)
+        result.config = copy.deepcopy(result.config)
+        return result
+
+    def __deepcopy__(self, memo: Dict) -> "_SessionConfigRepository":
+        repository = copy.copy(self)
+        repository.sources = copy.deepcopy(self.sources, memo)
+        return repository
+
+
+def _get_job_name_override(job_name: str) -> str:
+    # The name is quoted, so it can contain the characters of Hydra's
+    # override grammar, e.g. `,` or `=`. In a quoted string, backslashes
+    # only need to be escaped before a quote and at the end.
+    escaped = re.sub(r"(\\*)'", lambda match: match[1] * 2 + "\\'", job_name)
+    escaped = re.sub(r"(\\+)$", lambda match: match[1] * 2, escaped)
+    return f"hydra.job.name='{escaped}'"
+
+
+def _resolve_config_path(config_path: Union[str, PathLike]) -> Path:
+    config_path = Path(config_path).absolute().resolve()
+    if not config_path.exists():
+        raise ValueError(f"Config path '{config_path}' does not exist")
+    if not config_path.is_dir() and not is_config_pack(config_path):
+        raise ValueError(
+            f"Config path '{config_path}' is not a directory or a config pack"
+        )
+    return config_path
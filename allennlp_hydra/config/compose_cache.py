@@ -0,0 +1,261 @@
+"""
+A persistent cache of composed configs. Composing with Hydra scans the config
+directory, loads and merges every yaml file, and possibly fills the defaults,
+so configs that were already composed are stored on disk and reused.
+
+Every entry is keyed by the config directory, the config name, the overrides,
+the options used to compose it and the library versions. The entry records
+the hash of every yaml file in the defaults list of the config, and is only
+used while all of them are unchanged. The files in the defaults list that do
+not exist, e.g. optional configs, are recorded as absent, and the entry is
+not used once they are created. Configs composed from a config pack record
+the hash of the pack instead. Entries are written atomically and
+composing a missing entry holds a file lock, so the cache directory can be
+shared by several processes, on one machine or on a shared filesystem.
+
+Configs that use resolvers whose value is not determined by the yaml files,
+such as `${oc.env:...}`, `${now:...}` or the file resolvers of
+`allennlp_hydra.config.resolvers`, are composed every time and never stored,
+see `CACHEABLE_RESOLVERS`.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
+
+import hashlib
+from importlib import metadata
+import json
+import logging
+from os import PathLike
+from pathlib import Path
+import re
+
+from filelock import BaseFileLock, FileLock
+
+from allennlp_hydra.utils import file_utils
+from allennlp_hydra.version import VERSION
+
+logger = logging.getLogger(__name__)
+
+# Bump this whenever the layout of the entries changes.
+COMPOSE_CACHE_FORMAT_VERSION = 2
+
+# The distributions whose versions change how configs are composed.
+_COMPOSE_DISTRIBUTIONS = ("hydra-core", "omegaconf")
+
+# The resolvers whose value only depends on the config itself. Configs using
+# any other resolver are not stored, since their value can change while the
+# yaml files do not.
+CACHEABLE_RESOLVERS = {"oc.decode"}
+
+_RESOLVER_CALL = re.compile(r"\$\{\s*([\w.-]+)\s*:")
+
+
+class ComposeCache:
+    """
+    Cache of composed configs in `cache_dir`.
+
+    # Parameters
+    cache_dir: `Optional[Union[str, PathLike]]`, optional (default=`None`)
+        The directory of the cache. Defaults to `CACHE_ROOT/compose`.
+    include_package: `Iterable[str]`, optional (default=`()`)
+        The packages passed with `--include-package`. Filled and pruned
+        configs depend on them.
+    lock_timeout: `float`, optional (default=`-1`)
+        The seconds to wait for another process composing the same config.
+        Waits forever if negative.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[Union[str, PathLike]] = None,
+        include_package: Iterable[str] = (),
+        lock_timeout: float = -1,
+    ):
+        if cache_dir is None:
+            cache_dir = file_utils.CACHE_ROOT.joinpath("compose")
+        self.cache_dir = Path(cache_dir)
+        self.include_package = sorted(set(include_package))
+        self.lock_timeout = lock_timeout
+
+        # The environment fingerprint is the slowest part of a key, and it
+        # cannot change while the process is running.
+        self._environment_fingerprint: Optional[str] = None
+
+    def get_key(
+        self,
+        config_dir: Union[str, PathLike],
+        config_name: str,
+        overrides: List[str],
+        fill_defaults: bool = False,
+        prune_defaults: bool = False,
+    ) -> str:
+        """
+        Get the key of a composed config.
+
+        # Parameters
+        config_dir: `Union[str, PathLike]`
+            The absolute path of the config directory.
+        config_name: `str`
+            The name of the root config.
+        overrides: `List[str]`
+            The overrides, in order.
+        fill_defaults: `bool`, optional (default=`False`)
+            If the defaults were filled.
+        prune_defaults: `bool`, optional (default=`False`)
+            If the defaults were pruned.
+
+        # Returns
+        `str` The key.
+        """
+        key_data = {
+            "format_version": COMPOSE_CACHE_FORMAT_VERSION,
+            "config_dir": str(config_dir),
+            "config_name": config_name,
+            "overrides": list(overrides),
+            "fill_defaults": fill_defaults,
+            "prune_defaults": prune_defaults,
+            "versions": get_compose_versions(),
+        }
+
+        # The defaults depend on every installed and included package.
+        if fill_defaults or prune_defaults:
+            key_data["environment"] = self._get_environment_fingerprint()
+
+        return hashlib.sha256(
+            json.dumps(key_data, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Get the config stored for `key`.
+
+        # Returns
+        `Optional[Dict]` The config, or `None` if there is no entry or one of
+        the yaml files it was composed from changed.
+        """
+        entry_path = self.get_entry_path(key)
+        try:
+            entry = json.loads(entry_path.read_text("utf-8"))
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            logger.warning(f"Ignoring the invalid compose cache entry '{entry_path}': {e}")
+            return None
+
+        if entry.get("format_version") != COMPOSE_CACHE_FORMAT_VERSION:
+            return None
+
+        config_dir = Path(entry["config_dir"])
+        for relative_path, expected_hash in entry["dependencies"].items():
+            if _hash_file(config_dir.joinpath(relative_path)) != expected_hash:
+                logger.debug(f"'{relative_path}' changed, not using '{entry_path}'")
+                return None
+
+        return entry["config"]
+
+    def put(
+        self,
+        key: str,
+        config: Dict,
+        config_dir: Union[str, PathLike],
+        dependencies: Iterable[str],
+    ) -> None:
+        """
+        Store the composed config for `key`.
+
+        # Parameters
+        key: `str`
+            The key from `get_key`.
+        config: `Dict`
+            The composed config. It must be JSON serializable.
+        config_dir: `Union[str, PathLike]`
+            The absolute path of the config directory or config pack.
+        dependencies: `Iterable[str]`
+            The config paths in the defaults list of the config, e.g.
+            `dataset_reader/A`. Paths that are not in `config_dir`, such as
+            Hydra's own configs or missing optional configs, are recorded as
+            absent.
+        """
+        config_dir = Path(config_dir)
+        dependency_hashes = {}
+        if config_dir.is_file():
+            # A config pack, which is one file. Its hash is stored with an
+            # empty relative path, so `get` hashes the pack itself.
+            dependency_hashes[""] = _hash_file(config_dir)
+            dependencies = []
+        for config_path in dependencies:
+            # The hash is `None` if the file is absent.
+            relative_path = f"{config_path}.yaml"
+            dependency_hashes[relative_path] = _hash_file(config_dir.joinpath(relative_path))
+
+        entry_path = self.get_entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_utils.atomic_open(entry_path) as entry_file:
+            json.dump(
+                {
+                    "format_version": COMPOSE_CACHE_FORMAT_VERSION,
+                    "config_dir": str(config_dir),
+                    "dependencies": dependency_hashes,
+                    "config": config,
+                },
+                entry_file,
+                separators=(",", ":"),
+            )
+
+    def lock(self, key: str) -> BaseFileLock:
+        """
+        Get the lock held while composing the config for `key`, so that other
+        processes wait for the entry instead of composing it again.
+        """
+        entry_path = self.get_entry_path(key)
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        return FileLock(str(entry_path) + ".lock", timeout=self.lock_timeout)
+
+    def get_entry_path(self, key: str) -> Path:
+        return self.cache_dir.joinpath(key[:2], f"{key}.json")
+
+    def _get_environment_fingerprint(self) -> str:
+        if self._environment_fingerprint is None:
+            # Imported here because it imports AllenNLP, which is only needed
+            # when filling the defaults.
+            from allennlp_hydra.config.defaults_schema import get_schema_fingerprint
+
+            self._environment_fingerprint = get_schema_fingerprint(self.include_package)
+        return self._environment_fingerprint
+
+
+def get_compose_versions() -> Dict[str, str]:
+    """
+    Get the versions of the libraries that change how configs are composed.
+    """
+    versions = {"allennlp-hydra": VERSION}
+    for distribution in _COMPOSE_DISTRIBUTIONS:
+        try:
+            versions[distribution] = metadata.version(distribution)
+        except metadata.PackageNotFoundError:
+            versions[distribution] = "unknown"
+    return versions
+
+
+def get_resolver_names(config: Any) -> Set[str]:
+    """
+    Get the names of the resolvers called by the interpolations in an
+    unresolved config, e.g. `oc.env` for `${oc.env:HOME}`.
+    """
+    if isinstance(config, str):
+        return set(_RESOLVER_CALL.findall(config))
+    names: Set[str] = set()
+    if isinstance(config, dict):
+        for key, value in config.items():
+            names.update(get_resolver_names(key))
+            names.update(get_resolver_names(value))
+    elif isinstance(config, (list, tuple)):
+        for value in config:
+            names.update(get_resolver_names(value))
+    return names
+
+
+def _hash_file(path: Path) -> Optional[str]:
+    try:
+        return hashlib.sha256(path.read_bytes()).hexdigest()
+    except (FileNotFoundError, IsADirectoryError):
+        return None
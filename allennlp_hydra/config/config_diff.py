@@ -0,0 +1,218 @@
+"""
+Finding the keys whose values differ between composed configs, e.g. between
+the runs of a sweep. Every config is flattened into its leaves once, so the
+varying keys of `N` configs are found in one pass over all of their leaves
+instead of comparing every pair of configs.
+
+Keys are dotted paths to the leaves, with the indices of list items, e.g.
+`trainer.optimizer.lr` or `model.layers.0.dim`. Empty dicts and lists are
+leaves themselves.
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Tuple, Union
+
+import json
+from os import PathLike
+from pathlib import Path
+import sqlite3
+
+from allennlp_hydra.config.config_formats import is_config_file, load_config
+
+
+class _Missing:
+    """
+    The value of a key that is not in a config.
+    """
+
+    def __repr__(self) -> str:
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+# The suffixes of the files written by `compose-batch --output-file`.
+_JSONL_SUFFIXES = {".jsonl"}
+_SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+
+
+class ConfigDiff(NamedTuple):
+    """
+    The keys that vary between configs.
+
+    # Parameters
+    names: `List[str]`
+        The name of every config, in order.
+    varying_keys: `List[str]`
+        The keys whose values are not the same in every config, sorted. A key
+        that is missing from some of the configs varies.
+    values: `List[Dict[str, Any]]`
+        The values of the varying keys in every config, in the order of
+        `names`. Missing keys have the value `MISSING`.
+    """
+
+    names: List[str]
+    varying_keys: List[str]
+    values: List[Dict[str, Any]]
+
+    def to_json(self) -> Dict:
+        """
+        Get the diff as a JSON serializable dict, where missing keys are left
+        out of the values of a config.
+        """
+        return {
+            "varying_keys": self.varying_keys,
+            "configs": {
+                name: {key: value for key, value in values.items() if value is not MISSING}
+                for name, values in zip(self.names, self.values)
+            },
+        }
+
+
+def iter_leaves(config: Any, prefix: str = "") -> Iterator[Tuple[str, Any]]:
+    """
+    Iterate over the `(key, value)` pairs of the leaves of `config`.
+    """
+    items: Iterable[Tuple[Any, Any]]
+    if isinstance(config, Mapping) and config:
+        items = config.items()
+    elif isinstance(config, (list, tuple)) and config:
+        items = enumerate(config)
+    else:
+        yield prefix, config
+        return
+
+    for key, value in items:
+        yield from iter_leaves(value, f"{prefix}.{key}" if prefix else str(key))
+
+
+def diff_configs(configs: Union[Mapping[str, Any], Iterable[Tuple[str, Any]]]) -> ConfigDiff:
+    """
+    Find the keys whose values differ between `configs`.
+
+    # Parameters
+    configs: `Union[Mapping[str, Any], Iterable[Tuple[str, Any]]]`
+        The configs keyed by their names, or the `(name, config)` pairs.
+
+    # Returns
+    `ConfigDiff` The varying keys and their values.
+    """
+    if isinstance(configs, Mapping):
+        configs = configs.items()
+
+    names = []
+    leaves = []
+    # The first value seen for every key and the number of configs it is in.
+    first_values: Dict[str, Any] = {}
+    counts: Dict[str, int] = {}
+    varying = set()
+    for name, config in configs:
+        config_leaves = dict(iter_leaves(config))
+        names.append(name)
+        leaves.append(config_leaves)
+        for key, value in config_leaves.items():
+            if key not in first_values:
+                first_values[key] = value
+                counts[key] = 1
+                continue
+            counts[key] += 1
+            if key not in varying and not _same_value(value, first_values[key]):
+                varying.add(key)
+
+    varying.update(key for key, count in counts.items() if count != len(names))
+    varying_keys = sorted(varying)
+    values = [
+        {key: config_leaves.get(key, MISSING) for key in varying_keys}
+        for config_leaves in leaves
+    ]
+    return ConfigDiff(names, varying_keys, values)
+
+
+def load_configs(paths: Iterable[Union[str, PathLike]]) -> List[Tuple[str, Dict]]:
+    """
+    Load the configs to diff from `paths`. A path is either
+
+    * a config file in any of the formats of `config_formats`, named by its
+      path,
+    * a JSONL file or SQLite database written by `compose-batch`, whose
+      configs keep their names and whose errors are skipped,
+    * or a directory. If there are `config.json` files in it or its
+      subdirectories, e.g. in the serialization dirs of a sweep, they are
+      loaded and named by their directory. Otherwise every config file
+      directly in it is loaded, e.g. the output of `compose --multirun`.
+
+    # Returns
+    `List[Tuple[str, Dict]]` The `(name, config)` pairs, in order.
+    """
+    configs = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            configs.extend(_load_config_dir(path))
+        elif path.suffix in _JSONL_SUFFIXES:
+            configs.extend(_load_jsonl(path))
+        elif path.suffix in _SQLITE_SUFFIXES:
+            configs.extend(_load_sqlite(path))
+        else:
+            configs.append((str(path), load_config(path)))
+    return configs
+
+
+def format_diff_table(diff: ConfigDiff) -> str:
+    """
+    Format the diff as a table with a row for every config and a column for
+    every varying key. Values are written as JSON and missing keys as `-`.
+    """
+    header = ["name", *diff.varying_keys]
+    rows = [
+        [name, *(_format_value(values[key]) for key in diff.varying_keys)]
+        for name, values in zip(diff.names, diff.values)
+    ]
+    widths = [max(len(row[i]) for row in [header, *rows]) for i in range(len(header))]
+    return "\n".join(
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+        for row in [header, *rows]
+    )
+
+
+def _same_value(value: Any, other: Any) -> bool:
+    # `1 == 1.0 == True` in Python, but they are different config values.
+    return type(value) is type(other) and value == other
+
+
+def _format_value(value: Any) -> str:
+    if value is MISSING:
+        return "-"
+    return json.dumps(value)
+
+
+def _load_config_dir(config_dir: Path) -> List[Tuple[str, Dict]]:
+    config_paths = sorted(config_dir.rglob("config.json"))
+    if config_paths:
+        return [
+            (str(config_path.parent.relative_to(config_dir)), load_config(config_path))
+            for config_path in config_paths
+        ]
+    return [
+        (config_path.stem, load_config(config_path))
+        for config_path in sorted(config_dir.iterdir())
+        if config_path.is_file() and is_config_file(config_path)
+    ]
+
+
+def _load_jsonl(path: Path) -> List[Tuple[str, Dict]]:
+    configs = []
+    with path.open("r", encoding="utf-8") as jsonl_file:
+        for line in jsonl_file:
+            result = json.loads(line)
+            if result.get("config") is not None:
+                configs.append((result["name"], result["config"]))
+    return configs
+
+
+def _load_sqlite(path: Path) -> List[Tuple[str, Dict]]:
+    connection = sqlite3.connect(str(path))
+    try:
+        rows = connection.execute(
+            "SELECT name, config FROM configs WHERE config IS NOT NULL ORDER BY rowid"
+        ).fetchall()
+    finally:
+        connection.close()
+    return [(name, json.loads(config)) for name, config in rows]
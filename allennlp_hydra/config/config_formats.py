@@ -0,0 +1,157 @@
+"""
+Saving and loading configs in the supported formats. Every config is saved
+atomically with `atomic_open`, so a crash never leaves a truncated config.
+
+The formats are:
+
+* `json`: Indented JSON with sorted keys, for reading and diffing.
+* `compact-json`: JSON without whitespace, which is faster to write and
+    parse for large configs.
+* `pickle`: Python's binary format. It is the fastest to load and keeps
+    tuples, but should only be loaded from trusted sources.
+* `yaml`: YAML, written with libyaml's C dumper when it is available.
+    Tuples are saved as lists so that Hydra can load the files.
+
+AllenNLP's `.jsonnet` configs can be loaded too, but not saved.
+"""
+from typing import Any, Dict, Optional, Union
+
+import json
+from os import PathLike
+from pathlib import Path
+import pickle
+
+import yaml
+
+from allennlp_hydra.utils import file_utils
+
+# The file suffix of each format.
+CONFIG_FORMATS = {
+    "json": ".json",
+    "compact-json": ".json",
+    "pickle": ".pkl",
+    "yaml": ".yaml",
+}
+
+# The format used to load a file with each suffix. Both JSON formats load the
+# same way. Jsonnet is only loaded.
+_SUFFIX_FORMATS = {
+    ".json": "json",
+    ".jsonnet": "jsonnet",
+    ".pkl": "pickle",
+    ".pickle": "pickle",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+}
+
+# libyaml's dumper and loader are much faster, but PyYAML may be built
+# without them.
+_YAML_DUMPER = getattr(yaml, "CDumper", yaml.Dumper)
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def get_config_file_name(config_name: str, config_format: str = "json") -> str:
+    """
+    Get the name of the file `config_name` is saved to in `config_format`.
+    """
+    _check_format(config_format)
+    return f"{config_name}{CONFIG_FORMATS[config_format]}"
+
+
+def is_config_file(path: Union[str, PathLike]) -> bool:
+    """
+    If `load_config` can find the format of `path` from its suffix.
+    """
+    return Path(path).suffix in _SUFFIX_FORMATS
+
+
+def save_config(
+    config: Dict, path: Union[str, PathLike], config_format: str = "json"
+) -> None:
+    """
+    Atomically save `config` to `path` in `config_format`.
+
+    # Parameters
+    config: `Dict`
+        The config to save.
+    path: `Union[str, PathLike]`
+        The path to save to. The parent directory must exist.
+    config_format: `str`, optional (default=`"json"`)
+        One of `CONFIG_FORMATS`.
+    """
+    _check_format(config_format)
+
+    if config_format == "pickle":
+        with file_utils.atomic_open(path, "wb") as config_file:
+            pickle.dump(_to_plain_containers(config), config_file, pickle.HIGHEST_PROTOCOL)
+        return
+
+    with file_utils.atomic_open(path) as config_file:
+        if config_format == "json":
+            # Add the extra options for readability.
+            json.dump(config, config_file, indent=True, sort_keys=True)
+        elif config_format == "compact-json":
+            json.dump(config, config_file, separators=(",", ":"))
+        else:
+            yaml.dump(
+                _to_plain_containers(config, tuples_to_lists=True),
+                config_file,
+                _YAML_DUMPER,
+            )
+
+
+def load_config(path: Union[str, PathLike], config_format: Optional[str] = None) -> Dict:
+    """
+    Load a config saved with `save_config`.
+
+    # Parameters
+    path: `Union[str, PathLike]`
+        The path of the config.
+    config_format: `Optional[str]`, optional (default=`None`)
+        The format of the config. By default, it is found from the suffix of
+        `path`.
+    """
+    path = Path(path)
+    if config_format is None:
+        config_format = _SUFFIX_FORMATS.get(path.suffix)
+        if config_format is None:
+            raise ValueError(f"Cannot find the config format of '{path}'")
+    else:
+        _check_format(config_format)
+
+    if config_format == "pickle":
+        with path.open("rb") as pickle_file:
+            return pickle.load(pickle_file)
+    if config_format == "jsonnet":
+        # Imported here, so the other formats do not import AllenNLP. Like
+        # `allennlp train`, the environment variables are the external
+        # variables of the jsonnet file.
+        from allennlp.common import Params
+
+        return Params.from_file(path).as_dict(quiet=True)
+
+    with path.open("r", encoding="utf-8") as config_file:
+        if config_format == "yaml":
+            return yaml.load(config_file, _YAML_LOADER)
+        return json.load(config_file)
+
+
+def _check_format(config_format: str) -> None:
+    if config_format not in CONFIG_FORMATS:
+        raise ValueError(
+            f"Unknown config format '{config_format}', expected one of "
+            f"{', '.join(CONFIG_FORMATS)}"
+        )
+
+
+def _to_plain_containers(value: Any, tuples_to_lists: bool = False) -> Any:
+    # Configs may contain subclasses of dict, such as `LazyConfig`, that
+    # pickle and YAML would save as objects.
+    if isinstance(value, dict):
+        return {
+            key: _to_plain_containers(item, tuples_to_lists)
+            for key, item in value.items()
+        }
+    if isinstance(value, list) or (tuples_to_lists and isinstance(value, tuple)):
+        return [_to_plain_containers(item, tuples_to_lists) for item in value]
+    return value
@@ -0,0 +1,424 @@
+"""
+An index of the config groups, their options and the top-level keys of every
+yaml file of a config directory. It answers questions about the directory
+without composing a config or even importing Hydra:
+
+* `compose --list` lists the options of the groups.
+* `check_overrides` finds overrides that cannot be composed, e.g. the typo in
+  `model=simple_tager`, before composing. `compose` and `hydra-train` run it
+  before composing.
+* `complete_override` completes overrides in a shell.
+
+The index of a directory is cached in `CACHE_ROOT/config_index`. Loading it
+lists the directory and compares the modification time and size of every
+yaml file with the index, and only the files that changed are read again.
+Config packs are indexed from the pack, without a cache.
+
+Overrides can be completed in bash by running this module with the config
+path, the config name and the override to complete:
+
+```bash
+_allennlp_hydra_compose() {
+    local line="${COMP_LINE:0:$COMP_POINT}"
+    local cur="${line##* }"
+    local words=($line)
+    COMPREPLY=($(python -m allennlp_hydra.config.config_index \\
+        "${words[2]}" "${words[3]}" "$cur" 2>/dev/null))
+    # Bash completes the text after the last `=` on its own.
+    if [[ "$cur" == *=* ]]; then
+        COMPREPLY=("${COMPREPLY[@]#*=}")
+    fi
+}
+complete -o nospace -o default -F _allennlp_hydra_compose allennlp
+```
+"""
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+import difflib
+import hashlib
+import json
+import logging
+import os
+from os import PathLike
+from pathlib import Path
+import re
+import sys
+
+from omegaconf._utils import get_yaml_loader
+import yaml
+
+from allennlp_hydra.utils import file_utils
+
+logger = logging.getLogger(__name__)
+
+# Bump this whenever the layout of the cached indices changes.
+CONFIG_INDEX_FORMAT_VERSION = 1
+
+# The simple overrides that are checked and completed. Anything else, e.g.
+# `glob(*)` sweeps or dict values, is left to Hydra.
+_OVERRIDE = re.compile(r"(?P<prefix>\+\+|\+|~)?(?P<key>[\w./-]*)(?:@[\w.]*)?(?:=(?P<value>.*))?")
+_CHOICES = re.compile(r"[\w./-]+(?:,[\w./-]+)*")
+_PACKAGE_HEADER = re.compile(r"#\s*@package\s+(\S+)")
+# Hydra's file source only reads the header from the start of a file.
+_HEADER_SIZE = 512
+
+
+class ConfigInfo(NamedTuple):
+    """
+    What the index knows about a yaml file.
+
+    # Parameters
+    package: `Optional[str]`
+        The package from the `# @package` header of the file.
+    keys: `Optional[List[str]]`
+        The top-level keys of the file, without `defaults`. `None` if the
+        file could not be parsed.
+    default_keys: `List[str]`
+        The top-level keys that the entries of its defaults list add to the
+        root of a config composed from it, e.g. `model` for `model: C` and
+        `encoder` for `model@encoder: C`.
+    includes: `List[str]`
+        The configs in its defaults list without a group, e.g. `base` for
+        `- base`, whose keys are merged into it.
+    """
+
+    package: Optional[str]
+    keys: Optional[List[str]]
+    default_keys: List[str]
+    includes: List[str]
+
+
+class ConfigIndex(NamedTuple):
+    """
+    The index of a config directory.
+
+    # Parameters
+    groups: `Dict[str, List[str]]`
+        The options of every group, e.g. `trainer/optimizer`, sorted. The
+        configs at the root of the directory are the options of `""`.
+    configs: `Dict[str, ConfigInfo]`
+        The info of every config path, e.g. `model/basic_classifier`.
+    """
+
+    groups: Dict[str, List[str]]
+    configs: Dict[str, ConfigInfo]
+
+    def get_options(self, group: str) -> List[str]:
+        """
+        Get the options of a group.
+        """
+        group = group.strip("/")
+        if group not in self.groups:
+            raise ValueError(
+                f"'{group}' is not a config group{_suggest(group, self.groups)}"
+            )
+        return self.groups[group]
+
+    def get_top_level_keys(self, config_name: str) -> Optional[Set[str]]:
+        """
+        Get every top-level key that a config composed from `config_name` can
+        have, or `None` if they are not known. They are the keys and the
+        defaults of the root config, the groups at the root of the directory,
+        and the keys that the `# @package` headers of the configs add, e.g.
+        `encoder` for `# @package encoder`.
+        """
+        keys = {"hydra"}
+        # The root config and the configs it includes.
+        to_visit = [config_name]
+        visited = set()
+        while to_visit:
+            name = to_visit.pop()
+            info = self.configs.get(name)
+            if info is None or info.keys is None:
+                # E.g. a config from Hydra's `ConfigStore`.
+                return None
+            visited.add(name)
+            keys.update(info.keys, info.default_keys)
+            parent = name.rpartition("/")[0]
+            for include in info.includes:
+                if not include.startswith("/"):
+                    include = f"{parent}/{include}"
+                include = include.lstrip("/")
+                if include not in visited:
+                    to_visit.append(include)
+
+        keys.update(group.split("/")[0] for group in self.groups if group)
+        for info in self.configs.values():
+            if info.keys is None:
+                return None
+            if info.package is None:
+                continue
+            if "_group_" in info.package or "_name_" in info.package:
+                # Their meaning depends on the version base of Hydra.
+                return None
+            # Hydra reads the package of a header as absolute.
+            package = info.package
+            if package == "_global_" or package.startswith("_global_."):
+                package = package[len("_global_") :].lstrip(".")
+            if package:
+                keys.add(package.split(".")[0])
+            else:
+                keys.update(info.keys, info.default_keys)
+        return keys
+
+    def check_overrides(self, config_name: str, overrides: Iterable[str]) -> List[str]:
+        """
+        Find the overrides that cannot be composed with `config_name`: options
+        and groups that do not exist, and keys that are not in the config.
+        Only the problems that the index is sure about are reported, so a
+        config whose overrides pass can still fail to compose.
+
+        # Returns
+        `List[str]` A message for every problem, with suggestions for typos.
+        """
+        problems = []
+        if config_name not in self.configs:
+            problems.append(
+                f"'{config_name}' is not a config{_suggest(config_name, self.groups[''])}"
+            )
+        top_level_keys = self.get_top_level_keys(config_name)
+
+        for override in overrides:
+            match = _OVERRIDE.fullmatch(override)
+            if match is None or match["prefix"] == "~" or match["value"] is None:
+                continue
+            key = match["key"]
+            if key == "hydra" or key.startswith(("hydra/", "hydra.")):
+                continue
+
+            if key in self.groups and key:
+                for option in _get_choices(match["value"]):
+                    if option != "null" and f"{key}/{option}" not in self.configs:
+                        suggestion = _suggest(option, self._get_all_options(key))
+                        problems.append(
+                            f"'{override}': '{option}' is not an option of '{key}'{suggestion}"
+                        )
+            elif "/" in key:
+                groups = [group for group in self.groups if group]
+                problems.append(
+                    f"'{override}': '{key}' is not a config group{_suggest(key, groups)}"
+                )
+            elif match["prefix"] is None and top_level_keys is not None:
+                first_key = key.split(".")[0]
+                if first_key not in top_level_keys:
+                    problems.append(
+                        f"'{override}': '{first_key}' is not a key of '{config_name}', "
+                        f"use '+{override}' to add it{_suggest(first_key, top_level_keys)}"
+                    )
+        return problems
+
+    def complete_override(self, config_name: Optional[str], prefix: str) -> List[str]:
+        """
+        Get the overrides starting with `prefix`: groups and keys, the options
+        of a group after `=`, and the keys of the options of a group after a
+        dot, e.g. `model.encoder=`.
+        """
+        match = _OVERRIDE.fullmatch(prefix)
+        if match is None:
+            return []
+        sign = match["prefix"] or ""
+        key = match["key"]
+
+        if match["value"] is not None:
+            if key not in self.groups or not key:
+                return []
+            candidates = [f"{key}={option}" for option in self._get_all_options(key)]
+            return [
+                f"{sign}{candidate}"
+                for candidate in candidates
+                if candidate.startswith(prefix[len(sign) :])
+            ]
+
+        key_candidates = {f"{group}=" for group in self.groups if group}
+        if config_name is not None:
+            key_candidates.update(
+                f"{key}=" for key in self.get_top_level_keys(config_name) or ()
+            )
+        if "." in key:
+            group = key.split(".")[0]
+            for option in self.groups.get(group, []):
+                info = self.configs[f"{group}/{option}"]
+                key_candidates.update(f"{group}.{option_key}=" for option_key in info.keys or ())
+        return sorted(
+            f"{sign}{candidate}" for candidate in key_candidates if candidate.startswith(key)
+        )
+
+    def _get_all_options(self, group: str) -> List[str]:
+        # Hydra also accepts the configs in the subdirectories of a group,
+        # e.g. `trainer=optimizer/adadelta`.
+        return sorted(
+            config_path[len(group) + 1 :]
+            for config_path in self.configs
+            if config_path.startswith(f"{group}/")
+        )
+
+
+def load_config_index(config_path: Union[str, PathLike]) -> ConfigIndex:
+    """
+    Load the index of a config directory or config pack. The index of a
+    directory is only updated for the files that changed since it was cached.
+    """
+    config_path = Path(config_path).absolute()
+    if config_path.is_file():
+        return _index_config_pack(config_path)
+    if not config_path.is_dir():
+        raise ValueError(f"Config path '{config_path}' is not a directory or a config pack")
+
+    cache_path = _get_cache_path(config_path)
+    cached_files = _read_cache(cache_path)
+    groups: Dict[str, List[str]] = {}
+    files: Dict[str, Dict[str, Any]] = {}
+    for directory, dir_names, file_names in os.walk(config_path):
+        dir_names[:] = sorted(name for name in dir_names if name != "__pycache__")
+        group = Path(directory).relative_to(config_path).as_posix().strip(".")
+        groups[group] = []
+        for file_name in sorted(file_names):
+            if not file_name.endswith(".yaml"):
+                continue
+            option = file_name[: -len(".yaml")]
+            groups[group].append(option)
+
+            file_path = os.path.join(directory, file_name)
+            stat = os.stat(file_path)
+            state = [stat.st_mtime_ns, stat.st_size]
+            key = f"{group}/{option}".lstrip("/")
+            cached = cached_files.get(key)
+            if cached is not None and cached["state"] == state:
+                files[key] = cached
+            else:
+                files[key] = {"state": state, "info": _read_config_info(Path(file_path))}
+
+    if files != cached_files:
+        _write_cache(cache_path, config_path, files)
+
+    configs = {key: ConfigInfo(*entry["info"]) for key, entry in files.items()}
+    return ConfigIndex(groups, configs)
+
+
+def format_config_index(index: ConfigIndex) -> str:
+    """
+    Format the options of every group, one group per line. The configs at
+    the root of the directory are listed first.
+    """
+    lines = [f"(root): {', '.join(index.groups[''])}"]
+    for group, options in sorted(index.groups.items()):
+        if group:
+            lines.append(f"{group}: {', '.join(options)}")
+    return "\n".join(lines)
+
+
+def _get_choices(value: str) -> List[str]:
+    # The options of `group=A` and of sweeps like `group=A,B`.
+    if _CHOICES.fullmatch(value) is None:
+        return []
+    return value.split(",")
+
+
+def _suggest(name: str, candidates: Iterable[str]) -> str:
+    matches = difflib.get_close_matches(name, list(candidates), n=1)
+    return f", did you mean '{matches[0]}'?" if matches else ""
+
+
+def _get_info(package: Optional[str], obj: Any) -> Tuple:
+    if obj is None:
+        return package, [], [], []
+    if not isinstance(obj, dict):
+        return package, None, [], []
+
+    keys = [str(key) for key in obj if key != "defaults"]
+    default_keys = []
+    includes = []
+    defaults = obj.get("defaults")
+    for entry in defaults if isinstance(defaults, list) else []:
+        if isinstance(entry, str):
+            if entry != "_self_":
+                includes.append(entry.split(" ")[-1])
+            continue
+        if not isinstance(entry, dict):
+            continue
+        for entry_key in entry:
+            # E.g. `override hydra/launcher`, `optional model@encoder` or
+            # `/model`.
+            entry_key = str(entry_key).split(" ")[-1].lstrip("/")
+            group, _, entry_package = entry_key.partition("@")
+            top_level = (entry_package or group.replace("/", ".")).split(".")[0]
+            if top_level and top_level not in ("_global_", "_here_", "hydra"):
+                default_keys.append(top_level)
+    return package, keys, default_keys, includes
+
+
+def _read_config_info(yaml_path: Path) -> Tuple:
+    text = yaml_path.read_text(encoding="utf-8")
+    package = None
+    for line in text[:_HEADER_SIZE].splitlines():
+        match = _PACKAGE_HEADER.match(line.strip())
+        if match is not None:
+            package = match[1]
+    try:
+        obj = yaml.load(text, Loader=get_yaml_loader())
+    except yaml.YAMLError:
+        # Hydra reports the error when the file is used.
+        return package, None, [], []
+    return _get_info(package, obj)
+
+
+def _index_config_pack(pack_path: Path) -> ConfigIndex:
+    from allennlp_hydra.config.config_pack import load_config_pack
+
+    pack = load_config_pack(pack_path)
+    groups = {group: sorted(pack.group_configs[group]) for group in pack.groups}
+    configs = {
+        config_path: ConfigInfo(*_get_info(header.get("package"), pack.load_object(config_path)))
+        for config_path, (header, _) in pack.configs.items()
+    }
+    return ConfigIndex(groups, configs)
+
+
+def _get_cache_path(config_dir: Path) -> Path:
+    key = hashlib.sha256(str(config_dir).encode("utf-8")).hexdigest()
+    return file_utils.CACHE_ROOT.joinpath("config_index", f"{key}.json")
+
+
+def _read_cache(cache_path: Path) -> Dict[str, Dict[str, Any]]:
+    try:
+        cache = json.loads(cache_path.read_text("utf-8"))
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        logger.warning(f"Ignoring the invalid config index '{cache_path}': {e}")
+        return {}
+    if cache.get("format_version") != CONFIG_INDEX_FORMAT_VERSION:
+        return {}
+    return cache["files"]
+
+
+def _write_cache(cache_path: Path, config_dir: Path, files: Dict[str, Dict[str, Any]]) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_utils.atomic_open(cache_path) as cache_file:
+            json.dump(
+                {
+                    "format_version": CONFIG_INDEX_FORMAT_VERSION,
+                    "config_dir": str(config_dir),
+                    "files": files,
+                },
+                cache_file,
+            )
+    except OSError as e:
+        # The index still works, it is just built again next time.
+        logger.warning(f"Could not write the config index '{cache_path}': {e}")
+
+
+def main(argv: List[str]) -> None:
+    """
+    Print the completions of an override, one per line. The arguments are
+    the config path, the config name and the override.
+    """
+    config_path, config_name, prefix = argv
+    index = load_config_index(config_path)
+    for completion in index.complete_override(config_name or None, prefix):
+        print(completion)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,347 @@
+"""
+Packing a config directory into a single file, so configs can be composed
+without reading the directory. Hydra's file source checks, opens and parses
+every yaml file it uses for every composition, which is slow for large config
+trees, especially on network filesystems. A pack is an SQLite database with
+every yaml file already parsed, which is read once per process:
+
+```zsh
+allennlp config-pack conf conf.pack
+allennlp compose conf.pack config example -s experiments
+```
+
+Packs can be used anywhere a config directory can, i.e. by `compose_config`,
+`ComposeSession`, `compose-batch` and `hydra-train`, as long as their path
+ends with `.pack`. Importing this module registers the `pack://` config
+source with Hydra, so they can also be added to the search path of Hydra
+apps, e.g. with `hydra.searchpath=[pack:///path/to/conf.pack]`.
+
+The configs are parsed with the yaml loader of OmegaConf and stored as JSON,
+so a pack is only read by the OmegaConf version that created it. The few
+files that JSON cannot represent exactly, e.g. with keys that are not strings,
+are stored as yaml and parsed when they are used. Like Hydra's file source,
+only the files ending with `.yaml` are packed. A pack does not change with its directory, so
+it has to be created again after changing the yaml files.
+"""
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+import functools
+from importlib import metadata
+import json
+import logging
+import os
+from os import PathLike
+from pathlib import Path
+import sqlite3
+import tempfile
+
+from hydra._internal.sources_registry import SourcesRegistry
+from hydra.core.object_type import ObjectType
+from hydra.plugins.config_source import ConfigLoadError, ConfigResult, ConfigSource
+from omegaconf import OmegaConf
+from omegaconf._utils import get_yaml_loader
+import yaml
+
+logger = logging.getLogger(__name__)
+
+# Bump this whenever the layout of the packs changes.
+PACK_FORMAT_VERSION = 2
+
+PACK_SUFFIX = ".pack"
+
+# Hydra's file source only reads the header from the start of a file.
+_HEADER_SIZE = 512
+
+
+class PackedConfigs:
+    """
+    Configs served by a `PackConfigSource`, laid out like the files of a
+    config directory.
+
+    # Parameters
+    configs: `Dict[str, Tuple[Dict, Any]]`
+        The header and stored config of every config path, e.g.
+        `model/basic_classifier`.
+    groups: `Dict[str, List[str]]`
+        The names of the groups directly in every group, e.g. `optimizer` in
+        `trainer`. The root group is `""`.
+    group_configs: `Dict[str, List[str]]`
+        The names of the configs directly in every group.
+    """
+
+    def __init__(
+        self,
+        configs: Dict[str, Tuple[Dict, Any]],
+        groups: Dict[str, List[str]],
+        group_configs: Dict[str, List[str]],
+    ) -> None:
+        self.configs = configs
+        self.groups = groups
+        self.group_configs = group_configs
+
+    def load_object(self, config_path: str) -> Any:
+        """
+        Get the dict or list of a config path, or `None` for an empty file.
+        It must not be modified.
+        """
+        raise NotImplementedError
+
+    def load_config(self, config_path: str) -> Tuple[Dict, Any]:
+        """
+        Get the header and a new `DictConfig` of a config path.
+        """
+        header, _ = self.configs[config_path]
+        obj = self.load_object(config_path)
+        # The same as `OmegaConf.load`.
+        config = OmegaConf.create() if obj is None else OmegaConf.create(obj)
+        return dict(header), config
+
+
+class ConfigPack(PackedConfigs):
+    """
+    The contents of a pack. The configs are stored as JSON, except for the
+    `yaml_paths`, which are stored as yaml.
+    """
+
+    def __init__(
+        self,
+        configs: Dict[str, Tuple[Dict, str]],
+        groups: Dict[str, List[str]],
+        group_configs: Dict[str, List[str]],
+        yaml_paths: Iterable[str] = (),
+    ) -> None:
+        super().__init__(configs, groups, group_configs)
+        self.yaml_paths: FrozenSet[str] = frozenset(yaml_paths)
+
+    def load_object(self, config_path: str) -> Any:
+        _, config = self.configs[config_path]
+        if config_path in self.yaml_paths:
+            return yaml.load(config, Loader=get_yaml_loader())
+        return json.loads(config)
+
+
+def is_config_pack(path: Union[str, PathLike]) -> bool:
+    """
+    If `path` is a config pack rather than a config directory.
+    """
+    path = Path(path)
+    return path.suffix == PACK_SUFFIX and path.is_file()
+
+
+def pack_config_dir(config_dir: Union[str, PathLike], pack_path: Union[str, PathLike]) -> int:
+    """
+    Pack every yaml file in `config_dir` into the pack `pack_path`. The pack is
+    written atomically, so it can be replaced while it is used.
+
+    # Returns
+    `int` The number of packed configs.
+    """
+    config_dir = Path(config_dir).absolute()
+    if not config_dir.is_dir():
+        raise ValueError(f"Config path '{config_dir}' is not a directory")
+    pack_path = Path(pack_path).absolute()
+    pack_path.parent.mkdir(parents=True, exist_ok=True)
+
+    groups = [""] + sorted(
+        str(path.relative_to(config_dir).as_posix())
+        for path in config_dir.rglob("*")
+        if path.is_dir() and path.name != "__pycache__"
+    )
+    configs = []
+    for yaml_path in sorted(config_dir.rglob("*.yaml")):
+        if not yaml_path.is_file():
+            continue
+        config_path = yaml_path.relative_to(config_dir).with_suffix("").as_posix()
+        configs.append((config_path, *_parse_yaml_file(yaml_path)))
+
+    file_descriptor, temp_path = tempfile.mkstemp(
+        dir=pack_path.parent, prefix=f".{pack_path.name}.", suffix=".tmp"
+    )
+    os.close(file_descriptor)
+    try:
+        connection = sqlite3.connect(temp_path)
+        try:
+            with connection:
+                _write_pack(connection, config_dir, groups, configs)
+        finally:
+            connection.close()
+        os.replace(temp_path, pack_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(configs)
+
+
+def load_config_pack(pack_path: Union[str, PathLike]) -> ConfigPack:
+    """
+    Load a pack. Packs are only read once per process, until they change.
+    """
+    pack_path = Path(pack_path).absolute()
+    stat = os.stat(pack_path)
+    return _load_config_pack(str(pack_path), stat.st_size, stat.st_mtime_ns)
+
+
+class PackConfigSource(ConfigSource):
+    """
+    A Hydra config source for the configs in a pack, with paths like
+    `pack:///path/to/conf.pack`.
+    """
+
+    def __init__(self, provider: str, path: str) -> None:
+        super().__init__(provider=provider, path=path)
+        try:
+            self.pack: Optional[PackedConfigs] = load_config_pack(self.path)
+        except FileNotFoundError:
+            self.pack = None
+
+    @staticmethod
+    def scheme() -> str:
+        return "pack"
+
+    def load_config(self, config_path: str) -> ConfigResult:
+        normalized_config_path = self._normalize_file_name(config_path)
+        key = _get_key(os.path.splitext(normalized_config_path)[0])
+        if self.pack is None or key not in self.pack.configs:
+            raise ConfigLoadError(
+                f"Config not found : {self.full_path()}/{normalized_config_path}"
+            )
+        header, config = self.pack.load_config(key)
+        return ConfigResult(
+            config=config,
+            path=self.full_path(),
+            provider=self.provider,
+            header=header,
+        )
+
+    def available(self) -> bool:
+        return self.pack is not None
+
+    def is_group(self, config_path: str) -> bool:
+        return self.pack is not None and _get_key(config_path) in self.pack.groups
+
+    def is_config(self, config_path: str) -> bool:
+        config_path = self._normalize_file_name(config_path)
+        return (
+            self.pack is not None
+            and _get_key(os.path.splitext(config_path)[0]) in self.pack.configs
+        )
+
+    def list(self, config_path: str, results_filter: Optional[ObjectType]) -> List[str]:
+        if self.pack is None:
+            return []
+        key = _get_key(config_path)
+        files: List[str] = []
+        if results_filter in (None, ObjectType.GROUP):
+            files.extend(self.pack.groups.get(key, []))
+        if results_filter in (None, ObjectType.CONFIG):
+            files.extend(self.pack.group_configs.get(key, []))
+        return sorted(set(files))
+
+    def __deepcopy__(self, memo: Dict) -> "PackConfigSource":
+        # Hydra copies the sources for every composition. The pack is never
+        # modified, so the copies share it.
+        return self
+
+
+SourcesRegistry.instance().register(PackConfigSource)
+
+
+def _get_key(config_path: str) -> str:
+    return config_path.strip("/")
+
+
+def _parse_yaml_file(yaml_path: Path) -> Tuple[Dict, str, str]:
+    # The same as Hydra's file source and `OmegaConf.load`.
+    text = yaml_path.read_text(encoding="utf-8")
+    header = ConfigSource._get_header_dict(text[:_HEADER_SIZE])
+    try:
+        obj = yaml.load(text, Loader=get_yaml_loader())
+    except yaml.YAMLError as e:
+        raise ValueError(f"Could not parse '{yaml_path}': {e}") from e
+    if obj is not None and not isinstance(obj, (dict, list)):
+        raise ValueError(f"'{yaml_path}' is not a dict or a list")
+    # Only stored as JSON if it is loaded back the same, e.g. not with integer
+    # keys, bytes or sets. `allow_nan` is off, since NaN never compares equal.
+    try:
+        config = json.dumps(obj, allow_nan=False)
+    except (TypeError, ValueError):
+        return header, "yaml", text
+    if json.loads(config) != obj:
+        return header, "yaml", text
+    return header, "json", config
+
+
+def _write_pack(
+    connection: sqlite3.Connection,
+    config_dir: Path,
+    groups: List[str],
+    configs: List[Tuple[str, Dict, str, str]],
+) -> None:
+    connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    connection.execute("CREATE TABLE groups (path TEXT PRIMARY KEY)")
+    connection.execute(
+        "CREATE TABLE configs "
+        "(path TEXT PRIMARY KEY, header TEXT NOT NULL, format TEXT NOT NULL, config TEXT NOT NULL)"
+    )
+    connection.executemany(
+        "INSERT INTO meta VALUES (?, ?)",
+        [
+            ("format_version", str(PACK_FORMAT_VERSION)),
+            ("omegaconf", metadata.version("omegaconf")),
+            ("config_dir", str(config_dir)),
+        ],
+    )
+    connection.executemany("INSERT INTO groups VALUES (?)", [(group,) for group in groups])
+    connection.executemany(
+        "INSERT INTO configs VALUES (?, ?, ?, ?)",
+        [
+            (path, json.dumps(header), config_format, config)
+            for path, header, config_format, config in configs
+        ],
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config_pack(pack_path: str, size: int, mtime_ns: int) -> ConfigPack:
+    connection = sqlite3.connect(f"file:{pack_path}?mode=ro", uri=True)
+    try:
+        try:
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            group_paths = [path for (path,) in connection.execute("SELECT path FROM groups")]
+            rows = connection.execute(
+                "SELECT path, header, format, config FROM configs"
+            ).fetchall()
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"'{pack_path}' is not a config pack: {e}") from e
+    finally:
+        connection.close()
+
+    if meta.get("format_version") != str(PACK_FORMAT_VERSION):
+        raise ValueError(
+            f"'{pack_path}' was created by another version of allennlp-hydra, "
+            f"create it again with `allennlp config-pack`"
+        )
+    if meta.get("omegaconf") != metadata.version("omegaconf"):
+        raise ValueError(
+            f"'{pack_path}' was created with OmegaConf {meta.get('omegaconf')}, "
+            f"create it again with `allennlp config-pack`"
+        )
+
+    groups: Dict[str, List[str]] = {path: [] for path in group_paths}
+    group_configs: Dict[str, List[str]] = {path: [] for path in group_paths}
+    for path in group_paths:
+        if path:
+            parent, _, name = path.rpartition("/")
+            groups[parent].append(name)
+
+    configs: Dict[str, Tuple[Dict, str]] = {}
+    yaml_paths = []
+    for path, header, config_format, config in rows:
+        configs[path] = (json.loads(header), config)
+        if config_format == "yaml":
+            yaml_paths.append(path)
+        parent, _, name = path.rpartition("/")
+        group_configs[parent].append(name)
+
+    return ConfigPack(configs, groups, group_configs, yaml_paths)
@@ -0,0 +1,427 @@
+"""
+A persistent schema of the keyword parameters, default values, annotation
+classes and positional arguments of every class registered with AllenNLP. When
+a schema is loaded with `load_defaults_schema`,
+`fill_config_with_default_values` answers from it instead of reflecting over
+the classes with `inspect`.
+
+Schemas are saved to `CACHE_ROOT/defaults_schema` under a fingerprint of the
+installed package versions and the sources of the included packages, so a
+schema is only rebuilt when one of those changes.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type, Union, cast
+
+import functools
+import hashlib
+import importlib
+from importlib import metadata
+import json
+import logging
+from os import PathLike
+from pathlib import Path
+import platform
+import sys
+
+from allennlp.common import FromParams, Registrable
+
+from allennlp_hydra.config import fill_defaults
+from allennlp_hydra.config.fill_defaults import (
+    FillPlan,
+    ParameterSpec,
+    USE_DEFAULT,
+    USE_DEFAULT_SUBTREE,
+)
+from allennlp_hydra.utils import file_utils
+
+logger = logging.getLogger(__name__)
+
+# Bump this whenever the layout of the schema changes.
+SCHEMA_FORMAT_VERSION = 2
+
+
+class DefaultsSchema:
+    """
+    The keyword parameters and positional arguments of a set of classes.
+
+    # Parameters
+    fingerprint: `str`
+        The fingerprint of the environment the schema was built in.
+    classes: `Dict[str, Dict]`
+        The entry for every class, keyed by its qualified name (see
+        `get_qualified_name`). Every entry has the `"parameters"`, a list of
+        `[name, action, annotation_class, default]` (see `ParameterSpec`) with
+        the classes replaced by their qualified names, and the `"positional"`
+        argument names.
+    """
+
+    def __init__(self, fingerprint: str, classes: Dict[str, Dict]):
+        self.fingerprint = fingerprint
+        self.classes = classes
+
+        # The decoded fill plan of each class, so every class is only decoded
+        # once. `None` means the class is not in the schema or it could not be
+        # decoded.
+        self._fill_plans: Dict[str, Optional[FillPlan]] = {}
+
+    def __len__(self) -> int:
+        return len(self.classes)
+
+    def get_fill_plan(self, class_to_use: Any) -> Optional[FillPlan]:
+        """
+        Get the fill plan of `class_to_use`.
+
+        # Parameters
+        class_to_use: `Any`
+            The class (or the constructor it was registered with).
+
+        # Returns
+        `Optional[FillPlan]` The fill plan or `None` if the class is not in
+        the schema.
+        """
+        qualified_name = get_qualified_name(class_to_use)
+        if qualified_name is None:
+            return None
+        if qualified_name not in self._fill_plans:
+            self._fill_plans[qualified_name] = self._decode_fill_plan(qualified_name)
+        return self._fill_plans[qualified_name]
+
+    def get_positional_arguments(self, class_to_use: Any) -> Optional[List[str]]:
+        """
+        Get the names of the positional arguments of `class_to_use`.
+
+        # Parameters
+        class_to_use: `Any`
+            The class (or the constructor it was registered with).
+
+        # Returns
+        `Optional[List[str]]` The names or `None` if the class is not in the
+        schema.
+        """
+        qualified_name = get_qualified_name(class_to_use)
+        if qualified_name is None or qualified_name not in self.classes:
+            return None
+        return self.classes[qualified_name]["positional"]
+
+    def _decode_fill_plan(self, qualified_name: str) -> Optional[FillPlan]:
+        entry = self.classes.get(qualified_name)
+        if entry is None:
+            return None
+
+        fill_plan = []
+        try:
+            for name, action, annotation, default in entry["parameters"]:
+                if action == USE_DEFAULT:
+                    default = _decode_default(default)
+                elif action == USE_DEFAULT_SUBTREE:
+                    default = (resolve_qualified_name(default[0]), default[1])
+                fill_plan.append(
+                    ParameterSpec(
+                        name=name,
+                        default=default,
+                        annotation_class=resolve_qualified_name(annotation)
+                        if annotation is not None
+                        else None,
+                        action=action,
+                    )
+                )
+        except (ImportError, AttributeError) as e:
+            logger.debug(f"Could not decode '{qualified_name}' from the schema: {e}")
+            return None
+        return tuple(fill_plan)
+
+    def to_file(self, path: Union[str, PathLike]) -> None:
+        """
+        Atomically save the schema as compact JSON to `path`.
+        """
+        with file_utils.atomic_open(path) as schema_file:
+            json.dump(
+                {
+                    "format_version": SCHEMA_FORMAT_VERSION,
+                    "fingerprint": self.fingerprint,
+                    "classes": self.classes,
+                },
+                schema_file,
+                separators=(",", ":"),
+            )
+
+    @classmethod
+    def from_file(cls, path: Union[str, PathLike]) -> "DefaultsSchema":
+        """
+        Load a schema saved with `to_file`.
+        """
+        schema = json.loads(Path(path).read_text("utf-8"))
+        if schema.get("format_version") != SCHEMA_FORMAT_VERSION:
+            raise ValueError(
+                f"'{path}' has the format version {schema.get('format_version')},"
+                f" expected {SCHEMA_FORMAT_VERSION}"
+            )
+        return cls(fingerprint=schema["fingerprint"], classes=schema["classes"])
+
+
+def get_schema_fingerprint(include_package: Iterable[str] = ()) -> str:
+    """
+    Fingerprint of the environment a schema is built in. It changes whenever
+    the Python version, the version of any installed package, the set of
+    included packages or the source of one of their modules changes.
+
+    # Parameters
+    include_package: `Iterable[str]`, optional (default=`()`)
+        The packages passed with `--include-package`. Only the modules that
+        are already imported are part of the fingerprint.
+
+    # Returns
+    `str` The fingerprint.
+    """
+    hasher = hashlib.sha256()
+    hasher.update(f"{SCHEMA_FORMAT_VERSION}:{platform.python_version()}\n".encode())
+
+    installed = sorted(
+        {(dist.metadata["Name"] or "", dist.version) for dist in metadata.distributions()}
+    )
+    for name, version in installed:
+        hasher.update(f"{name}=={version}\n".encode())
+    for package in sorted(set(include_package)):
+        hasher.update(f"include:{package}\n".encode())
+        # The included packages are usually not installed, or installed in
+        # development mode, so their version does not change with their code.
+        for module_name, module_source in _get_module_sources(package):
+            hasher.update(f"module:{module_name}\n".encode())
+            hasher.update(module_source)
+    return hasher.hexdigest()[:32]
+
+
+def _get_module_sources(package: str) -> Iterable[Tuple[str, bytes]]:
+    """
+    Get the name and source of every imported module of `package`.
+    """
+    for module_name in sorted(list(sys.modules)):
+        if module_name != package and not module_name.startswith(f"{package}."):
+            continue
+        module_file = getattr(sys.modules.get(module_name), "__file__", None)
+        if module_file is None:
+            continue
+        try:
+            yield module_name, Path(module_file).read_bytes()
+        except OSError:
+            continue
+
+
+def build_defaults_schema(fingerprint: str) -> DefaultsSchema:
+    """
+    Build the schema of every class registered with AllenNLP and of every
+    non-registrable `FromParams` class that can be reached through their
+    parameters. Classes that cannot be stored in the schema, i.e. because a
+    default value is not JSON serializable or their signature cannot be
+    read, are left out and are handled with `inspect` when filling.
+
+    # Parameters
+    fingerprint: `str`
+        The fingerprint to save with the schema, see `get_schema_fingerprint`.
+
+    # Returns
+    `DefaultsSchema` The new schema.
+    """
+    to_visit = []
+    for base_class, registry in list(Registrable._registry.items()):
+        # The registry is only keyed by subclasses of `Registrable`.
+        registrable_class = cast(Type[Registrable], base_class)
+        for name in list(registry):
+            try:
+                to_visit.append(registrable_class.by_name(name))
+            except Exception as e:
+                logger.debug(f"Skipping '{name}' of {base_class.__name__}: {e}")
+
+    classes: Dict[str, Dict] = {}
+    visited = set()
+
+    # The Lazy warning would be logged for every `Lazy` parameter in the
+    # registry, so it is silenced while building.
+    fill_defaults_logger = logging.getLogger(fill_defaults.__name__)
+    previous_level = fill_defaults_logger.level
+    fill_defaults_logger.setLevel(logging.ERROR)
+    try:
+        while to_visit:
+            class_to_use = to_visit.pop()
+            qualified_name = get_qualified_name(class_to_use)
+            if qualified_name is None or qualified_name in visited:
+                continue
+            visited.add(qualified_name)
+
+            entry = _create_schema_entry(class_to_use, to_visit)
+            if entry is not None:
+                classes[qualified_name] = entry
+    finally:
+        fill_defaults_logger.setLevel(previous_level)
+
+    logger.info(f"Built the defaults schema for {len(classes)} classes")
+    return DefaultsSchema(fingerprint=fingerprint, classes=classes)
+
+
+def load_defaults_schema(
+    include_package: Iterable[str] = (),
+    schema_dir: Optional[Union[str, PathLike]] = None,
+    force_rebuild: bool = False,
+) -> DefaultsSchema:
+    """
+    Load the schema for the current environment, building and saving it first
+    if it does not exist yet. The schema is then used by
+    `fill_config_with_default_values`.
+
+    # Parameters
+    include_package: `Iterable[str]`, optional (default=`()`)
+        The packages passed with `--include-package`. They must already be
+        imported.
+    schema_dir: `Optional[Union[str, PathLike]]`, optional (default=`None`)
+        The directory schemas are saved to. Defaults to
+        `CACHE_ROOT/defaults_schema`.
+    force_rebuild: `bool`, optional (default=`False`)
+        Rebuild the schema even if one exists for the current fingerprint.
+
+    # Returns
+    `DefaultsSchema` The loaded schema.
+    """
+    fingerprint = get_schema_fingerprint(include_package)
+    if schema_dir is None:
+        schema_dir = file_utils.CACHE_ROOT.joinpath("defaults_schema")
+    schema_path = Path(schema_dir).joinpath(f"{fingerprint}.json")
+
+    schema = None
+    if schema_path.exists() and not force_rebuild:
+        try:
+            schema = DefaultsSchema.from_file(schema_path)
+        except (ValueError, KeyError) as e:
+            logger.warning(f"Rebuilding the invalid defaults schema '{schema_path}': {e}")
+
+    if schema is None:
+        schema = build_defaults_schema(fingerprint)
+        schema_path.parent.mkdir(parents=True, exist_ok=True)
+        schema.to_file(schema_path)
+
+    fill_defaults.set_defaults_schema(schema)
+    return schema
+
+
+def load_defaults_schema_lazily(
+    include_package: Iterable[str] = (), schema_dir: Optional[Union[str, PathLike]] = None
+) -> None:
+    """
+    Like `load_defaults_schema`, but the schema is only loaded the first time
+    a config is filled or pruned. Computing the fingerprint hashes every
+    installed distribution, which is wasted when the filled configs are read
+    from a `ComposeCache`.
+    """
+    fill_defaults.set_defaults_schema_loader(
+        functools.partial(load_defaults_schema, list(include_package), schema_dir)
+    )
+
+
+def get_qualified_name(obj: Any) -> Optional[str]:
+    """
+    Get the `module:qualname` of a class or function, or `None` if it cannot be
+    imported from its name (e.g. it was defined inside of a function).
+    """
+    module = getattr(obj, "__module__", None)
+    qualname = getattr(obj, "__qualname__", None)
+    if module is None or qualname is None or "<locals>" in qualname:
+        return None
+    return f"{module}:{qualname}"
+
+
+def resolve_qualified_name(qualified_name: str) -> Any:
+    """
+    Get the object for a name created with `get_qualified_name`.
+    """
+    module_name, qualname = qualified_name.split(":")
+    obj = importlib.import_module(module_name)
+    for attribute in qualname.split("."):
+        obj = getattr(obj, attribute)
+    return obj
+
+
+class _UnencodableError(ValueError):
+    """
+    Raised when a class cannot be stored in the schema.
+    """
+
+
+def _create_schema_entry(class_to_use: Any, to_visit: List[Any]) -> Optional[Dict]:
+    """
+    Create the schema entry for `class_to_use`. The non-registrable classes
+    its parameters refer to are added to `to_visit`.
+    """
+    try:
+        fill_plan = fill_defaults.compile_fill_plan_from_signature(class_to_use)
+        positional_arguments = list(
+            fill_defaults.get_positional_arguments_from_signature(class_to_use)
+        )
+    except Exception as e:
+        # A single class must not keep the schema from being built, filling it
+        # with `inspect` reports the error when it is actually used.
+        logger.debug(f"Could not get the signature of {class_to_use}: {e}")
+        return None
+
+    parameters = []
+    try:
+        for parameter in fill_plan:
+            annotation = None
+            if isinstance(parameter.annotation_class, type):
+                annotation = _encode_class(parameter.annotation_class)
+                if _is_non_registrable_from_params(parameter.annotation_class):
+                    to_visit.append(parameter.annotation_class)
+
+            if parameter.action == USE_DEFAULT:
+                default = _encode_default(parameter.default)
+            elif parameter.action == USE_DEFAULT_SUBTREE:
+                subtree_class, registered_name = parameter.default
+                default = [_encode_class(subtree_class), registered_name]
+                if registered_name is None:
+                    to_visit.append(subtree_class)
+            else:
+                # The error message.
+                default = parameter.default
+
+            parameters.append([parameter.name, parameter.action, annotation, default])
+    except Exception as e:
+        logger.debug(f"Could not add {class_to_use} to the schema: {e}")
+        return None
+
+    return {"parameters": parameters, "positional": positional_arguments}
+
+
+def _is_non_registrable_from_params(cls: type) -> bool:
+    try:
+        return issubclass(cls, FromParams) and not issubclass(cls, Registrable)
+    except TypeError:
+        return False
+
+
+def _encode_class(cls: type) -> str:
+    qualified_name = get_qualified_name(cls)
+    if qualified_name is None:
+        raise _UnencodableError(f"{cls} cannot be imported by name")
+    return qualified_name
+
+
+def _encode_default(value: Any) -> Any:
+    """
+    Encode a default value as JSON. Tuples and dicts are tagged so that they are
+    decoded to the same types.
+    """
+    if value is None or type(value) in (bool, int, float, str):
+        return value
+    if type(value) in (list, tuple):
+        encoded = [_encode_default(item) for item in value]
+        return encoded if isinstance(value, list) else {"__tuple__": encoded}
+    if type(value) is dict and all(isinstance(key, str) for key in value):
+        return {"__dict__": {key: _encode_default(item) for key, item in value.items()}}
+    raise _UnencodableError(f"The default value {value!r} is not JSON serializable")
+
+
+def _decode_default(value: Any) -> Any:
+    if isinstance(value, list):
+        return [_decode_default(item) for item in value]
+    if isinstance(value, dict):
+        if "__tuple__" in value:
+            return tuple(_decode_default(item) for item in value["__tuple__"])
+        return {key: _decode_default(item) for key, item in value["__dict__"].items()}
+    return value
@@ -1,20 +1,160 @@
 """
 Module for adding arguments and their default values to a config.
 """
-from typing import Dict, Union, Any, get_args, Iterable
+from typing import (
+    Dict, Union, Any, get_args, Iterable, Tuple, Optional, Iterator, List, NamedTuple,
+    Type, overload, Callable
+)
 
 from copy import deepcopy
 import inspect
 import logging
+import threading
 
 from allennlp.common import Registrable, Params, Lazy, FromParams
+from allennlp.common.checks import ConfigurationError
+from omegaconf import DictConfig, flag_override
+
+from allennlp_hydra.config import fill_stats, registry_index
 
 logger = logging.getLogger(__name__)
 
+# The actions of a `ParameterSpec`, i.e. what to do when the config does not
+# have the parameter.
+USE_DEFAULT = 0
+USE_DEFAULT_SUBTREE = 1
+RAISE_ERROR = 2
+
+
+class ParameterSpec:
+    """
+    A single keyword parameter in the fill plan of a class.
+
+    # Parameters
+    name: `str`
+        The name of the parameter.
+    default: `Any`
+        Depends on the `action`. For `USE_DEFAULT`, it is the default value.
+        For `USE_DEFAULT_SUBTREE`, it is the `(annotation_class,
+        registered_name)` key of the default config, see
+        `get_default_subtree`. For `RAISE_ERROR` it is the message of the
+        `KeyError`, e.g. when the default was never registered.
+    annotation_class: `Optional[type]`
+        The class to recurse into when the config has a dict for the
+        parameter.
+    action: `int`
+        One of `USE_DEFAULT`, `USE_DEFAULT_SUBTREE` or `RAISE_ERROR`.
+    """
+
+    __slots__ = ("name", "default", "annotation_class", "action")
+
+    def __init__(
+            self, name: str, default: Any, annotation_class: Optional[type], action: int
+    ):
+        self.name = name
+        self.default = default
+        self.annotation_class = annotation_class
+        self.action = action
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ParameterSpec):
+            return NotImplemented
+        return all(
+            getattr(self, slot) == getattr(other, slot) for slot in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"ParameterSpec(name={self.name!r}, default={self.default!r},"
+            f" annotation_class={self.annotation_class!r}, action={self.action})"
+        )
+
+
+# The keyword parameters of a class, in order.
+FillPlan = Tuple[ParameterSpec, ...]
+
+
+class _DefaultSubtree(NamedTuple):
+    """
+    A cached default config, see `_get_default_subtree`.
+    """
 
+    config: Dict
+    # The number of default configs nested in each other in `config`,
+    # including itself, or `None` if some of them were not expanded because
+    # of recursion or the depth budget.
+    height: Optional[int]
+
+
+# Process-wide cache of the filled default configs for the classes used as the
+# default value of a parameter. The keys are `(annotation_class,
+# registered_name)`, where `registered_name` is `None` for non-registrable
+# `FromParams` classes.
+_DEFAULT_SUBTREE_CACHE: Dict[Tuple[type, Optional[str]], _DefaultSubtree] = {}
+
+# Process-wide cache of the compiled fill plans. The keys are `(base_class,
+# type)`, where `type` is the `type` of the config, or `None` for
+# non-registrable `FromParams` classes.
+_FILL_PLAN_CACHE: Dict[Tuple[type, Optional[str]], FillPlan] = {}
+
+# The version of `Registrable._registry` the caches were built with. When it
+# no longer matches, the caches are cleared.
+_CACHE_REGISTRY_VERSION: Optional[Tuple[Tuple[Any, ...], ...]] = None
+
+# The defaults schema to use instead of `inspect`. Set with `set_defaults_schema`.
+_DEFAULTS_SCHEMA = None
+
+# Loads the defaults schema the first time it is needed. Set with
+# `set_defaults_schema_loader`.
+_DEFAULTS_SCHEMA_LOADER: Optional[Callable[[], Any]] = None
+_DEFAULTS_SCHEMA_LOCK = threading.Lock()
+
+# The maximum number of default configs nested in each other. Set with
+# `set_max_default_depth`.
+DEFAULT_MAX_DEFAULT_DEPTH = 32
+_MAX_DEFAULT_DEPTH = DEFAULT_MAX_DEFAULT_DEPTH
+
+
+@overload
 def fill_config_with_default_values(
-        base_class: Union[FromParams, Registrable], config: Dict
+        base_class: Type[FromParams],
+        config: Dict,
+        share_structure: bool = False,
+        lazy: bool = False,
+        in_place: bool = False,
 ) -> Dict:
+    ...
+
+
+@overload
+def fill_config_with_default_values(
+        base_class: Type[FromParams],
+        config: Params,
+        share_structure: bool = False,
+        lazy: bool = False,
+        in_place: bool = False,
+) -> Params:
+    ...
+
+
+@overload
+def fill_config_with_default_values(
+        base_class: Type[FromParams],
+        config: DictConfig,
+        share_structure: bool = False,
+        lazy: bool = False,
+        in_place: bool = False,
+) -> DictConfig:
+    ...
+
+
+def fill_config_with_default_values(
+        base_class: Type[FromParams],
+        config: Union[Dict, Params, DictConfig],
+        share_structure: bool = False,
+        lazy: bool = False,
+        in_place: bool = False,
+) -> Union[Dict, Params, DictConfig]:
     """
     Fill a `config` with the arguments and their default values from a
     `base_class`. When it encounters nested objects (i.e. non-builtin classes,
@@ -30,71 +170,622 @@ def fill_config_with_default_values(
     [`inspect`](https://docs.python.org/3/library/inspect.html) module.
 
     # Parameters
-    base_class: `Union[FromParams, Registrable]`
+    base_class: `Type[FromParams]`
         The base class that you want to use to fill the `config` with the
         arguments and their default values. These arguments are for the
         `base_class.__init__` function.
-    config: `Dict`
-        The configuration dict to fill with the defaults. It does **NOT** make
+    config: `Union[Dict, Params, DictConfig]`
+        The configuration to fill with the defaults. It does **NOT** make
         any changes to the mutable data but instead uses `deepcopy` to copy it
-        to a new object.
+        to a new object, unless `in_place` is `True`. `Params` and
+        `DictConfig` are filled directly, without converting them to a dict,
+        and the result has the same type.
         Existing keys will not be overwritten.
+    share_structure: `bool`, optional (default=`False`)
+        If `True`, the input `config` is not copied. Instead, the returned
+        config shares every value and subtree that did not need any defaults
+        with `config`. A (sub)config that is already complete is returned as
+        is. The input is still never mutated, but mutating the output can
+        change the input.
+    lazy: `bool`, optional (default=`False`)
+        If `True`, the default configs of the parameters whose default value
+        is an object are not added right away. Instead, the levels with such
+        parameters are returned as a `LazyConfig` that fills them in the first
+        time they are accessed, e.g. by `json.dump` or `Params`.
+    in_place: `bool`, optional (default=`False`)
+        If `True`, the defaults are added to `config` itself, which is then
+        returned. Cannot be combined with `lazy`.
     # Returns
-    cfg_with_defaults: `Dict` The filled config with defaults.
+    cfg_with_defaults: `Union[Dict, Params, DictConfig]` The filled config with
+    defaults, of the same type as `config`.
+    """
+    if in_place or isinstance(config, (Params, DictConfig)):
+        if lazy:
+            raise ValueError("Lazy defaults cannot be used when filling in place")
+        if not in_place:
+            config = config.duplicate() if isinstance(config, Params) else deepcopy(config)
+
+        _check_registry_version()
+        if isinstance(config, Params):
+            _fill_config_in_place(base_class, config.params)
+        elif isinstance(config, DictConfig):
+            # Composed configs are in struct mode, which does not allow new
+            # keys, and default values are not always primitives.
+            with flag_override(config, ["struct", "allow_objects"], [False, True]):
+                _fill_config_in_place(base_class, config)
+        else:
+            _fill_config_in_place(base_class, config)
+        return config
+
+    # Copy once at the top level to avoid mutable changes. Everything below
+    # this point only creates new dicts for the levels that get new keys.
+    if not share_structure:
+        config = deepcopy(config)
+
+    _check_registry_version()
+    return _fill_config_sharing_structure(base_class, config, lazy)
+
+
+def fill_configs_with_default_values(
+        base_class: Type[FromParams],
+        configs: Iterable[Dict],
+        share_structure: bool = False,
+        lazy: bool = False,
+) -> Iterator[Dict]:
     """
-    if isinstance(config, Params):
-        raise TypeError("Params object cannot be passed to fill defaults")
+    Fill many configs for the same `base_class`, e.g. the configs of a sweep.
+    The result for each config is the same as the result of
+    `fill_config_with_default_values`, but every distinct (sub)config is only
+    filled once per batch. Sub-configs that are the same as one in an earlier
+    config, such as an unchanged `trainer`, reuse its result.
+
+    The configs must not be changed until the generator is exhausted.
+
+    # Parameters
+    base_class: `Type[FromParams]`
+        The base class of every config.
+    configs: `Iterable[Dict]`
+        The configs to fill. They are consumed lazily.
+    share_structure: `bool`, optional (default=`False`)
+        Same as for `fill_config_with_default_values`. The filled configs can
+        additionally share sub-configs with each other.
+    lazy: `bool`, optional (default=`False`)
+        Same as for `fill_config_with_default_values`.
+
+    # Returns
+    `Iterator[Dict]` The filled configs, in the same order as `configs`.
+    """
+    memo = _FillMemo()
+    for config in configs:
+        if isinstance(config, Params):
+            raise TypeError("Params object cannot be passed to fill defaults")
+
+        if _check_registry_version():
+            # The memoized results may use classes that are no longer
+            # registered.
+            memo.filled.clear()
+        try:
+            memo.index(config)
+        except TypeError:
+            # The config has values that cannot be hashed, so it cannot be
+            # compared to the other configs.
+            yield fill_config_with_default_values(
+                base_class, config, share_structure=share_structure, lazy=lazy
+            )
+            continue
+
+        filled = _fill_config_sharing_structure(base_class, config, lazy, memo=memo)
+        if share_structure:
+            yield filled
+        else:
+            yield _copy_config(filled)
 
-    # Copy to avoid mutable changes
-    config_dict = deepcopy(config)
 
+class _FillMemo:
+    """
+    The filled (sub)configs of a batch, keyed by the base class and the
+    structure of the unfilled config. Configs with the same structure get the
+    same id from `index`, so comparing them does not need to hash the whole
+    config at every level.
+    """
+
+    __slots__ = ("filled", "node_ids", "_structure_ids")
+
+    def __init__(self):
+        self.filled: Dict[Tuple[Any, int], Any] = {}
+
+        # `id` of every dict in the config being filled -> its structure id.
+        self.node_ids: Dict[int, int] = {}
+
+        # Shallow structure, with the children replaced by their ids -> id.
+        self._structure_ids: Dict[Tuple, int] = {}
+
+    def index(self, config: Dict) -> None:
+        """
+        Assign the structure ids to every dict in `config`. Raises a
+        `TypeError` if `config` has values that cannot be hashed.
+        """
+        self.node_ids.clear()
+        self._get_structure_id(config)
+
+    def _get_structure_id(self, value: Any) -> int:
+        structure: Tuple[Any, ...]
+        if isinstance(value, dict):
+            structure = (
+                dict,
+                tuple((key, self._get_structure_id(item)) for key, item in value.items()),
+            )
+        elif isinstance(value, list):
+            structure = (list, tuple(self._get_structure_id(item) for item in value))
+        else:
+            # The type is part of the key because `1 == 1.0 == True`.
+            structure = (type(value), value)
+
+        structure_id = self._structure_ids.setdefault(structure, len(self._structure_ids))
+        if isinstance(value, dict):
+            self.node_ids[id(value)] = structure_id
+        return structure_id
+
+
+# Stored in `_FillMemo.filled` when a config did not need any defaults.
+_UNCHANGED = object()
+
+
+def _enter_stats_level(
+        stats: fill_stats.FillStats,
+        base_class: type,
+        config: Union[Dict, DictConfig],
+) -> None:
+    """
+    Count a filled level and its depth while fill statistics are collected,
+    see `fill_stats.collect_fill_stats`. The callers check if they are
+    collected, so filling does not call anything else otherwise.
+    """
+    if issubclass(base_class, Registrable):
+        label = fill_stats.get_stats_label(
+            base_class, config.get("type", base_class.default_implementation)
+        )
+    else:
+        label = fill_stats.get_stats_label(base_class, None)
+    stats.enter_level(label)
+
+
+def _fill_config_sharing_structure(
+        base_class: Optional[type],
+        config: Dict,
+        lazy: bool = False,
+        expansion: Optional["_Expansion"] = None,
+        memo: Optional[_FillMemo] = None,
+) -> Dict:
+    """
+    Implementation of `fill_config_with_default_values` that never copies
+    `config`. A new dict is only created for the levels of the config that
+    are missing defaults, everything else is shared with `config`.
+
+    `expansion` are the default configs that are being created, see
+    `_get_default_subtree`. `memo` has the results of the earlier configs of
+    a batch, see `fill_configs_with_default_values`.
+    """
     # This is a band-aid hack for when there are complex type annotations that
     # are too difficult to handle (Nested dictionaries), we instead just return
     # the config as is.
     if base_class is None:
-        return config_dict
+        return config
+
+    stats = fill_stats.get_active_stats()
+    if stats is not None:
+        _enter_stats_level(stats, base_class, config)
+    try:
+        if memo is not None:
+            memo_key = (base_class, memo.node_ids[id(config)])
+            filled = memo.filled.get(memo_key)
+            if filled is _UNCHANGED:
+                return config
+            if filled is not None:
+                return filled
+
+        # The output is only created once something needs to change, so that
+        # complete configs are shared as a whole.
+        output_config = None
+        for parameter in _get_fill_plan_for_config(base_class, config):
+            # The parameter is a keyword and has a default value.
+            if parameter.name not in config:
+                if parameter.action == USE_DEFAULT:
+                    default = parameter.default
+                elif parameter.action == USE_DEFAULT_SUBTREE:
+                    if lazy:
+                        default = _UnresolvedDefault(parameter.default)
+                    else:
+                        default = _get_default_subtree(parameter.default, expansion)
+                else:
+                    raise KeyError(parameter.default)
+
+                if output_config is None:
+                    output_config = _new_output_config(config, lazy)
+                dict.__setitem__(output_config, parameter.name, default)
+                continue
 
-    # Check if we need to use the default or not.
+            # If it is not a dict, then it is not a class constructor argument
+            # and thus no need to recurse.
+            value = config[parameter.name]
+            if not isinstance(value, dict):
+                continue
+
+            filled_value = _fill_config_sharing_structure(
+                parameter.annotation_class, value, lazy, expansion, memo
+            )
+            if filled_value is not value:
+                if output_config is None:
+                    output_config = _new_output_config(config, lazy)
+                dict.__setitem__(output_config, parameter.name, filled_value)
+
+        if memo is not None:
+            memo.filled[memo_key] = _UNCHANGED if output_config is None else output_config
+
+        if output_config is None:
+            return config
+        return output_config
+    finally:
+        if stats is not None:
+            stats.exit_level()
+
+
+def _fill_config_in_place(
+        base_class: Optional[type], config: Union[Dict, DictConfig]
+) -> None:
+    """
+    Implementation of `fill_config_with_default_values` that adds the defaults
+    to `config` itself.
+    """
+    if base_class is None:
+        return
+
+    stats = fill_stats.get_active_stats()
+    if stats is not None:
+        _enter_stats_level(stats, base_class, config)
+    try:
+        for parameter in _get_fill_plan_for_config(base_class, config):
+            if parameter.name not in config:
+                if parameter.action == USE_DEFAULT:
+                    config[parameter.name] = parameter.default
+                elif parameter.action == USE_DEFAULT_SUBTREE:
+                    config[parameter.name] = _get_default_subtree(parameter.default)
+                else:
+                    raise KeyError(parameter.default)
+                continue
+
+            value = config[parameter.name]
+            if isinstance(value, (dict, DictConfig)):
+                _fill_config_in_place(parameter.annotation_class, value)
+    finally:
+        if stats is not None:
+            stats.exit_level()
+
+
+def _get_fill_plan_for_config(
+        base_class: type, config: Union[Dict, DictConfig]
+) -> FillPlan:
     if issubclass(base_class, Registrable):
-        class_to_use = base_class.by_name(
-            config_dict.get("type", base_class.default_implementation)
+        return _get_fill_plan(
+            base_class, config.get("type", base_class.default_implementation)
         )
-    else:
-        class_to_use = base_class
+    return _get_fill_plan(base_class, None)
 
-    # Get the init parameters from the underlying class of `initialized_class`
-    init_params = inspect.signature(class_to_use)
 
-    output_config = deepcopy(config_dict)
-    for parameter in init_params.parameters.values():
-        # Positional parameters do not have default values, so we skip them.
-        if parameter.default == inspect.Parameter.empty:
-            continue
+def prune_default_values(base_class: Type[FromParams], config: Dict) -> Dict:
+    """
+    The opposite of `fill_config_with_default_values`: remove every key of
+    `config` whose value is the same as the default of its parameter,
+    recursively. A sub-config is removed when it fills to the same config as
+    the default object of its parameter. The `type` keys are always kept.
+
+    Filling the pruned config gives the same config as filling `config`,
+    except that tuples may become lists, since tuple defaults are treated the
+    same as lists (e.g. when the config was loaded from JSON).
+
+    # Parameters
+    base_class: `Type[FromParams]`
+        The base class of the config.
+    config: `Dict`
+        The config to prune. It is not changed.
+
+    # Returns
+    `Dict` The pruned config. It can share values with `config`.
+    """
+    if not isinstance(config, dict):
+        raise TypeError(f"Only dict configs can be pruned, got {type(config).__name__}")
 
-        # The parameter is a keyword and has a default value.
-        if parameter.name not in config_dict:
-            output_config[parameter.name] = get_default_value_for_parameter(parameter)
+    _check_registry_version()
+    return _prune_config(base_class, config)
+
+
+def _prune_config(base_class: Optional[type], config: Dict) -> Dict:
+    if base_class is None:
+        return config
+
+    pruned_config = dict(config)
+    for parameter in _get_fill_plan_for_config(base_class, config):
+        # The config would not fill back if a default cannot be created.
+        if parameter.name not in config or parameter.action == RAISE_ERROR:
             continue
 
-        if parameter.annotation is None:
-            raise ValueError(
-                f"Argument {parameter.name} in class"
-                f" {base_class.__name__} does not have a type"
-                f" annotation"
+        value = config[parameter.name]
+        if parameter.action == USE_DEFAULT_SUBTREE and isinstance(value, dict):
+            is_default = _is_same_value(
+                _fill_config_sharing_structure(parameter.annotation_class, value),
+                _get_default_subtree(parameter.default),
             )
+        else:
+            is_default = _is_same_value(value, parameter.default)
+
+        if is_default:
+            del pruned_config[parameter.name]
+        elif isinstance(value, dict):
+            pruned_config[parameter.name] = _prune_config(
+                parameter.annotation_class, value
+            )
+    return pruned_config
+
+
+def _is_same_value(value: Any, default: Any) -> bool:
+    try:
+        return _tuples_to_lists(value) == _tuples_to_lists(default)
+    except (TypeError, ValueError):
+        # Defaults can be arbitrary objects with an `__eq__` that fails, e.g.
+        # arrays.
+        return False
+
+
+def _tuples_to_lists(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _tuples_to_lists(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_tuples_to_lists(item) for item in value]
+    return value
+
+
+def _new_output_config(config: Dict, lazy: bool) -> Dict:
+    if lazy:
+        # `dict.items` keeps the unresolved defaults of a `LazyConfig` as is.
+        return LazyConfig(dict.items(config))
+    return dict(config)
+
+
+class _UnresolvedDefault:
+    """
+    Placeholder in a `LazyConfig` for the default config with the key
+    `default_subtree`, see `get_default_subtree`.
+    """
+
+    __slots__ = ("default_subtree",)
+
+    def __init__(self, default_subtree: Tuple[type, Optional[str]]):
+        self.default_subtree = default_subtree
+
+    def __repr__(self) -> str:
+        return f"_UnresolvedDefault({self.default_subtree!r})"
+
+
+class LazyConfig(dict):
+    """
+    A config returned by `fill_config_with_default_values` with `lazy=True`.
+    The default configs of its parameters are only created when they are
+    first accessed. Every way of reading the values (indexing, `get`,
+    `items`, `values`, `dict(...)`, `json.dump`, `Params`, `deepcopy`,
+    comparing) fills them in, so it can be used like a normal `dict`.
+    """
+
+    def _resolve(self, key: Any, value: Any) -> Any:
+        if type(value) is _UnresolvedDefault:
+            value = get_default_subtree(*value.default_subtree)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def _resolve_all(self) -> None:
+        for key, value in list(dict.items(self)):
+            self._resolve(key, value)
+
+    def is_resolved(self, key: Any) -> bool:
+        """
+        Check if the value of `key` has been created.
+        """
+        return type(dict.__getitem__(self, key)) is not _UnresolvedDefault
+
+    def __getitem__(self, key: Any) -> Any:
+        return self._resolve(key, dict.__getitem__(self, key))
+
+    def __iter__(self):
+        # Overriding `__iter__` makes `dict(...)` and `{**config}` read the
+        # values with `__getitem__` instead of copying them directly.
+        return dict.__iter__(self)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if key in self:
+            return self[key]
+        return default
+
+    def setdefault(self, key: Any, default: Any = None) -> Any:
+        if key in self:
+            return self[key]
+        dict.__setitem__(self, key, default)
+        return default
+
+    def pop(self, key: Any, *default: Any) -> Any:
+        if key in self:
+            self[key]
+        return dict.pop(self, key, *default)
+
+    def popitem(self) -> Tuple[Any, Any]:
+        key, value = dict.popitem(self)
+        if type(value) is _UnresolvedDefault:
+            value = get_default_subtree(*value.default_subtree)
+        return key, value
+
+    def items(self):
+        self._resolve_all()
+        return dict.items(self)
+
+    def values(self):
+        self._resolve_all()
+        return dict.values(self)
+
+    def copy(self) -> "LazyConfig":
+        return LazyConfig(dict.items(self))
+
+    __copy__ = copy
 
-        # If it is not a dict, then it is not a class constructor argument and
-        # thus no need to recurse.
-        if not isinstance(config_dict[parameter.name], dict):
+    def __deepcopy__(self, memo: Dict) -> "LazyConfig":
+        # The unresolved defaults are immutable, so they do not need a copy.
+        copied = LazyConfig()
+        memo[id(self)] = copied
+        for key, value in dict.items(self):
+            if type(value) is not _UnresolvedDefault:
+                value = deepcopy(value, memo)
+            dict.__setitem__(copied, key, value)
+        return copied
+
+    def __reduce__(self):
+        return LazyConfig, (self.to_dict(),)
+
+    def __eq__(self, other: Any) -> bool:
+        # `dict.__eq__` reads the values of both configs directly.
+        self._resolve_all()
+        if isinstance(other, LazyConfig):
+            other._resolve_all()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other: Any) -> bool:
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        self._resolve_all()
+        return dict.__repr__(self)
+
+    def to_dict(self) -> Dict:
+        """
+        Convert the config, and every `LazyConfig` in it, to plain dicts.
+        """
+        return _to_plain_dict(self)
+
+
+def _to_plain_dict(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _to_plain_dict(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_to_plain_dict(item) for item in value]
+    return value
+
+
+def get_fill_plan(base_class: type, config_type: Optional[str] = None) -> FillPlan:
+    """
+    Get the fill plan for the class `base_class` resolves to for a config with
+    the type `config_type`. The plan is compiled once per process (or until
+    `Registrable._registry` changes) with `compile_fill_plan`.
+
+    # Parameters
+        base_class: `type`
+            The base class of the config.
+        config_type: `Optional[str]`, optional (default=`None`)
+            The `type` of the config for registrable base classes. Defaults to
+            the `default_implementation` of the base class.
+
+    # Returns
+    `FillPlan` The keyword parameters, in order.
+    """
+    _check_registry_version()
+    if config_type is None and issubclass(base_class, Registrable):
+        config_type = base_class.default_implementation
+    return _get_fill_plan(base_class, config_type)
+
+
+def _get_fill_plan(base_class: type, config_type: Optional[str]) -> FillPlan:
+    cache_key = (base_class, config_type)
+    fill_plan = _FILL_PLAN_CACHE.get(cache_key)
+    stats = fill_stats.get_active_stats()
+    if fill_plan is None:
+        if stats is not None:
+            stats.fill_plan_misses += 1
+        with fill_stats.time_class(fill_stats.get_stats_label(base_class, config_type)):
+            class_to_use: Any = base_class
+            if issubclass(base_class, Registrable):
+                if config_type is None:
+                    raise ConfigurationError(
+                        f"'{base_class.__name__}' has no default implementation, "
+                        f"the config needs a 'type'"
+                    )
+                class_to_use = base_class.by_name(config_type)
+            fill_plan = _FILL_PLAN_CACHE[cache_key] = compile_fill_plan(class_to_use)
+    elif stats is not None:
+        stats.fill_plan_hits += 1
+    return fill_plan
+
+
+def compile_fill_plan(class_to_use: Any) -> FillPlan:
+    """
+    Compile the fill plan of `class_to_use`. If a defaults schema was set with
+    `set_defaults_schema` and it has the class, the plan comes from the
+    schema. Otherwise the plan is compiled with `inspect`.
+
+    # Parameters
+        class_to_use: `Any`
+            The class (or the constructor it was registered with).
+
+    # Returns
+    `FillPlan` The keyword parameters, in order.
+    """
+    if _DEFAULTS_SCHEMA is not None:
+        fill_plan = _DEFAULTS_SCHEMA.get_fill_plan(class_to_use)
+        if fill_plan is not None:
+            return fill_plan
+    return compile_fill_plan_from_signature(class_to_use)
+
+
+def compile_fill_plan_from_signature(class_to_use: Any) -> FillPlan:
+    """
+    Compile the fill plan of `class_to_use` with `inspect`.
+
+    # Parameters
+        class_to_use: `Any`
+            The class (or the constructor it was registered with).
+
+    # Returns
+    `FillPlan` The keyword parameters, in order.
+    """
+    stats = fill_stats.get_active_stats()
+    if stats is not None:
+        stats.signature_calls += 1
+    # Get the init parameters from the underlying class of `initialized_class`
+    init_params = inspect.signature(class_to_use)
+
+    fill_plan = []
+    for parameter in init_params.parameters.values():
+        # Positional parameters do not have default values, so we skip them.
+        if parameter.default is inspect.Parameter.empty:
             continue
 
-        output_config[parameter.name] = dict(
-            fill_config_with_default_values(
-                get_annotation_class(parameter), config_dict[parameter.name]
+        # Errors are only raised when the default is actually needed.
+        try:
+            default_subtree = get_default_subtree_key(parameter)
+        except KeyError as e:
+            action, default = RAISE_ERROR, e.args[0]
+        else:
+            if default_subtree is None:
+                action, default = USE_DEFAULT, parameter.default
+            else:
+                action, default = USE_DEFAULT_SUBTREE, default_subtree
+
+        fill_plan.append(
+            ParameterSpec(
+                name=parameter.name,
+                default=default,
+                annotation_class=get_annotation_class(parameter),
+                action=action,
             )
         )
-
-    return output_config
+    return tuple(fill_plan)
 
 
 def get_default_value_for_parameter(parameter: inspect.Parameter) -> Any:
@@ -115,64 +806,262 @@ def get_default_value_for_parameter(parameter: inspect.Parameter) -> Any:
     # Returns
     `Any` The default value of the parameter.
     """
-    if parameter.annotation is not None:
-        # Annotation found, check if it is a Registrable.
-        annotation_type = get_annotation_class(parameter)
-        if annotation_type is None:
-            return parameter.default
+    default_subtree = get_default_subtree_key(parameter)
+    if default_subtree is not None:
+        return get_default_subtree(*default_subtree)
 
-        try:
-            is_subclass_of_registrable = issubclass(annotation_type, Registrable)
-        except TypeError:
-            # If there is some typing error, return the default value and call
-            # it a day.
-            return parameter.default
+    # No annotation found or it is not a registrable, so return the default
+    # value.
+    return parameter.default
 
-        cfg_dict = None
-        if is_subclass_of_registrable and isinstance(
-                parameter.default, annotation_type
-        ):
-            # Reverse lookup what the class was registered as. We do need to
-            # access the protected `_registry` attribute of registrable, but
-            # there is currently no other way to do this.
-            parameter_default_class = parameter.default.__class__
-            registered_name = None
-            if annotation_type not in Registrable._registry:
-                raise KeyError(
-                    f"'{parameter.annotation.__name__}' has no" f" registered classes"
-                )
 
-            for name, registered_class in Registrable._registry[
-                parameter.annotation
-            ].items():
-                if registered_class[0] == parameter_default_class:
-                    registered_name = name
-                    break
+def get_default_subtree_key(
+        parameter: inspect.Parameter
+) -> Optional[Tuple[type, Optional[str]]]:
+    """
+    Get the key for `get_default_subtree` when the default value of a parameter
+    is an object that has to be converted to a config.
 
-            if registered_name is None:
-                raise KeyError(
-                    f"'{parameter_default_class.__name__}' was never" f" registered."
-                )
+    # Parameters
+        parameter: `inspect.Parameter`
+            The parameter to get the key for.
+
+    # Returns
+    `Optional[Tuple[type, Optional[str]]]` The `(annotation_class,
+    registered_name)` pair, or `None` if the default is used as is.
+    """
+    if parameter.annotation is None:
+        return None
+
+    # Annotation found, check if it is a Registrable.
+    annotation_type = get_annotation_class(parameter)
+
+    # `Optional[X]` has the arguments `(X, NoneType)`, so it does not have
+    # a single annotation class. It only matters when there is a default
+    # that is not `None`, otherwise the default is `None` anyways.
+    if annotation_type is None and parameter.default is not None:
+        annotation_type = get_optional_annotation_class(parameter)
+    if annotation_type is None:
+        return None
+
+    try:
+        is_subclass_of_registrable = issubclass(annotation_type, Registrable)
+    except TypeError:
+        # If there is some typing error, use the default value and call it a
+        # day.
+        return None
+
+    if is_subclass_of_registrable and isinstance(parameter.default, annotation_type):
+        # Reverse lookup what the class was registered as. We do need to
+        # access the protected `_registry` attribute of registrable, but
+        # there is currently no other way to do this.
+        parameter_default_class = parameter.default.__class__
+        if annotation_type not in Registrable._registry:
+            raise KeyError(f"'{annotation_type.__name__}' has no registered classes")
+
+        registered_name = registry_index.get_registered_name(
+            parameter_default_class, annotation_type
+        )
+        if registered_name is None:
+            raise KeyError(f"'{parameter_default_class.__name__}' was never registered.")
+
+        return annotation_type, registered_name
+    elif issubclass(annotation_type, Registrable) and isinstance(parameter.default, Lazy):
+        logger.warning(
+            f"{parameter.name} has a Lazy object for its "
+            f"default. That is not currently supported and will"
+            f" be handled as getting the arguments for the"
+            f" default annotation."
+        )
+
+        return annotation_type, annotation_type.default_implementation
+    elif not is_subclass_of_registrable and issubclass(annotation_type, FromParams):
+        return annotation_type, None
+
+    return None
+
+
+def get_default_subtree(
+        annotation_type: type, registered_name: Optional[str]
+) -> Dict:
+    """
+    Get the config with the default values for the class `annotation_type`
+    registered as `registered_name`. The results are memoized for the whole
+    process, so the reflection and recursion for a `(class, name)` pair only
+    happens once. The cache is cleared automatically whenever
+    `Registrable._registry` changes (e.g. after importing a new package with
+    `--include-package`).
 
-            cfg_dict = {"type": registered_name}
-        elif is_subclass_of_registrable and isinstance(parameter.default, Lazy):
+    Recursive classes, i.e. a class whose default (or the default of one of
+    its parameters) is the class itself, are only expanded once. The inner
+    occurrence is left as `{"type": registered_name}`, which AllenNLP
+    constructs with the same defaults. Default configs nested deeper than the
+    budget set with `set_max_default_depth` are cut off the same way.
+
+    # Parameters
+        annotation_type: `type`
+            The class to get the default config for.
+        registered_name: `Optional[str]`
+            The name the class was registered with. This is used as the `type`
+            key of the config. If it is `None`, no `type` key is added, which
+            is the case for non-registrable `FromParams` classes.
+
+    # Returns
+    `Dict` A copy of the default config, so it is safe to mutate.
+    """
+    _check_registry_version()
+    return _get_default_subtree((annotation_type, registered_name))
+
+
+class _Expansion:
+    """
+    The default configs that are being created by `_get_default_subtree`.
+    """
+
+    __slots__ = ("keys", "max_depth", "cut_off")
+
+    def __init__(self):
+        # The keys of the default configs, outermost first.
+        self.keys: List[Tuple[type, Optional[str]]] = []
+        # The most nested depth reached in the innermost default config.
+        self.max_depth = 0
+        # If a default config in it was not expanded.
+        self.cut_off = False
+
+
+def _get_default_subtree(
+        cache_key: Tuple[type, Optional[str]],
+        expansion: Optional[_Expansion] = None,
+) -> Dict:
+    """
+    Get the default config for `cache_key`. Every key is only expanded once
+    and the cached configs are shared by the configs that contain them, so
+    creating them is linear in the number of classes. Only the configs
+    returned outside of the expansion (when `expansion` is empty) are copied.
+
+    The result never depends on what was cached before. A default config that
+    was not fully expanded depends on the default configs around it, so it is
+    only cached and reused outside of them. A fully expanded one is reused
+    inside of others as long as it does not exceed the depth budget there.
+    """
+    depth = 0 if expansion is None else len(expansion.keys)
+    cached = _DEFAULT_SUBTREE_CACHE.get(cache_key)
+    if cached is not None and expansion is not None and depth > 0:
+        if cached.height is None or depth + cached.height > _MAX_DEFAULT_DEPTH:
+            cached = None
+        else:
+            expansion.max_depth = max(expansion.max_depth, depth + cached.height)
+
+    stats = fill_stats.get_active_stats()
+    if stats is not None:
+        if cached is None:
+            stats.default_subtree_misses += 1
+        else:
+            stats.default_subtree_hits += 1
+
+    if cached is not None:
+        default_subtree = cached.config
+    else:
+        annotation_type, registered_name = cache_key
+        cfg_dict = {} if registered_name is None else {"type": registered_name}
+
+        if expansion is None:
+            expansion = _Expansion()
+        if cache_key in expansion.keys:
+            logger.debug(
+                f"{annotation_type.__name__} '{registered_name}' is recursive, not"
+                f" expanding its default config again"
+            )
+            expansion.cut_off = True
+            return cfg_dict
+        if depth >= _MAX_DEFAULT_DEPTH:
             logger.warning(
-                f"{parameter.name} has a Lazy object for its "
-                f"default. That is not currently supported and will"
-                f" be handled as getting the arguments for the"
-                f" default annotation."
+                f"Not expanding the default config of {annotation_type.__name__}"
+                f" '{registered_name}' because it is nested more than"
+                f" {_MAX_DEFAULT_DEPTH} levels deep"
             )
+            expansion.cut_off = True
+            return cfg_dict
 
-            cfg_dict = {"type": annotation_type.default_implementation}
-        elif not is_subclass_of_registrable and issubclass(annotation_type, FromParams):
-            cfg_dict = {}
+        outer_max_depth, outer_cut_off = expansion.max_depth, expansion.cut_off
+        expansion.max_depth, expansion.cut_off = depth + 1, False
+        expansion.keys.append(cache_key)
+        try:
+            with fill_stats.time_class(fill_stats.get_stats_label(*cache_key)):
+                default_subtree = _fill_config_sharing_structure(
+                    annotation_type, cfg_dict, expansion=expansion
+                )
+        finally:
+            expansion.keys.pop()
 
-        if cfg_dict is not None:
-            return fill_config_with_default_values(annotation_type, cfg_dict)
+        height = None if expansion.cut_off else expansion.max_depth - depth
+        if height is not None or depth == 0:
+            _DEFAULT_SUBTREE_CACHE[cache_key] = _DefaultSubtree(default_subtree, height)
+        expansion.max_depth = max(outer_max_depth, expansion.max_depth)
+        expansion.cut_off = outer_cut_off or expansion.cut_off
 
-    # No annotation found or it is not a registrable, so return the default
-    # value.
-    return parameter.default
+    if depth > 0:
+        return default_subtree
+    return _copy_config(default_subtree)
+
+
+def _copy_config(value: Any) -> Any:
+    """
+    Copy a cached default config. Unlike `deepcopy`, configs that are shared
+    in the cache are copied every time they occur, so that changing one part
+    of the copy never changes another.
+    """
+    if type(value) is dict:
+        return {key: _copy_config(item) for key, item in value.items()}
+    if type(value) is list:
+        return [_copy_config(item) for item in value]
+    return deepcopy(value)
+
+
+def set_max_default_depth(max_depth: int) -> None:
+    """
+    Set the maximum number of default configs that are nested in each other.
+    Deeper default configs are left as `{"type": registered_name}`. This
+    clears the cached default configs.
+
+    # Parameters
+        max_depth: `int`
+            The maximum depth. Defaults to `DEFAULT_MAX_DEFAULT_DEPTH`.
+    """
+    global _MAX_DEFAULT_DEPTH
+    if max_depth < 1:
+        raise ValueError(f"The max default depth must be positive, got {max_depth}")
+    _MAX_DEFAULT_DEPTH = max_depth
+    clear_fill_caches()
+
+
+def clear_fill_caches() -> None:
+    """
+    Clear the cached fill plans and default configs.
+    """
+    global _CACHE_REGISTRY_VERSION
+    _DEFAULT_SUBTREE_CACHE.clear()
+    _FILL_PLAN_CACHE.clear()
+    _CACHE_REGISTRY_VERSION = None
+
+
+def _check_registry_version() -> bool:
+    """
+    Clear the caches if `Registrable._registry` changed since they were built.
+    This is only checked once per call of the public functions, not for every
+    level of the recursion. Returns `True` if the caches were cleared.
+    """
+    global _CACHE_REGISTRY_VERSION
+    # Loading the schema clears the caches, so it is loaded before they are
+    # used.
+    _load_pending_defaults_schema()
+    registry_version = registry_index.get_registry_version()
+    if registry_version == _CACHE_REGISTRY_VERSION:
+        return False
+    _DEFAULT_SUBTREE_CACHE.clear()
+    _FILL_PLAN_CACHE.clear()
+    _CACHE_REGISTRY_VERSION = registry_version
+    return True
 
 
 def get_annotation_class(parameter: inspect.Parameter) -> Union[type, None]:
@@ -200,13 +1089,89 @@ def get_annotation_class(parameter: inspect.Parameter) -> Union[type, None]:
     return annotation_args[0]
 
 
-def get_positional_arguments(cls_type: FromParams) -> Iterable[str]:
+def get_optional_annotation_class(parameter: inspect.Parameter) -> Union[type, None]:
+    """
+    Get the class inside of an `Optional[...]` annotation. If the class is a
+    generic with a single argument, such as `Optional[Lazy[X]]`, that argument
+    is returned.
+    # Parameters
+        parameter: `inspect.Parameter`
+            The parameter to get the class of.
+    # Returns
+    `Union[type, None]` The type or None if the annotation is not an
+    `Optional` of a single type.
+    """
+    annotation_args = get_args(parameter.annotation)
+    if len(annotation_args) != 2 or type(None) not in annotation_args:
+        return None
+    optional_type = [arg for arg in annotation_args if arg is not type(None)][0]
+
+    inner_args = get_args(optional_type)
+    if not inner_args:
+        return optional_type
+    if len(inner_args) > 1:
+        return None
+    return inner_args[0]
+
+
+def set_defaults_schema(defaults_schema) -> None:
+    """
+    Set the schema that `fill_config_with_default_values` and
+    `get_positional_arguments` use instead of `inspect`. Classes that are not
+    in the schema still use `inspect`. This clears the cached fill plans.
+
+    # Parameters
+        defaults_schema: `Optional[DefaultsSchema]`
+            The schema to use, see `allennlp_hydra.config.defaults_schema`. If
+            it is `None`, `inspect` is used for every class.
+    """
+    global _DEFAULTS_SCHEMA, _DEFAULTS_SCHEMA_LOADER
+    _DEFAULTS_SCHEMA = defaults_schema
+    _DEFAULTS_SCHEMA_LOADER = None
+    clear_fill_caches()
+
+
+def set_defaults_schema_loader(loader: Optional[Callable[[], Any]]) -> None:
+    """
+    Set a function that loads the defaults schema and passes it to
+    `set_defaults_schema`. It is only called once a config is filled or
+    pruned, so processes that never fill a config never load the schema.
+
+    # Parameters
+        loader: `Optional[Callable[[], Any]]`
+            The function, e.g. a partial of
+            `allennlp_hydra.config.defaults_schema.load_defaults_schema`.
+    """
+    global _DEFAULTS_SCHEMA_LOADER
+    _DEFAULTS_SCHEMA_LOADER = loader
+
+
+def _load_pending_defaults_schema() -> None:
+    global _DEFAULTS_SCHEMA_LOADER
+    if _DEFAULTS_SCHEMA_LOADER is None:
+        return
+    # Other threads wait for the schema instead of filling without it.
+    with _DEFAULTS_SCHEMA_LOCK:
+        if _DEFAULTS_SCHEMA_LOADER is not None:
+            _DEFAULTS_SCHEMA_LOADER()
+            _DEFAULTS_SCHEMA_LOADER = None
+
+
+def get_positional_arguments(cls_type: Callable) -> Iterable[str]:
+    if _DEFAULTS_SCHEMA is not None:
+        positional_arguments = _DEFAULTS_SCHEMA.get_positional_arguments(cls_type)
+        if positional_arguments is not None:
+            return iter(positional_arguments)
+    return get_positional_arguments_from_signature(cls_type)
+
+
+def get_positional_arguments_from_signature(cls_type: Callable) -> Iterable[str]:
     # Get the init parameters from the underlying class of `initialized_class`
     init_params = inspect.signature(cls_type)
 
     for parameter in init_params.parameters.values():
         if (
-                parameter.default == inspect.Parameter.empty
+                parameter.default is inspect.Parameter.empty
                 and parameter.kind != inspect.Parameter.VAR_KEYWORD
         ):
             yield parameter.name
@@ -0,0 +1,163 @@
+"""
+Statistics about filling configs with their default values. They are only
+collected inside of `collect_fill_stats`, so filling is not slowed down
+otherwise.
+"""
+from typing import Dict, Iterator, Optional, Union
+
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import logging
+from os import PathLike
+import sys
+import time
+
+from allennlp_hydra.utils import file_utils
+
+logger = logging.getLogger(__name__)
+
+# The stats being collected, if any. Set by `collect_fill_stats`. Every thread
+# (and asyncio task) has its own, so composing in other threads does not add
+# to them.
+_ACTIVE_STATS: ContextVar[Optional["FillStats"]] = ContextVar("fill_stats", default=None)
+
+
+class FillStats:
+    """
+    The statistics collected while filling configs.
+
+    # Parameters
+    classes_visited: `Counter`
+        The number of levels filled for each class, keyed by
+        `"BaseClass:registered_name"`.
+    signature_calls: `int`
+        The number of classes whose parameters were found with `inspect`
+        instead of the defaults schema.
+    fill_plan_hits / fill_plan_misses: `int`
+        The lookups of the cached fill plans.
+    default_subtree_hits / default_subtree_misses: `int`
+        The lookups of the cached default configs.
+    max_depth: `int`
+        The deepest level that was filled, counting both the levels of the
+        configs and of the default configs created for them.
+    class_seconds: `Dict[str, float]`
+        The wall time spent compiling the fill plan and creating the default
+        config of each class. Creating a default config includes the time for
+        the default configs nested in it.
+    total_seconds: `float`
+        The wall time spent inside of `collect_fill_stats`.
+    """
+
+    def __init__(self):
+        self.classes_visited: Counter = Counter()
+        self.signature_calls = 0
+        self.fill_plan_hits = 0
+        self.fill_plan_misses = 0
+        self.default_subtree_hits = 0
+        self.default_subtree_misses = 0
+        self.max_depth = 0
+        self.class_seconds: Dict[str, float] = defaultdict(float)
+        self.total_seconds = 0.0
+
+        self._depth = 0
+
+    def enter_level(self, label: str) -> None:
+        self.classes_visited[label] += 1
+        self._depth += 1
+        if self._depth > self.max_depth:
+            self.max_depth = self._depth
+
+    def exit_level(self) -> None:
+        self._depth -= 1
+
+    def to_dict(self) -> Dict:
+        """
+        Get the statistics as a JSON serializable dict. The classes are
+        sorted from the most to the least expensive.
+        """
+        return {
+            "total_seconds": self.total_seconds,
+            "signature_calls": self.signature_calls,
+            "fill_plan": {"hits": self.fill_plan_hits, "misses": self.fill_plan_misses},
+            "default_subtree": {
+                "hits": self.default_subtree_hits,
+                "misses": self.default_subtree_misses,
+            },
+            "max_depth": self.max_depth,
+            "classes_visited": dict(self.classes_visited.most_common()),
+            "class_seconds": dict(
+                sorted(self.class_seconds.items(), key=lambda item: -item[1])
+            ),
+        }
+
+
+def get_active_stats() -> Optional[FillStats]:
+    """
+    Get the statistics being collected in the current context, if any.
+    """
+    return _ACTIVE_STATS.get()
+
+
+def get_stats_label(base_class: type, registered_name: Optional[str]) -> str:
+    """
+    The key of a class in the statistics.
+    """
+    if registered_name is None:
+        return base_class.__name__
+    return f"{base_class.__name__}:{registered_name}"
+
+
+@contextmanager
+def collect_fill_stats() -> Iterator[FillStats]:
+    """
+    Collect the statistics of every config filled inside of the block, by the
+    current thread.
+
+    ```python
+    with collect_fill_stats() as stats:
+        fill_config_with_default_values(Model, config)
+    print(stats.to_dict())
+    ```
+    """
+    stats = FillStats()
+    token = _ACTIVE_STATS.set(stats)
+    start_time = time.perf_counter()
+    try:
+        yield stats
+    finally:
+        stats.total_seconds = time.perf_counter() - start_time
+        _ACTIVE_STATS.reset(token)
+
+
+@contextmanager
+def time_class(label: str) -> Iterator[None]:
+    """
+    Add the time spent inside of the block to the time of a class, if the
+    statistics are being collected.
+    """
+    stats = _ACTIVE_STATS.get()
+    if stats is None:
+        yield
+        return
+
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.class_seconds[label] += time.perf_counter() - start_time
+
+
+def write_fill_stats(stats: FillStats, output: Union[str, PathLike]) -> None:
+    """
+    Write the statistics as JSON to `output`, or print them if it is `"-"`.
+    """
+    if str(output) == "-":
+        json.dump(stats.to_dict(), sys.stdout, indent=2)
+        sys.stdout.write("\n")
+        return
+
+    with file_utils.atomic_open(output) as stats_file:
+        json.dump(stats.to_dict(), stats_file, indent=2)
+    logger.info(f"Saved the fill defaults stats to '{output}'")
@@ -0,0 +1,113 @@
+"""
+Composing configs that are built in Python, without writing them to a config
+directory. The configs are a mapping of config paths, e.g. `config` or
+`model/tagger`, to their dicts, which are served to Hydra by the `memory://`
+config source:
+
+```python
+session = ComposeSession(
+    configs={
+        "config": {"defaults": ["_self_", {"model": "tagger"}], "seed": 1},
+        "model/tagger": {"type": "simple_tagger", "dropout": 0.1},
+    }
+)
+cfg = session.compose("config", ["model.dropout=0.2"])
+```
+
+They can be layered on top of a config directory or pack, in which case a
+config in memory is used instead of the file with the same path. Composing
+only from configs in memory does not read any files, except for Hydra's own
+configs, which a session reads once.
+
+The configs are copied when they are passed, so changing them afterwards has
+no effect. They cannot have a `# @package` header, use the package of their
+entry in the defaults list instead.
+"""
+from typing import Any, Mapping
+
+import copy
+import itertools
+import weakref
+
+from hydra._internal.sources_registry import SourcesRegistry
+from hydra.plugins.config_source import ConfigSource
+from omegaconf import DictConfig, ListConfig, OmegaConf
+
+from allennlp_hydra.config.config_pack import PackConfigSource, PackedConfigs
+
+# The configs of the live `memory://` sources, keyed by their name.
+_MEMORY_CONFIGS: "weakref.WeakValueDictionary[str, MemoryConfigs]" = weakref.WeakValueDictionary()
+
+_names = itertools.count()
+
+
+class MemoryConfigs(PackedConfigs):
+    """
+    Configs in memory, served by the source at `uri` as long as this object
+    is alive.
+
+    # Parameters
+    configs: `Mapping[str, Any]`
+        The dict, list or `DictConfig` of every config path. The paths may
+        end with `.yaml`.
+    """
+
+    def __init__(self, configs: Mapping[str, Any]):
+        # The same layout as a `ConfigPack`, so that the configs are served
+        # like the configs of a pack.
+        super().__init__(configs={}, groups={"": []}, group_configs={"": []})
+        for config_path, config in configs.items():
+            key = config_path.strip("/")
+            if key.endswith(".yaml"):
+                key = key[: -len(".yaml")]
+            # The header of a file without a header.
+            self.configs[key] = (ConfigSource._get_header_dict(""), _to_container(config))
+
+            parent, _, name = key.rpartition("/")
+            self._add_group(parent)
+            self.group_configs[parent].append(name)
+
+        self.name = str(next(_names))
+        self.uri = f"{MemoryConfigSource.scheme()}://{self.name}"
+        _MEMORY_CONFIGS[self.name] = self
+
+    def load_object(self, config_path: str) -> Any:
+        _, config = self.configs[config_path]
+        return config
+
+    def _add_group(self, group: str) -> None:
+        if group in self.groups:
+            return
+        self.groups[group] = []
+        self.group_configs[group] = []
+        parent, _, name = group.rpartition("/")
+        self._add_group(parent)
+        self.groups[parent].append(name)
+
+
+class MemoryConfigSource(PackConfigSource):
+    """
+    A Hydra config source for `MemoryConfigs`, with paths like `memory://0`.
+    """
+
+    def __init__(self, provider: str, path: str) -> None:
+        # Not the `__init__` of `PackConfigSource`, which loads a pack.
+        super(PackConfigSource, self).__init__(provider=provider, path=path)
+        self.pack = _MEMORY_CONFIGS.get(self.path)
+
+    @staticmethod
+    def scheme() -> str:
+        return "memory"
+
+
+SourcesRegistry.instance().register(MemoryConfigSource)
+
+
+def _to_container(config: Any) -> Any:
+    if isinstance(config, (DictConfig, ListConfig)):
+        return OmegaConf.to_container(config, resolve=False)
+    if config is None:
+        return {}
+    if not isinstance(config, (dict, list)):
+        raise ValueError(f"Configs must be dicts or lists, not {type(config).__name__}")
+    return copy.deepcopy(config)
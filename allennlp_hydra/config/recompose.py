@@ -0,0 +1,382 @@
+"""
+Composing many variants of a config that mostly differ in the values of their
+leaves, e.g. `trainer.optimizer.lr=0.1` or `model.dropout=0.2`, without
+running Hydra's whole composition for every variant.
+
+The overrides of a variant are split into config group overrides, such as
+`model=C`, and value overrides. The config is composed once for every
+distinct set of group overrides, and the value overrides are applied to a
+copy of the composed config. Only the interpolations that depend on the
+changed values are resolved again. A variant that cannot be composed this
+way, e.g. because it adds or deletes keys, or because its config uses
+structured configs, is composed by Hydra, so the result is always the same
+as `ComposeSession.compose`.
+
+Every override is parsed and classified once, so a sweep that reuses the same
+values only parses each of them the first time.
+"""
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from collections import OrderedDict
+import logging
+import re
+
+from hydra.core.override_parser.types import OverrideType
+from omegaconf import AnyNode, DictConfig, ListConfig, OmegaConf
+
+from allennlp_hydra.config.compose import ComposeSession, _apply_defaults
+from allennlp_hydra.config.compose_cache import CACHEABLE_RESOLVERS
+from allennlp_hydra.config.resolvers import FILE_RESOLVERS
+
+logger = logging.getLogger(__name__)
+
+# The resolvers whose value only depends on their arguments. Interpolations
+# using any other resolver, e.g. `${oc.env:...}` or `${now:...}`, are resolved
+# again for every variant.
+DETERMINISTIC_RESOLVERS = {*CACHEABLE_RESOLVERS, *FILE_RESOLVERS}
+
+# The number of composed configs kept for the different sets of group
+# overrides.
+MAX_BASES = 16
+
+_NODE_REFERENCE = re.compile(r"\$\{\s*([^${}:\s]*)\s*\}")
+_RESOLVER_CALL = re.compile(r"\$\{\s*([\w.-]+)\s*:")
+_INDEX = re.compile(r"\[(\w+)\]")
+
+KeyPath = Tuple[Any, ...]
+
+
+class _ParsedOverride(NamedTuple):
+    """
+    An override classified as a group override, a value override that can be
+    applied to a composed config, or neither.
+    """
+
+    input_line: str
+    is_group: bool
+    # The key and value of value overrides that can be applied, otherwise the
+    # key is empty.
+    key: str = ""
+    value: Any = None
+
+
+class Recomposer:
+    """
+    Composes variants of the config `config_name` with `session`, reusing the
+    config composed for the same group overrides:
+
+    ```python
+    recomposer = Recomposer(ComposeSession("conf"), "config")
+    configs = [
+        recomposer.compose(["model=C", f"model.dropout={dropout}"])
+        for dropout in [0.0, 0.1, 0.2]
+    ]
+    ```
+
+    The configs are the same as composing them with `session.compose`. Call
+    `clear` after changing the yaml files, along with `session.clear_cache`.
+
+    # Parameters
+    session: `ComposeSession`
+        The session used to compose the configs.
+    config_name: `str`
+        The name of the root config.
+    max_bases: `int`, optional (default=`MAX_BASES`)
+        The number of composed configs kept for different group overrides.
+    """
+
+    def __init__(self, session: ComposeSession, config_name: str, max_bases: int = MAX_BASES):
+        self.session = session
+        self.config_name = config_name
+        self.max_bases = max_bases
+        self._parsed: Dict[str, Optional[_ParsedOverride]] = {}
+        self._bases: "OrderedDict[Tuple[str, ...], Optional[_ComposedBase]]" = OrderedDict()
+
+        # The number of variants patched from a composed config and composed
+        # by Hydra.
+        self.num_patched = 0
+        self.num_composed = 0
+
+    def compose(
+        self,
+        overrides: Optional[List[str]] = None,
+        fill_defaults: bool = False,
+        prune_defaults: bool = False,
+    ) -> Dict:
+        """
+        Compose a variant. The arguments are the same as for
+        `ComposeSession.compose`.
+        """
+        if fill_defaults and prune_defaults:
+            raise ValueError("Defaults cannot be both filled and pruned")
+        overrides = list(overrides or [])
+
+        cfg = self._patch_base(overrides)
+        if cfg is None:
+            self.num_composed += 1
+            return self.session.compose(
+                self.config_name, overrides, fill_defaults, prune_defaults
+            )
+
+        self.num_patched += 1
+        _apply_defaults(cfg, fill_defaults, prune_defaults)
+        return cfg
+
+    def clear(self) -> None:
+        """
+        Forget the composed configs.
+        """
+        self._bases.clear()
+
+    def _patch_base(self, overrides: List[str]) -> Optional[Dict]:
+        parsed = [
+            override
+            for override in (self._parse(input_line) for input_line in overrides)
+            if override is not None
+        ]
+        if len(parsed) != len(overrides):
+            return None
+
+        group_overrides = tuple(override.input_line for override in parsed if override.is_group)
+        base = self._get_base(group_overrides)
+        if base is None:
+            return None
+        return base.patch([override for override in parsed if not override.is_group])
+
+    def _parse(self, input_line: str) -> Optional[_ParsedOverride]:
+        if input_line not in self._parsed:
+            self._parsed[input_line] = self._classify(input_line)
+        return self._parsed[input_line]
+
+    def _classify(self, input_line: str) -> Optional[_ParsedOverride]:
+        try:
+            (override,) = self.session.parse_overrides([input_line])
+        except Exception:
+            # Hydra reports the error when composing.
+            return None
+        if override.is_sweep_override():
+            return None
+
+        # The same classification as Hydra's defaults list.
+        value = override.value()
+        if self.session.group_exists(override.key_or_group) and not isinstance(value, dict):
+            return _ParsedOverride(input_line, is_group=True)
+
+        key = override.key_or_group
+        if (
+            override.type == OverrideType.CHANGE
+            and override.package is None
+            and key != "hydra"
+            and not key.startswith("hydra.")
+            and _is_plain_value(value)
+        ):
+            return _ParsedOverride(input_line, is_group=False, key=key, value=value)
+        return None
+
+    def _get_base(self, group_overrides: Tuple[str, ...]) -> Optional["_ComposedBase"]:
+        if group_overrides in self._bases:
+            self._bases.move_to_end(group_overrides)
+            return self._bases[group_overrides]
+
+        try:
+            cfg = self.session.compose_unresolved(self.config_name, list(group_overrides))
+            base = _ComposedBase(cfg) if _is_untyped(cfg) else None
+        except Exception:
+            # Every variant with these group overrides is composed by Hydra,
+            # which reports the error.
+            base = None
+
+        self._bases[group_overrides] = base
+        if len(self._bases) > self.max_bases:
+            self._bases.popitem(last=False)
+        return base
+
+
+class _ComposedBase:
+    """
+    A composed config, resolved and unresolved, and the keys that every
+    interpolation in it depends on.
+    """
+
+    def __init__(self, cfg: DictConfig):
+        self.unresolved = OmegaConf.to_container(cfg, resolve=False)
+        self.resolved = OmegaConf.to_container(cfg, resolve=True)
+
+        # The path and dependencies of every interpolation, keyed by its key.
+        # The dependencies are `None` if they are not known.
+        self.interpolations: Dict[str, Tuple[KeyPath, Optional[Set[str]]]] = {}
+        for path, value in _iter_leaf_paths(self.unresolved):
+            if isinstance(value, str) and "${" in value:
+                self.interpolations[_join_path(path)] = (path, _get_references(path, value))
+
+    def patch(self, overrides: List[_ParsedOverride]) -> Optional[Dict]:
+        """
+        Apply the value overrides to a copy of the resolved config.
+
+        # Returns
+        `Optional[Dict]` The config, or `None` if the overrides cannot be
+        applied to it.
+        """
+        resolved = _copy_container(self.resolved)
+        changes: Dict[str, Tuple[KeyPath, Any]] = {}
+        for override in overrides:
+            path = self._get_override_path(override)
+            if path is None:
+                return None
+            _set_value(resolved, path, _copy_container(override.value))
+            changes[override.key] = (path, override.value)
+
+        affected = self._get_affected_interpolations(changes)
+        if not affected:
+            return resolved
+
+        unresolved = _copy_container(self.unresolved)
+        for path, value in changes.values():
+            _set_value(unresolved, path, _copy_container(value))
+        try:
+            cfg = OmegaConf.create(unresolved)
+            for key in affected:
+                value = OmegaConf.select(cfg, key, throw_on_missing=False)
+                if isinstance(value, (DictConfig, ListConfig)):
+                    value = OmegaConf.to_container(value, resolve=True)
+                _set_value(resolved, self.interpolations[key][0], value)
+        except Exception:
+            return None
+        return resolved
+
+    def _get_override_path(self, override: _ParsedOverride) -> Optional[KeyPath]:
+        # Only existing leaves (and lists) outside of interpolations are
+        # patched. Everything else, e.g. merging a dict, is left to Hydra.
+        node = self.unresolved
+        path: List[Any] = []
+        for part in override.key.split("."):
+            if isinstance(node, dict) and part in node:
+                path.append(part)
+            elif isinstance(node, list) and part.isdigit() and int(part) < len(node):
+                path.append(int(part))
+            else:
+                return None
+            node = node[path[-1]]
+
+        if isinstance(node, dict):
+            return None
+        if isinstance(node, list) and not isinstance(override.value, list):
+            return None
+        return tuple(path)
+
+    def _get_affected_interpolations(self, changes: Dict[str, Tuple[KeyPath, Any]]) -> List[str]:
+        changed = set(changes)
+        # Overridden interpolations are plain values now.
+        remaining = {
+            key: references
+            for key, (_, references) in self.interpolations.items()
+            if key not in changed
+        }
+
+        affected = []
+        found = True
+        while found:
+            found = False
+            for key, references in list(remaining.items()):
+                if references is None or any(
+                    _is_related(reference, changed_key)
+                    for reference in references
+                    for changed_key in changed
+                ):
+                    affected.append(key)
+                    changed.add(key)
+                    del remaining[key]
+                    found = True
+        return affected
+
+
+def _is_plain_value(value: Any) -> bool:
+    if isinstance(value, list):
+        return all(_is_plain_value(item) and not isinstance(item, list) for item in value)
+    if isinstance(value, str):
+        return "${" not in value and value != "???"
+    return value is None or isinstance(value, (bool, int, float))
+
+
+def _is_untyped(node: Any) -> bool:
+    # Structured configs can convert the values assigned to them, so only
+    # configs made of plain containers and `AnyNode`s are patched.
+    children: Iterable[Any]
+    if isinstance(node, DictConfig):
+        if node._is_none() or node._is_missing() or node._is_interpolation():
+            return True
+        if node._metadata.object_type not in (None, dict):
+            return False
+        children = (node._get_node(key) for key in node.keys())
+    elif isinstance(node, ListConfig):
+        if node._is_none() or node._is_missing() or node._is_interpolation():
+            return True
+        children = (node._get_node(index) for index in range(len(node)))
+    else:
+        return type(node) is AnyNode
+    return all(_is_untyped(child) for child in children)
+
+
+def _get_references(path: KeyPath, interpolation: str) -> Optional[Set[str]]:
+    """
+    Get the absolute keys referenced by an interpolation, or `None` if they
+    cannot be found from the interpolation alone.
+    """
+    resolver_names = _RESOLVER_CALL.findall(interpolation)
+    references = _NODE_REFERENCE.findall(interpolation)
+    if interpolation.count("${") != len(resolver_names) + len(references):
+        # E.g. keys built from interpolations, such as `${a.${b}}`.
+        return None
+    if any(name not in DETERMINISTIC_RESOLVERS for name in resolver_names):
+        return None
+    return {_get_absolute_key(path, reference) for reference in references}
+
+
+def _get_absolute_key(path: KeyPath, reference: str) -> str:
+    reference = _INDEX.sub(r".\1", reference)
+    if not reference.startswith("."):
+        return reference
+
+    # Relative references start with one dot for the parent of the
+    # interpolation, and one more for every level above it.
+    num_dots = len(reference) - len(reference.lstrip("."))
+    parent = [str(part) for part in path[:-1]]
+    parent = parent[: max(len(parent) - (num_dots - 1), 0)]
+    return ".".join([*parent, reference[num_dots:]]).strip(".")
+
+
+def _is_related(reference: str, changed_key: str) -> bool:
+    return (
+        reference == changed_key
+        or reference.startswith(f"{changed_key}.")
+        or changed_key.startswith(f"{reference}.")
+    )
+
+
+def _iter_leaf_paths(value: Any, path: KeyPath = ()) -> Iterable[Tuple[KeyPath, Any]]:
+    if isinstance(value, dict) and value:
+        for key, item in value.items():
+            yield from _iter_leaf_paths(item, (*path, key))
+    elif isinstance(value, list) and value:
+        for index, item in enumerate(value):
+            yield from _iter_leaf_paths(item, (*path, index))
+    else:
+        yield path, value
+
+
+def _join_path(path: KeyPath) -> str:
+    return ".".join(str(part) for part in path)
+
+
+def _set_value(config: Any, path: KeyPath, value: Any) -> None:
+    for part in path[:-1]:
+        config = config[part]
+    config[path[-1]] = value
+
+
+def _copy_container(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _copy_container(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_container(item) for item in value]
+    return value
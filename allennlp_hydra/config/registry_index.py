@@ -0,0 +1,130 @@
+"""
+Reverse index over AllenNLP's `Registrable` registry. AllenNLP only maps
+`(base_class, name)` to the registered class, so finding the name a class was
+registered with requires scanning the registry. This index maps every
+registered class to the names it was registered with so that lookup is O(1).
+
+The index is refreshed incrementally: only the registries of base classes
+that gained new entries since the last lookup are scanned. If a name was
+registered again with another class (`exist_ok=True`), the index is rebuilt.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+from itertools import islice
+import logging
+
+from allennlp.common import Registrable
+
+logger = logging.getLogger(__name__)
+
+# Registered class -> {base class: first name it was registered with}.
+_REGISTERED_NAMES: Dict[type, Dict[type, str]] = {}
+
+# Name of a base class -> base class. If there are multiple base classes with
+# the same name, the first one registered is used.
+_BASE_CLASSES_BY_NAME: Dict[str, type] = {}
+
+# Base class -> The entries of its registry that have been indexed.
+_INDEXED_ENTRIES: Dict[type, Tuple[Any, ...]] = {}
+
+# The registry version the index was last refreshed at.
+_INDEXED_VERSION: Optional[Tuple[Tuple[Any, ...], ...]] = None
+
+
+def get_registry_version() -> Tuple[Tuple[Any, ...], ...]:
+    """
+    Fingerprint of `Registrable._registry`: the registered `(class,
+    constructor)` entries of every base class. Registering a class (or a new
+    base class), also again with a name that was already registered, changes
+    the fingerprint. The entries are compared by identity and are kept alive
+    by the fingerprint, so comparing fingerprints is cheap and exact.
+    """
+    return tuple(tuple(registry.values()) for registry in Registrable._registry.values())
+
+
+def get_registered_name(registered_class: type, base_class: type) -> Optional[str]:
+    """
+    Get the name `registered_class` was registered with under `base_class`.
+
+    # Parameters
+        registered_class: `type`
+            The class to find the name for.
+        base_class: `type`
+            The base class that `registered_class` was registered to.
+
+    # Returns
+    `Optional[str]` The name, or `None` if it was never registered to
+    `base_class`. If it was registered with multiple names, the first one is
+    returned.
+    """
+    refresh_registry_index()
+    return _REGISTERED_NAMES.get(registered_class, {}).get(base_class)
+
+
+def get_base_class_by_name(base_class_name: str) -> Optional[type]:
+    """
+    Get the base class that has registered subclasses from its `__name__`.
+
+    # Parameters
+        base_class_name: `str`
+            The name of the base class, e.g. `DatasetReader`.
+
+    # Returns
+    `Optional[type]` The base class or `None` if there is no base class with
+    that name.
+    """
+    refresh_registry_index()
+    return _BASE_CLASSES_BY_NAME.get(base_class_name)
+
+
+def refresh_registry_index() -> None:
+    """
+    Add the classes registered since the last refresh to the index.
+    """
+    global _INDEXED_VERSION
+
+    registry_version = get_registry_version()
+    if registry_version == _INDEXED_VERSION:
+        return
+
+    # Copy the items so that registering classes while refreshing (i.e. from
+    # another thread) does not change the dict during iteration.
+    registries = [
+        (base_class, list(registry.items()))
+        for base_class, registry in list(Registrable._registry.items())
+    ]
+
+    # Registries are dicts, so new entries are always at the end, unless a
+    # name was registered again. Then the old class has to be removed, which
+    # is done by indexing everything again.
+    for base_class, items in registries:
+        indexed = _INDEXED_ENTRIES.get(base_class, ())
+        if tuple(entry for _, entry in items[: len(indexed)]) != indexed:
+            clear_registry_index()
+            break
+
+    for base_class, items in registries:
+        num_indexed = len(_INDEXED_ENTRIES.get(base_class, ()))
+        if num_indexed == len(items):
+            continue
+
+        _BASE_CLASSES_BY_NAME.setdefault(base_class.__name__, base_class)
+
+        for name, (registered_class, _) in islice(items, num_indexed, None):
+            _REGISTERED_NAMES.setdefault(registered_class, {}).setdefault(
+                base_class, name
+            )
+        _INDEXED_ENTRIES[base_class] = tuple(entry for _, entry in items)
+
+    _INDEXED_VERSION = registry_version
+
+
+def clear_registry_index() -> None:
+    """
+    Clear the index so that the next lookup rebuilds it from scratch.
+    """
+    global _INDEXED_VERSION
+    _REGISTERED_NAMES.clear()
+    _BASE_CLASSES_BY_NAME.clear()
+    _INDEXED_ENTRIES.clear()
+    _INDEXED_VERSION = None
@@ -0,0 +1,195 @@
+"""
+OmegaConf resolvers for values that are derived from files, such as the number
+of lines of a dataset or vocabulary, or the dimension of pretrained
+embeddings. They are registered when `allennlp_hydra.config.compose` is
+imported, so they can be used in any config composed by `allennlp_hydra`:
+
+```yaml
+model:
+  text_field_embedder:
+    token_embedders:
+      tokens:
+        type: embedding
+        pretrained_file: data/glove.6B.100d.txt.gz
+        embedding_dim: ${embedding_dim:data/glove.6B.100d.txt.gz}
+```
+
+The resolvers are:
+
+* `${file_lines:path}`: The number of lines of the file.
+* `${embedding_dim:path}`: The dimension of the embeddings in a text file in
+    the format of GloVe or word2vec, with or without a header.
+
+Files ending in `.gz`, `.bz2`, `.xz` or `.lzma` are decompressed, and relative
+paths are relative to the working directory. The value for a file is
+memoized in memory and in `CACHE_ROOT/resolvers`, keyed by the absolute path,
+size and modification time of the file, so a file is only read again after it
+changes.
+"""
+from typing import Any, Callable, Dict, Tuple
+
+import bz2
+import gzip
+import hashlib
+from io import BufferedIOBase
+import json
+import logging
+import lzma
+import os
+from pathlib import Path
+
+from omegaconf import OmegaConf
+
+from allennlp_hydra.utils import file_utils
+
+logger = logging.getLogger(__name__)
+
+# Bumped when the format of the entries or the value of a resolver changes.
+RESOLVER_CACHE_FORMAT_VERSION = 1
+
+# The resolvers, keyed by their name in configs.
+FILE_RESOLVERS: Dict[str, Callable[[Path], Any]] = {}
+
+# The values already computed in this process, keyed by the resolver name and
+# the state of the file.
+_memory_cache: Dict[Tuple[str, str, int, int], Any] = {}
+
+# The functions opening the compressed files in binary mode, by their suffix.
+_OPENERS: Dict[str, Callable[..., BufferedIOBase]] = {
+    ".gz": gzip.GzipFile,
+    ".bz2": bz2.BZ2File,
+    ".xz": lzma.LZMAFile,
+    ".lzma": lzma.LZMAFile,
+}
+
+_CHUNK_SIZE = 1 << 20
+
+# Returned by `_read_entry` when there is no valid entry.
+_MISSING = object()
+
+
+def file_resolver(name: str) -> Callable:
+    """
+    Decorator to add a function computing a value from a file to
+    `FILE_RESOLVERS` under `name`. The function is called with the absolute
+    path of the file.
+    """
+
+    def add_resolver(func: Callable[[Path], Any]) -> Callable[[Path], Any]:
+        FILE_RESOLVERS[name] = func
+        return func
+
+    return add_resolver
+
+
+def register_resolvers() -> None:
+    """
+    Register the resolvers in `FILE_RESOLVERS` with OmegaConf. Resolvers that
+    are already registered, e.g. by the user, are not replaced.
+    """
+    for name in FILE_RESOLVERS:
+        if not OmegaConf.has_resolver(name):
+            OmegaConf.register_new_resolver(name, _get_resolver(name))
+
+
+def resolve_file_value(name: str, path: str) -> Any:
+    """
+    Get the value of the resolver `name` for the file at `path`, from the
+    in-memory or disk cache if the file did not change since it was computed.
+    """
+    file_path = Path(path).expanduser().absolute()
+    stat = os.stat(file_path)
+    memory_key = (name, str(file_path), stat.st_size, stat.st_mtime_ns)
+    if memory_key in _memory_cache:
+        return _memory_cache[memory_key]
+
+    entry_path = _get_entry_path(memory_key)
+    value = _read_entry(entry_path)
+    if value is _MISSING:
+        value = FILE_RESOLVERS[name](file_path)
+        _write_entry(entry_path, value)
+
+    _memory_cache[memory_key] = value
+    return value
+
+
+def clear_resolver_cache() -> None:
+    """
+    Forget the values computed in this process. The disk cache is kept.
+    """
+    _memory_cache.clear()
+
+
+@file_resolver("file_lines")
+def count_lines(path: Path) -> int:
+    """
+    Count the lines of a file. The last line does not need to end with a
+    newline.
+    """
+    num_lines = 0
+    last_chunk = b""
+    with _open_file(path) as lines_file:
+        for chunk in iter(lambda: lines_file.read(_CHUNK_SIZE), b""):
+            num_lines += chunk.count(b"\n")
+            last_chunk = chunk
+    if last_chunk and not last_chunk.endswith(b"\n"):
+        num_lines += 1
+    return num_lines
+
+
+@file_resolver("embedding_dim")
+def get_embedding_dim(path: Path) -> int:
+    """
+    Get the dimension of the embeddings in a text file with a token and its
+    values on every line. The first line may be a word2vec header with the
+    number of tokens and the dimension.
+    """
+    with _open_file(path) as embeddings_file:
+        first_line = embeddings_file.readline().decode("utf-8").rstrip()
+    fields = first_line.split(" ")
+    if len(fields) == 2 and all(field.isdigit() for field in fields):
+        return int(fields[1])
+    if len(fields) < 2:
+        raise ValueError(f"'{path}' is not an embeddings text file")
+    return len(fields) - 1
+
+
+def _get_resolver(name: str) -> Callable[[str], Any]:
+    def resolver(path: str) -> Any:
+        return resolve_file_value(name, path)
+
+    return resolver
+
+
+def _open_file(path: Path) -> BufferedIOBase:
+    opener = _OPENERS.get(path.suffix)
+    if opener is None:
+        return open(path, "rb")
+    return opener(path, "rb")
+
+
+def _get_entry_path(memory_key: Tuple[str, str, int, int]) -> Path:
+    key = hashlib.sha256(
+        json.dumps([RESOLVER_CACHE_FORMAT_VERSION, *memory_key]).encode("utf-8")
+    ).hexdigest()
+    return file_utils.CACHE_ROOT.joinpath("resolvers", key[:2], f"{key}.json")
+
+
+def _read_entry(entry_path: Path) -> Any:
+    try:
+        return json.loads(entry_path.read_text("utf-8"))["value"]
+    except FileNotFoundError:
+        return _MISSING
+    except (ValueError, KeyError) as e:
+        logger.warning(f"Ignoring the invalid resolver cache entry '{entry_path}': {e}")
+        return _MISSING
+
+
+def _write_entry(entry_path: Path, value: Any) -> None:
+    try:
+        entry_path.parent.mkdir(parents=True, exist_ok=True)
+        with file_utils.atomic_open(entry_path) as entry_file:
+            json.dump({"value": value}, entry_file)
+    except OSError as e:
+        # The value is still memoized in memory.
+        logger.warning(f"Could not write the resolver cache entry '{entry_path}': {e}")
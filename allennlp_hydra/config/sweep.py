@@ -0,0 +1,160 @@
+"""
+Expanding sweeps written with Hydra's
+[`Override Grammar`](https://hydra.cc/docs/advanced/override_grammar/extended),
+e.g. `model=C,D`, `trainer.optimizer.lr=choice(0.1,0.01)` or
+`trainer.num_epochs=range(1,10)`, into the override lists of every point.
+
+The points of a `Sweep` are never stored. They are computed from their index,
+so a sweep with millions of points can be counted, sharded and sampled with
+the memory of its dimensions alone.
+"""
+from typing import Iterator, List, Optional, Sequence, Union, overload
+
+import random
+
+from hydra.core.override_parser.overrides_parser import OverridesParser
+from hydra.core.override_parser.types import Override, RangeSweep
+from hydra.errors import HydraException
+
+
+class Sweep(Sequence[List[str]]):
+    """
+    The cartesian product of the values of every override, in the same order
+    as Hydra's basic sweeper: the last override changes the fastest.
+
+    ```python
+    sweep = Sweep(["model=C,D", "trainer.num_epochs=range(1,4)"])
+    len(sweep)  # 6
+    sweep[1]  # ["model=C", "trainer.num_epochs=2"]
+    ```
+
+    # Parameters
+    overrides: `List[str]`
+        The overrides. Overrides without a sweep are part of every point.
+    config_loader: `Optional[ConfigLoader]`, optional (default=`None`)
+        Hydra's config loader, needed to expand glob sweeps of config groups
+        such as `model=glob(*)`.
+    """
+
+    def __init__(self, overrides: List[str], config_loader=None):
+        parser = OverridesParser.create(config_loader=config_loader)
+        self.overrides = parser.parse_overrides(list(overrides))
+        self.dimensions = [_get_dimension(override) for override in self.overrides]
+
+        self._size = 1
+        for dimension in self.dimensions:
+            self._size *= len(dimension)
+
+    @property
+    def is_sweep(self) -> bool:
+        """
+        If any of the overrides is a sweep.
+        """
+        return any(override.is_sweep_override() for override in self.overrides)
+
+    def __len__(self) -> int:
+        return self._size
+
+    @overload
+    def __getitem__(self, index: int) -> List[str]:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[List[str]]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[List[str], List[List[str]]]:
+        if isinstance(index, slice):
+            return [self[point_index] for point_index in range(self._size)[index]]
+        if not isinstance(index, int):
+            raise TypeError(f"Sweep indices must be integers, not {type(index).__name__}")
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(f"Index {index} is out of range for a sweep of {self._size}")
+
+        point = []
+        for dimension in reversed(self.dimensions):
+            index, value_index = divmod(index, len(dimension))
+            point.append(dimension[value_index])
+        point.reverse()
+        return point
+
+    def __iter__(self) -> Iterator[List[str]]:
+        for index in range(self._size):
+            yield self[index]
+
+    def get_shard(self, shard_index: int, num_shards: int) -> range:
+        """
+        Get the indices of the points in one of `num_shards` shards of about the
+        same size. Every point is in exactly one shard.
+        """
+        if not 0 <= shard_index < num_shards:
+            raise ValueError(
+                f"The shard index must be in [0, {num_shards}), got {shard_index}"
+            )
+        return range(shard_index, self._size, num_shards)
+
+    def sample_indices(
+        self,
+        num_points: int,
+        seed: Optional[int] = None,
+        indices: Optional[Sequence[int]] = None,
+    ) -> List[int]:
+        """
+        Sample the indices of `num_points` points without replacement, in
+        increasing order. If `indices` is passed, they are sampled from it
+        instead of the whole sweep, e.g. from a shard.
+        """
+        if indices is None:
+            indices = range(self._size)
+        num_points = min(num_points, len(indices))
+        return sorted(random.Random(seed).sample(indices, num_points))
+
+
+class _Dimension(Sequence[str]):
+    """
+    The overrides for each value of one override.
+    """
+
+    def __init__(self, key: str, values: Union[Sequence, range]):
+        self.key = key
+        self.values = values
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @overload
+    def __getitem__(self, index: int) -> str:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[str]:
+        ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [f"{self.key}={value}" for value in self.values[index]]
+        return f"{self.key}={self.values[index]}"
+
+
+def _get_dimension(override: Override) -> Sequence[str]:
+    if override.input_line is None:
+        raise ValueError("Only parsed overrides can be expanded")
+    if not override.is_sweep_override():
+        # Kept as written, which also keeps deletions such as `~key`.
+        return [override.input_line]
+    if not override.is_discrete_sweep():
+        value_type = "unknown" if override.value_type is None else override.value_type.name
+        raise HydraException(
+            f"Cannot expand the sweep '{override.input_line}' of type "
+            f"{value_type}, only choice, glob and range sweeps"
+        )
+
+    sweep = override.value()
+    if isinstance(sweep, RangeSweep) and not sweep.shuffle:
+        # Integer ranges are kept lazy so that they can be arbitrarily long.
+        values = sweep.range()
+        if isinstance(values, range):
+            return _Dimension(override.get_key_element(), values)
+    return _Dimension(override.get_key_element(), list(override.sweep_string_iterator()))
@@ -0,0 +1,60 @@
+"""
+Utilities for working with files.
+"""
+from typing import IO, Iterator, Union
+
+from contextlib import contextmanager
+import os
+from os import PathLike
+from pathlib import Path
+import secrets
+
+# Root directory of everything that `allennlp_hydra` caches on disk. It can be
+# changed with the `ALLENNLP_HYDRA_CACHE_ROOT` environment variable.
+CACHE_ROOT = Path(
+    os.getenv("ALLENNLP_HYDRA_CACHE_ROOT", Path.home().joinpath(".allennlp_hydra"))
+)
+
+
+@contextmanager
+def atomic_open(
+    path: Union[str, PathLike], mode: str = "w", encoding: str = "utf-8"
+) -> Iterator[IO]:
+    """
+    Open a file for writing such that readers either see the old contents of
+    `path` or the complete new contents, but never a partially written file.
+    Everything is written to a temporary file in the same directory that is
+    renamed to `path` once the block exits without an error.
+
+    # Parameters
+    path: `Union[str, PathLike]`
+        The path to write to. The parent directory must exist.
+    mode: `str`, optional (default=`"w"`)
+        Either `"w"` or `"wb"`.
+    encoding: `str`, optional (default=`"utf-8"`)
+        The encoding used when writing in text mode.
+    """
+    path = Path(path)
+    # The temporary file is created with the same permissions that `open`
+    # would use, unlike `tempfile.mkstemp` which only lets the owner read it.
+    while True:
+        temp_path = path.parent.joinpath(f".{path.name}.{secrets.token_hex(4)}.tmp")
+        try:
+            file_descriptor = os.open(
+                temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666
+            )
+            break
+        except FileExistsError:
+            continue
+    try:
+        if "b" in mode:
+            temp_file = os.fdopen(file_descriptor, mode)
+        else:
+            temp_file = os.fdopen(file_descriptor, mode, encoding=encoding)
+        with temp_file:
+            yield temp_file
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,72 @@
+"""
+Benchmarks for composing many configs in one process, e.g. for a sweep.
+"""
+from typing import List
+
+import hydra
+from omegaconf import OmegaConf
+import pytest
+
+from allennlp_hydra.config.compose import ComposeSession, compose_config
+from allennlp_hydra.config.recompose import Recomposer
+from allennlp_hydra.utils.testing import FIXTURES_ROOT
+
+CONFIG_DIR = FIXTURES_ROOT.joinpath("conf")
+
+NUM_COMPOSITIONS = 1000
+
+SWEEP_OVERRIDES = [
+    [
+        "model=simple_tagger",
+        f"model.encoder.hidden_size={i + 1}",
+        "trainer/learning_rate_scheduler=polynomial_decay",
+    ]
+    for i in range(NUM_COMPOSITIONS)
+]
+
+
+def compose_sweep_with_global_hydra(overrides_list: List[List[str]]) -> None:
+    """
+    The baseline: how `compose_config` composed before `ComposeSession`,
+    initializing Hydra's global state for every config.
+    """
+    for overrides in overrides_list:
+        with hydra.initialize_config_dir(config_dir=str(CONFIG_DIR), job_name="bench"):
+            cfg = hydra.compose(config_name="simple_config", overrides=overrides)
+        OmegaConf.to_container(cfg, resolve=True)
+
+
+def compose_sweep(overrides_list: List[List[str]]) -> None:
+    for overrides in overrides_list:
+        compose_config(CONFIG_DIR, "simple_config", "bench", config_overrides=overrides)
+
+
+def compose_sweep_with_session(overrides_list: List[List[str]]) -> None:
+    session = ComposeSession(CONFIG_DIR, job_name="bench")
+    for overrides in overrides_list:
+        session.compose("simple_config", overrides)
+
+
+def compose_sweep_with_recomposer(overrides_list: List[List[str]]) -> None:
+    recomposer = Recomposer(ComposeSession(CONFIG_DIR, job_name="bench"), "simple_config")
+    for overrides in overrides_list:
+        recomposer.compose(overrides)
+
+
+COMPOSE_FUNCS = {
+    "global_hydra": compose_sweep_with_global_hydra,
+    "compose_config": compose_sweep,
+    "session": compose_sweep_with_session,
+    "recomposer": compose_sweep_with_recomposer,
+}
+
+
+@pytest.mark.parametrize(
+    "compose_func", list(COMPOSE_FUNCS.values()), ids=list(COMPOSE_FUNCS)
+)
+def bench_compose_sweep(benchmark, compose_func):
+    """
+    Compose `NUM_COMPOSITIONS` configs that only differ in their overrides.
+    The session is created inside of the benchmark, so its setup is counted.
+    """
+    benchmark.pedantic(compose_func, args=(SWEEP_OVERRIDES,), rounds=1, iterations=1)
@@ -0,0 +1,100 @@
+"""
+Benchmarks for the cold-start time of the `allennlp` CLI with and without this
+plugin. Every round runs the command in a new Python process, from a directory
+whose `.allennlp_plugins` file does or does not list `allennlp_hydra`.
+"""
+from typing import List
+
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from allennlp_hydra.utils.testing import FIXTURES_ROOT, PROJECT_ROOT
+
+CONFIG_DIR = FIXTURES_ROOT.joinpath("conf")
+
+NUM_ROUNDS = 5
+
+# Composes a config without the CLI, and fails if that imported torch.
+LIBRARY_COMPOSE_SCRIPT = f"""
+import sys
+from allennlp_hydra.config.compose import compose_config
+compose_config({str(CONFIG_DIR)!r}, "simple_config", "bench")
+assert "torch" not in sys.modules, "Composing imported torch"
+"""
+
+
+def run(args: List[str], cwd: Path) -> None:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [str(PROJECT_ROOT), *filter(None, [env.get("PYTHONPATH")])]
+    )
+    subprocess.run(
+        [sys.executable, *args],
+        cwd=cwd,
+        env=env,
+        check=True,
+        stdout=subprocess.DEVNULL,
+    )
+
+
+@pytest.fixture()
+def run_dir(tmp_path):
+    """
+    A directory without a `.allennlp_plugins` file, so the plugin is not
+    loaded by commands run from it.
+    """
+    yield tmp_path
+
+
+@pytest.fixture()
+def plugin_dir(tmp_path):
+    """
+    A directory whose `.allennlp_plugins` file loads the plugin.
+    """
+    tmp_path.joinpath(".allennlp_plugins").write_text("allennlp_hydra\n", "utf-8")
+    yield tmp_path
+
+
+@pytest.mark.parametrize("plugin", [False, True], ids=["without_plugin", "with_plugin"])
+def bench_allennlp_help(benchmark, request, plugin):
+    """
+    `allennlp --help`, which imports every plugin to list its commands.
+    """
+    cwd = request.getfixturevalue("plugin_dir" if plugin else "run_dir")
+    benchmark.pedantic(
+        run, args=(["-m", "allennlp", "--help"], cwd), rounds=NUM_ROUNDS, iterations=1
+    )
+
+
+def bench_allennlp_compose(benchmark, plugin_dir):
+    """
+    `allennlp compose` of the simple config, from start to exit.
+    """
+    args = [
+        "-m",
+        "allennlp",
+        "compose",
+        str(CONFIG_DIR),
+        "simple_config",
+        "bench",
+        "-s",
+        str(plugin_dir),
+    ]
+    benchmark.pedantic(run, args=(args, plugin_dir), rounds=NUM_ROUNDS, iterations=1)
+
+
+def bench_library_compose(benchmark, run_dir):
+    """
+    Composing the simple config with `allennlp_hydra.config.compose`, without
+    the `allennlp` CLI. This never imports torch.
+    """
+    benchmark.pedantic(
+        run,
+        args=(["-c", LIBRARY_COMPOSE_SCRIPT], run_dir),
+        rounds=NUM_ROUNDS,
+        iterations=1,
+    )
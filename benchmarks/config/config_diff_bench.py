@@ -0,0 +1,28 @@
+"""
+Benchmarks for finding the varying keys of the configs of a sweep.
+"""
+import json
+
+from allennlp_hydra.config.config_diff import diff_configs
+from allennlp_hydra.utils.testing import FIXTURES_ROOT
+
+SIMPLE_TAGGER_CONFIG = json.loads(
+    FIXTURES_ROOT.joinpath("expected_configs/simple_tagger.jsonnet").read_text("utf-8")
+)
+
+NUM_CONFIGS = 1000
+
+
+def bench_diff_sweep(benchmark):
+    """
+    Diff `NUM_CONFIGS` copies of the simple tagger config that differ in one
+    leaf.
+    """
+    configs = {}
+    for index in range(NUM_CONFIGS):
+        config = json.loads(json.dumps(SIMPLE_TAGGER_CONFIG))
+        config["trainer"]["num_epochs"] = index
+        configs[str(index)] = config
+
+    diff = benchmark(diff_configs, configs)
+    assert diff.varying_keys == ["trainer.num_epochs"]
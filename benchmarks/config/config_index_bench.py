@@ -0,0 +1,51 @@
+"""
+Benchmarks for indexing a config directory, as done for every completion and
+override check.
+"""
+import pytest
+
+from allennlp_hydra.config import config_index
+from allennlp_hydra.config.config_index import load_config_index
+
+NUM_GROUPS = 20
+
+NUM_OPTIONS = 100
+
+
+@pytest.fixture(scope="module")
+def config_dir(tmp_path_factory):
+    """
+    A config directory with `NUM_GROUPS` groups of `NUM_OPTIONS` options.
+    """
+    config_dir = tmp_path_factory.mktemp("conf")
+    defaults = []
+    for group_index in range(NUM_GROUPS):
+        group_dir = config_dir.joinpath(f"group_{group_index}")
+        group_dir.mkdir()
+        for option_index in range(NUM_OPTIONS):
+            group_dir.joinpath(f"option_{option_index}.yaml").write_text(
+                f"value: {option_index}\nnested:\n  a: [1, 2, 3]\n"
+            )
+        defaults.append(f"  - group_{group_index}: option_0")
+    config_dir.joinpath("config.yaml").write_text("defaults:\n" + "\n".join(defaults) + "\n")
+    yield config_dir
+
+
+@pytest.mark.parametrize("cached", [False, True], ids=["cold", "cached"])
+def bench_load_config_index(benchmark, config_dir, cached):
+    """
+    Index the directory and check an override, with and without the index of
+    the previous run.
+    """
+
+    def setup():
+        cache_path = config_index._get_cache_path(config_dir.absolute())
+        if cached:
+            load_config_index(config_dir)
+        elif cache_path.exists():
+            cache_path.unlink()
+
+    def check():
+        load_config_index(config_dir).check_overrides("config", ["group_0=option_99"])
+
+    benchmark.pedantic(check, setup=setup, rounds=10, iterations=1)
@@ -0,0 +1,57 @@
+"""
+Benchmarks for composing from a config pack instead of its config directory.
+"""
+from pathlib import Path
+
+import pytest
+
+from allennlp_hydra.config.compose import compose_config
+from allennlp_hydra.config.config_pack import pack_config_dir
+
+NUM_GROUPS = 20
+
+NUM_OPTIONS = 100
+
+NUM_COMPOSITIONS = 100
+
+
+@pytest.fixture(scope="module")
+def config_paths(tmp_path_factory):
+    """
+    A config directory with `NUM_GROUPS` groups of `NUM_OPTIONS` options, and
+    its pack.
+    """
+    config_dir = tmp_path_factory.mktemp("conf")
+    defaults = []
+    for group_index in range(NUM_GROUPS):
+        group_dir = config_dir.joinpath(f"group_{group_index}")
+        group_dir.mkdir()
+        for option_index in range(NUM_OPTIONS):
+            group_dir.joinpath(f"option_{option_index}.yaml").write_text(
+                f"value: {option_index}\nname: ${{.value}}\nnested:\n  a: [1, 2, 3]\n"
+            )
+        defaults.append(f"  - group_{group_index}: option_0")
+    config_dir.joinpath("config.yaml").write_text("defaults:\n" + "\n".join(defaults) + "\n")
+
+    pack_path = config_dir.parent.joinpath("conf.pack")
+    pack_config_dir(config_dir, pack_path)
+    yield {"dir": config_dir, "pack": pack_path}
+
+
+@pytest.mark.parametrize("source", ["dir", "pack"])
+def bench_compose_from_source(benchmark, config_paths, source):
+    """
+    Compose `NUM_COMPOSITIONS` configs choosing different options of every
+    group with `compose_config`.
+    """
+    config_path: Path = config_paths[source]
+    overrides_list = [
+        [f"group_{group_index}=option_{index % NUM_OPTIONS}" for group_index in range(NUM_GROUPS)]
+        for index in range(NUM_COMPOSITIONS)
+    ]
+
+    def compose_all():
+        for overrides in overrides_list:
+            compose_config(config_path, "config", "bench", config_overrides=overrides)
+
+    benchmark.pedantic(compose_all, rounds=1, iterations=1)
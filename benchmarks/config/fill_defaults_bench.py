@@ -0,0 +1,208 @@
+"""
+Benchmarks for `fill_config_with_default_values`. The peak memory allocated by
+one fill is stored in the `extra_info` of each benchmark.
+"""
+from typing import Callable, Dict, List
+
+from copy import deepcopy
+import inspect
+import json
+import tracemalloc
+
+import pytest
+from allennlp.common import Registrable
+from allennlp.models import Model
+
+from allennlp_hydra.config import fill_defaults
+from allennlp_hydra.config.compose import get_filled_sections
+from allennlp_hydra.config.fill_defaults import (
+    fill_config_with_default_values,
+    fill_configs_with_default_values,
+    get_annotation_class,
+    get_default_value_for_parameter,
+)
+from allennlp_hydra.utils.testing import FIXTURES_ROOT
+
+SIMPLE_TAGGER_CONFIG = json.loads(
+    FIXTURES_ROOT.joinpath("expected_configs/simple_tagger.jsonnet").read_text("utf-8")
+)
+
+
+class DeepConfig(Registrable):
+    pass
+
+
+@DeepConfig.register("node")
+class DeepConfigNode(DeepConfig):
+    def __init__(
+        self,
+        child: DeepConfig = None,
+        name: str = "node",
+        width: int = 8,
+        values: List[int] = None,
+    ):
+        self.child = child
+        self.name = name
+        self.width = width
+        self.values = values or []
+
+
+def make_deep_config(depth: int) -> Dict:
+    """
+    Create a config that is `depth` levels of `DeepConfigNode` deep. Every
+    level already has all of its arguments except for the innermost one, which
+    is missing its defaults.
+    """
+    config = {"type": "node"}
+    for level in range(depth):
+        config = {
+            "type": "node",
+            "child": config,
+            "name": f"level_{level}",
+            "width": level,
+            "values": list(range(32)),
+        }
+    return config
+
+
+DEEP_CONFIG = make_deep_config(50)
+
+
+def make_sweep_configs(num_configs: int) -> List[Dict]:
+    """
+    Create `num_configs` copies of the simple tagger model config that only
+    differ in the hidden size of the encoder.
+    """
+    configs = []
+    for i in range(num_configs):
+        config = json.loads(json.dumps(SIMPLE_TAGGER_CONFIG["model"]))
+        config["encoder"]["hidden_size"] = i + 1
+        configs.append(config)
+    return configs
+
+
+SWEEP_CONFIGS = make_sweep_configs(1000)
+
+
+def fill_with_double_copy(base_class: type, config: Dict) -> Dict:
+    """
+    The fill before the single copy and structure sharing modes, which copies
+    the config twice at every level of the recursion. The default values are
+    the same as `fill_config_with_default_values`, so only the copies differ.
+    """
+    config_dict = deepcopy(config)
+    if base_class is None:
+        return config_dict
+
+    if issubclass(base_class, Registrable):
+        class_to_use = base_class.by_name(
+            config_dict.get("type", base_class.default_implementation)
+        )
+    else:
+        class_to_use = base_class
+
+    output_config = deepcopy(config_dict)
+    for parameter in inspect.signature(class_to_use).parameters.values():
+        if parameter.default is inspect.Parameter.empty:
+            continue
+        if parameter.name not in config_dict:
+            output_config[parameter.name] = get_default_value_for_parameter(parameter)
+            continue
+        if not isinstance(config_dict[parameter.name], dict):
+            continue
+        output_config[parameter.name] = dict(
+            fill_with_double_copy(
+                get_annotation_class(parameter), config_dict[parameter.name]
+            )
+        )
+    return output_config
+
+
+def fill_with_single_copy(base_class: type, config: Dict) -> Dict:
+    return fill_config_with_default_values(base_class, config)
+
+
+def fill_sharing_structure(base_class: type, config: Dict) -> Dict:
+    return fill_config_with_default_values(base_class, config, share_structure=True)
+
+
+FILL_MODES = {
+    "double_copy": fill_with_double_copy,
+    "copy": fill_with_single_copy,
+    "shared": fill_sharing_structure,
+}
+
+
+def fill_simple_tagger(mode: str) -> None:
+    for key, base_class in get_filled_sections().items():
+        FILL_MODES[mode](base_class, SIMPLE_TAGGER_CONFIG[key])
+
+
+def fill_deep_config(mode: str) -> None:
+    FILL_MODES[mode](DeepConfig, DEEP_CONFIG)
+
+
+def get_peak_allocation(func: Callable, *args) -> int:
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+@pytest.mark.parametrize("mode", list(FILL_MODES))
+def bench_fill_simple_tagger(benchmark, mode):
+    benchmark.extra_info["peak_allocated_bytes"] = get_peak_allocation(
+        fill_simple_tagger, mode
+    )
+    benchmark(fill_simple_tagger, mode)
+
+
+@pytest.mark.parametrize("mode", list(FILL_MODES))
+def bench_fill_deep_config(benchmark, mode):
+    benchmark.extra_info["peak_allocated_bytes"] = get_peak_allocation(
+        fill_deep_config, mode
+    )
+    benchmark(fill_deep_config, mode)
+
+
+def fill_simple_tagger_cold() -> None:
+    fill_defaults.clear_fill_caches()
+    fill_simple_tagger("copy")
+
+
+@pytest.mark.parametrize("cold", [True, False], ids=["cold", "warm"])
+def bench_fill_plans(benchmark, cold):
+    """
+    Compare filling with the fill plans and default subtrees compiled for every
+    fill (`cold`) to filling with the cached ones (`warm`).
+    """
+    if cold:
+        benchmark(fill_simple_tagger_cold)
+    else:
+        fill_simple_tagger("copy")
+        benchmark(fill_simple_tagger, "copy")
+
+
+@pytest.mark.parametrize("share_structure", [False, True], ids=["copy", "shared"])
+@pytest.mark.parametrize("batch", [False, True], ids=["single", "batch"])
+def bench_fill_sweep(benchmark, batch, share_structure):
+    if batch:
+
+        def fill_sweep():
+            for _ in fill_configs_with_default_values(
+                Model, SWEEP_CONFIGS, share_structure=share_structure
+            ):
+                pass
+
+    else:
+
+        def fill_sweep():
+            for config in SWEEP_CONFIGS:
+                fill_config_with_default_values(
+                    Model, config, share_structure=share_structure
+                )
+
+    benchmark(fill_sweep)
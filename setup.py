@@ -14,7 +14,15 @@ setuptools.setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     packages=setuptools.find_packages(
-        exclude=["*.tests", "*.tests.*", "tests.*", "tests", "test_*"],
+        exclude=[
+            "*.tests",
+            "*.tests.*",
+            "tests.*",
+            "tests",
+            "test_*",
+            "benchmarks",
+            "benchmarks.*",
+        ],
     ),
     project_urls={
         "Documentation": "https://github.com/gabeorlanski/allennlp-hydra",
@@ -25,6 +33,7 @@ setuptools.setup(
         "hydra-core>=1.1.1",
         "overrides>=3.1.0",
         "omegaconf>=2.1",
+        "filelock>=3.0",
     ],
     requires_python=">=3.7",
     classifiers=[
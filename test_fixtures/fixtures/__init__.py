@@ -1 +1,2 @@
+from test_fixtures.fixtures.cache import *
 from test_fixtures.fixtures.files import *
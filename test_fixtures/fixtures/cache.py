@@ -0,0 +1,16 @@
+import pytest
+
+from allennlp_hydra.config import fill_defaults, resolvers
+from allennlp_hydra.utils import file_utils
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """
+    Keep everything that is cached on disk in a temporary directory and reset
+    the defaults schema and the resolver values after every test.
+    """
+    monkeypatch.setattr(file_utils, "CACHE_ROOT", tmp_path.joinpath("cache"))
+    yield tmp_path.joinpath("cache")
+    fill_defaults.set_defaults_schema(None)
+    resolvers.clear_resolver_cache()
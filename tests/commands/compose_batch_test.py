@@ -0,0 +1,161 @@
+import argparse
+import json
+import sqlite3
+
+import pytest
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.commands import compose_batch, compose_config
+
+OVERRIDES_FILE = """# The encoder sizes
+model=simple_tagger model.encoder.hidden_size=3
+["model=simple_tagger", "model.encoder.hidden_size=5"]
+
+{"name": "missing_model", "overrides": ["model=missing"]}
+"""
+
+
+class TestComposeBatchCommand(BaseTestCase):
+    """
+    Tests for the compose-batch command.
+    """
+
+    @pytest.fixture()
+    def overrides_file(self):
+        overrides_path = self.TEST_DIR.joinpath("overrides.txt")
+        overrides_path.write_text(OVERRIDES_FILE, "utf-8")
+        yield overrides_path
+
+    def get_expected(self, hidden_size):
+        return compose_config.compose_config(
+            config_path=self.FIXTURES_ROOT.joinpath("conf"),
+            config_name="simple_config",
+            job_name="test_compose_batch",
+            config_overrides=["model=simple_tagger", f"model.encoder.hidden_size={hidden_size}"],
+        )
+
+    def run_command(self, overrides_file, *output_args):
+        parser = argparse.ArgumentParser(description="Testing")
+        subparsers = parser.add_subparsers(title="Commands", metavar="")
+        compose_batch.ComposeBatch().add_subparser(subparsers)
+
+        args = parser.parse_args(
+            [
+                "compose-batch",
+                str(self.FIXTURES_ROOT.joinpath("conf")),
+                "simple_config",
+                "test_compose_batch",
+                str(overrides_file),
+                *output_args,
+            ]
+        )
+        assert args.func == compose_batch.compose_batch_from_args
+        return args.func(args)
+
+    def test_read_batch_items(self, overrides_file):
+        assert compose_batch.read_batch_items(overrides_file, "simple_config") == [
+            compose_batch.BatchItem(
+                "simple_config_0", ["model=simple_tagger", "model.encoder.hidden_size=3"]
+            ),
+            compose_batch.BatchItem(
+                "simple_config_1", ["model=simple_tagger", "model.encoder.hidden_size=5"]
+            ),
+            compose_batch.BatchItem("missing_model", ["model=missing"]),
+        ]
+
+        overrides_file.write_text('["a=1"]\n{"overrides": "a=1"}\n', "utf-8")
+        with pytest.raises(ValueError, match="Line 2"):
+            compose_batch.read_batch_items(overrides_file, "simple_config")
+
+        overrides_file.write_text('{"name": "a"}\n{"name": "a"}\n', "utf-8")
+        with pytest.raises(ValueError, match="More than one"):
+            compose_batch.read_batch_items(overrides_file, "simple_config")
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_serialization_dir(self, overrides_file, workers):
+        output_dir = self.TEST_DIR.joinpath("configs")
+        results = self.run_command(overrides_file, "-s", str(output_dir), "-w", str(workers))
+
+        assert [result.name for result in results] == [
+            "simple_config_0",
+            "simple_config_1",
+            "missing_model",
+        ]
+        assert [result.error is None for result in results] == [True, True, False]
+
+        for name, hidden_size in [("simple_config_0", 3), ("simple_config_1", 5)]:
+            saved = json.loads(output_dir.joinpath(f"{name}.json").read_text("utf-8"))
+            assert saved == self.get_expected(hidden_size)
+        assert not output_dir.joinpath("missing_model.json").exists()
+
+        errors = [
+            json.loads(line)
+            for line in output_dir.joinpath("errors.jsonl").read_text("utf-8").splitlines()
+        ]
+        assert [error["name"] for error in errors] == ["missing_model"]
+        assert "model/missing" in errors[0]["error"]
+
+    def test_jsonl_output(self, overrides_file):
+        output_file = self.TEST_DIR.joinpath("configs.jsonl")
+        self.run_command(overrides_file, "--output-file", str(output_file))
+
+        lines = [json.loads(line) for line in output_file.read_text("utf-8").splitlines()]
+        assert [line["name"] for line in lines] == [
+            "simple_config_0",
+            "simple_config_1",
+            "missing_model",
+        ]
+        assert lines[0]["config"] == self.get_expected(3)
+        assert lines[1]["config"] == self.get_expected(5)
+        assert "config" not in lines[2]
+        assert "model/missing" in lines[2]["error"]
+
+    def test_sqlite_output(self, overrides_file):
+        output_file = self.TEST_DIR.joinpath("configs.db")
+        self.run_command(overrides_file, "--output-file", str(output_file), "-w", "2")
+
+        connection = sqlite3.connect(str(output_file))
+        try:
+            rows = connection.execute(
+                "SELECT name, overrides, config, error FROM configs ORDER BY name"
+            ).fetchall()
+        finally:
+            connection.close()
+
+        assert [row[0] for row in rows] == [
+            "missing_model",
+            "simple_config_0",
+            "simple_config_1",
+        ]
+        assert json.loads(rows[0][1]) == ["model=missing"]
+        assert rows[0][2] is None
+        assert "model/missing" in rows[0][3]
+        assert json.loads(rows[1][2]) == self.get_expected(3)
+        assert rows[1][3] is None
+
+    def test_invalid_arguments(self, overrides_file):
+        with pytest.raises(ValueError):
+            compose_batch.compose_batch(
+                self.FIXTURES_ROOT.joinpath("conf"), "simple_config", "test", [], num_workers=0
+            )
+        with pytest.raises(ValueError):
+            compose_batch.compose_batch(
+                self.TEST_DIR.joinpath("missing"), "simple_config", "test", []
+            )
+        with pytest.raises(ValueError):
+            compose_batch.write_batch_results([])
+
+    def test_schema_loaded_without_workers(self, monkeypatch):
+        from allennlp_hydra.config import defaults_schema
+
+        loaded = []
+        monkeypatch.setattr(defaults_schema, "load_defaults_schema", loaded.append)
+        compose_batch.compose_batch(
+            self.FIXTURES_ROOT.joinpath("conf"),
+            "simple_config",
+            "test",
+            [],
+            fill_defaults=True,
+            include_package=["allennlp_hydra"],
+        )
+        assert loaded == [["allennlp_hydra"]]
@@ -1,14 +1,25 @@
 import argparse
 from copy import deepcopy
 import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+from unittest.mock import patch
+
 import pytest
 
 from allennlp.data import DataLoader, DatasetReader
 from allennlp.training import Trainer
 from allennlp.models import Model
+from hydra.types import RunMode
 
 from allennlp_hydra.utils.testing import BaseTestCase
 from allennlp_hydra.commands import compose_config
+from allennlp_hydra.config import compose
+from allennlp_hydra.config.compose_cache import ComposeCache
+from allennlp_hydra.config.config_formats import get_config_file_name, load_config
 from allennlp_hydra.config.fill_defaults import fill_config_with_default_values
 
 
@@ -109,6 +120,154 @@ class TestComposeCommand(BaseTestCase):
         assert args.serialization_dir == "serialization_dir"
         assert args.overrides == expected_overrides
 
+    @pytest.mark.parametrize("output_file", [True, False], ids=["file", "print"])
+    def test_fill_defaults_stats(self, capsys, output_file):
+        parser = argparse.ArgumentParser(description="Testing")
+        subparsers = parser.add_subparsers(title="Commands", metavar="")
+        compose_config.ComposeConfig().add_subparser(subparsers)
+
+        raw_args = [
+            "compose",
+            str(self.FIXTURES_ROOT.joinpath("conf")),
+            "simple_config",
+            "test_fill_defaults_stats",
+            "-s",
+            str(self.TEST_DIR),
+            "--fill-defaults",
+            "--fill-defaults-stats",
+        ]
+        stats_path = self.TEST_DIR.joinpath("stats.json")
+        if output_file:
+            raw_args.append(str(stats_path))
+
+        args = parser.parse_args(raw_args)
+        args.func(args)
+
+        if output_file:
+            stats = json.loads(stats_path.read_text("utf-8"))
+        else:
+            stats = json.loads(capsys.readouterr().out)
+        assert stats["classes_visited"]
+        assert stats["total_seconds"] > 0
+
+    @pytest.mark.parametrize("output_format", ["compact-json", "pickle", "yaml"])
+    def test_output_format(self, simple_config, output_format):
+        result = compose_config.compose_config(
+            config_path=str(self.FIXTURES_ROOT.joinpath("conf")),
+            config_name="simple_config",
+            serialization_dir=str(self.TEST_DIR),
+            job_name="test_output_format",
+            output_format=output_format,
+        )
+
+        output_config = self.TEST_DIR.joinpath(
+            get_config_file_name("simple_config", output_format)
+        )
+        assert load_config(output_config) == result == simple_config
+
+    def test_simple_config_prune_defaults(self, simple_config):
+        """
+        Test that the pruned config fills to the same config.
+        """
+        kwargs = dict(
+            config_path=str(self.FIXTURES_ROOT.joinpath("conf")),
+            config_name="simple_config",
+            job_name="test_simple_config",
+        )
+        filled = compose_config.compose_config(fill_defaults=True, **kwargs)
+        pruned = compose_config.compose_config(prune_defaults=True, **kwargs)
+
+        for section, base_class in compose_config.FILLED_SECTIONS.items():
+            assert fill_config_with_default_values(
+                base_class, pruned[section]
+            ) == filled[section]
+
+        with pytest.raises(ValueError):
+            compose_config.compose_config(
+                fill_defaults=True, prune_defaults=True, **kwargs
+            )
+
+    def test_compose_cache(self, simple_config):
+        config_dir = self.TEST_DIR.joinpath("conf")
+        shutil.copytree(self.FIXTURES_ROOT.joinpath("conf"), config_dir)
+        compose_cache = ComposeCache(self.TEST_DIR.joinpath("cache"))
+        kwargs = dict(
+            config_path=str(config_dir),
+            config_name="simple_config",
+            job_name="test_compose_cache",
+            compose_cache=compose_cache,
+        )
+
+        result = compose_config.compose_config(**kwargs)
+        assert result == simple_config
+
+        # A hit does not use Hydra.
+        with patch.object(compose, "_compose_with_hydra", side_effect=AssertionError):
+            assert compose_config.compose_config(**kwargs) == simple_config
+
+        # Changing a yaml file in the defaults list composes it again.
+        reader_config = config_dir.joinpath("dataset_reader", "sequence_tagging.yaml")
+        reader_config.write_text(
+            reader_config.read_text("utf-8").replace("type: sequence_tagging", "type: changed"),
+            "utf-8",
+        )
+        assert compose_config.compose_config(**kwargs)["dataset_reader"]["type"] == "changed"
+
+    def test_compose_session(self, simple_config):
+        config_dir = self.TEST_DIR.joinpath("conf")
+        shutil.copytree(self.FIXTURES_ROOT.joinpath("conf"), config_dir)
+        session = compose_config.ComposeSession(config_dir, job_name="test_session")
+        overrides = [
+            'dataset_reader.word_tag_delimiter="__"',
+            "trainer/learning_rate_scheduler=polynomial_decay",
+            "~trainer.grad_norm",
+        ]
+
+        # Composing with the session gives the same configs, also when the
+        # loaded yaml files are reused.
+        for _ in range(2):
+            assert session.compose("simple_config") == simple_config
+            assert session.compose("simple_config", overrides) == (
+                compose_config.compose_config(
+                    config_dir, "simple_config", "test_session", config_overrides=overrides
+                )
+            )
+        assert session.compose("simple_config", fill_defaults=True) == (
+            compose_config.compose_config(
+                config_dir, "simple_config", "test_session", fill_defaults=True
+            )
+        )
+
+        reader_config = config_dir.joinpath("dataset_reader", "sequence_tagging.yaml")
+        reader_config.write_text(
+            reader_config.read_text("utf-8").replace("type: sequence_tagging", "type: changed"),
+            "utf-8",
+        )
+        assert session.compose("simple_config") == simple_config
+        session.clear_cache()
+        assert session.compose("simple_config")["dataset_reader"]["type"] == "changed"
+
+        with pytest.raises(ValueError):
+            compose_config.ComposeSession(config_dir.joinpath("missing"))
+
+    @pytest.mark.parametrize(
+        "job_name", ["a,b", "exp=1", "my job", "it's \"quoted\"", "back\\slash\\'\\"]
+    )
+    def test_job_name_grammar(self, simple_config, job_name):
+        config_dir = self.FIXTURES_ROOT.joinpath("conf")
+        assert compose_config.compose_config(config_dir, "simple_config", job_name) == (
+            simple_config
+        )
+
+        session = compose_config.ComposeSession(config_dir, job_name=job_name)
+        cfg = session._config_loader.load_configuration(
+            config_name="simple_config",
+            overrides=[compose._get_job_name_override(job_name)],
+            run_mode=RunMode.RUN,
+            from_shell=False,
+        )
+        assert cfg.hydra.job.name == job_name
+
     def test_simple_config_fill_defaults(self, simple_config):
         """
         Test creating a simple config with compose that fills the default
@@ -151,3 +310,204 @@ class TestComposeCommand(BaseTestCase):
         assert saved_config == result
 
         assert result == simple_config
+
+    def test_multirun(self):
+        parser = argparse.ArgumentParser(description="Testing")
+        subparsers = parser.add_subparsers(title="Commands", metavar="")
+        compose_config.ComposeConfig().add_subparser(subparsers)
+
+        output_dir = self.TEST_DIR.joinpath("sweep")
+        output_dir.mkdir()
+        overrides = [
+            "model=glob(*)",
+            "dataset_reader.word_tag_delimiter=_,__",
+            "trainer.num_epochs=range(1,3)",
+        ]
+        args = parser.parse_args(
+            [
+                "compose",
+                str(self.FIXTURES_ROOT.joinpath("conf")),
+                "simple_config",
+                "test_multirun",
+                "-s",
+                str(output_dir),
+                "--multirun",
+                "-o",
+                *overrides,
+            ]
+        )
+        results = args.func(args)
+
+        session = compose_config.ComposeSession(self.FIXTURES_ROOT.joinpath("conf"))
+        sweep = session.sweep(overrides)
+        assert len(sweep) == 8
+        assert [result.name for result in results] == [
+            f"simple_config_{index}" for index in range(8)
+        ]
+        for index, point_overrides in enumerate(sweep):
+            saved = json.loads(
+                output_dir.joinpath(f"simple_config_{index}.json").read_text("utf-8")
+            )
+            assert saved == session.compose("simple_config", point_overrides)
+
+        # Only the sampled points of the shard are composed.
+        shard_dir = self.TEST_DIR.joinpath("shard")
+        shard_dir.mkdir()
+        args = parser.parse_args(
+            [
+                "compose",
+                str(self.FIXTURES_ROOT.joinpath("conf")),
+                "simple_config",
+                "test_multirun",
+                "-s",
+                str(shard_dir),
+                "-m",
+                "--shard",
+                "1",
+                "2",
+                "--sample",
+                "2",
+                "--sample-seed",
+                "0",
+                "-o",
+                *overrides,
+            ]
+        )
+        results = args.func(args)
+        assert len(results) == 2
+        assert all(int(result.name.split("_")[-1]) % 2 == 1 for result in results)
+        assert len(list(shard_dir.iterdir())) == 2
+
+    def test_watch_config(self, simple_config):
+        config_dir = self.TEST_DIR.joinpath("conf")
+        shutil.copytree(self.FIXTURES_ROOT.joinpath("conf"), config_dir)
+        output_path = self.TEST_DIR.joinpath("simple_config.json")
+
+        updates = compose_config.watch_config(
+            config_dir,
+            "simple_config",
+            "test_watch",
+            serialization_dir=self.TEST_DIR,
+            poll_interval=0.01,
+        )
+        assert next(updates) == simple_config
+        assert json.loads(output_path.read_text("utf-8")) == simple_config
+
+        # Files that are not in the defaults list are not watched, so the
+        # next update is from the change to the dataset reader.
+        config_dir.joinpath("model", "simple_tagger.yaml").write_text("type: changed\n")
+        reader_config = config_dir.joinpath("dataset_reader", "sequence_tagging.yaml")
+        reader_config.write_text(
+            reader_config.read_text("utf-8").replace("type: sequence_tagging", "type: changed"),
+            "utf-8",
+        )
+        expected = deepcopy(simple_config)
+        expected["dataset_reader"]["type"] = "changed"
+        assert next(updates) == expected
+        assert json.loads(output_path.read_text("utf-8")) == expected
+
+    def test_watch_config_error(self, caplog):
+        config_dir = self.TEST_DIR.joinpath("conf")
+        shutil.copytree(self.FIXTURES_ROOT.joinpath("conf"), config_dir)
+        reader_config = config_dir.joinpath("dataset_reader", "sequence_tagging.yaml")
+        reader_config.write_text("type: [unclosed\n", "utf-8")
+
+        updates = compose_config.watch_config(
+            config_dir,
+            "simple_config",
+            "test_watch",
+            serialization_dir=self.TEST_DIR,
+            poll_interval=0.01,
+        )
+
+        # The config cannot be composed, so every yaml file is watched until
+        # it is fixed.
+        fix_timer = threading.Timer(
+            0.2, reader_config.write_text, args=("type: fixed\n", "utf-8")
+        )
+        fix_timer.start()
+        try:
+            assert next(updates)["dataset_reader"] == {"type": "fixed"}
+        finally:
+            fix_timer.cancel()
+        assert "Could not compose 'simple_config'" in caplog.text
+
+    def test_watch_multirun(self):
+        args = argparse.Namespace(multirun=True, watch=True)
+        with pytest.raises(ValueError):
+            compose_config.compose_config_from_args(args)
+
+    def _parse_args(self, *raw_args):
+        parser = argparse.ArgumentParser(description="Testing")
+        subparsers = parser.add_subparsers(title="Commands", metavar="")
+        compose_config.ComposeConfig().add_subparser(subparsers)
+        return parser.parse_args(["compose", str(self.FIXTURES_ROOT.joinpath("conf")), *raw_args])
+
+    def test_list(self, capsys):
+        args = self._parse_args("--list")
+        options = args.func(args)
+        assert options[""] == ["simple_config", "simple_tagger"]
+        assert options["model"] == ["basic_classifier", "simple_tagger"]
+        assert "model: basic_classifier, simple_tagger" in capsys.readouterr().out
+
+        args = self._parse_args("--list", "trainer/learning_rate_scheduler")
+        assert args.func(args) == {"trainer/learning_rate_scheduler": ["noam", "polynomial_decay"]}
+        assert capsys.readouterr().out.split() == ["noam", "polynomial_decay"]
+
+    def test_check(self, capsys):
+        args = self._parse_args(
+            "simple_config", "test", "--check", "-o", "model=simple_tagger"
+        )
+        assert args.func(args) is None
+        assert "The overrides can be composed" in capsys.readouterr().out
+        assert not self.TEST_DIR.joinpath("simple_config.json").exists()
+
+    def test_check_typos(self, caplog):
+        args = self._parse_args("simple_config", "test", "--check", "-o", "model=simple_tager")
+        with pytest.raises(ValueError, match="did you mean 'simple_tagger'"):
+            args.func(args)
+
+        # Without `--check`, the typo is only a warning and Hydra fails.
+        args = self._parse_args(
+            "simple_config", "test", "-s", str(self.TEST_DIR), "-o", "model=simple_tager"
+        )
+        with pytest.raises(Exception):
+            args.func(args)
+        assert "did you mean 'simple_tagger'" in caplog.text
+        assert not self.TEST_DIR.joinpath("simple_config.json").exists()
+
+    @pytest.mark.parametrize(
+        "script",
+        [
+            # Registering the commands does not import Hydra.
+            'import allennlp_hydra.commands\nassert "hydra" not in sys.modules',
+            # Composing without filling the defaults does not import torch.
+            "from allennlp_hydra.config.compose import compose_config\n"
+            "compose_config(sys.argv[1], 'simple_config', 'test')\n"
+            'assert "torch" not in sys.modules',
+            # The compose command only loads the defaults schema to fill them.
+            "import argparse, tempfile\n"
+            "from allennlp_hydra.commands.compose_config import ComposeConfig\n"
+            "parser = argparse.ArgumentParser()\n"
+            "ComposeConfig().add_subparser(parser.add_subparsers())\n"
+            "args = parser.parse_args(\n"
+            "    ['compose', sys.argv[1], 'simple_config', 'test', '-s', tempfile.mkdtemp()]\n"
+            ")\n"
+            "args.func(args)\n"
+            'assert "allennlp_hydra.config.defaults_schema" not in sys.modules',
+        ],
+        ids=["register", "compose", "compose-command"],
+    )
+    def test_lazy_imports(self, script):
+        # Run in a new process, because the other tests import everything.
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [str(self.PROJECT_ROOT), *filter(None, [env.get("PYTHONPATH")])]
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", f"import sys\n{script}", str(self.FIXTURES_ROOT.joinpath("conf"))],
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, result.stderr
@@ -0,0 +1,33 @@
+import argparse
+import json
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.commands import config_diff
+from allennlp_hydra.config.config_formats import save_config
+
+
+class TestConfigDiffCommand(BaseTestCase):
+    """
+    Tests for the config-diff command.
+    """
+
+    def test_cli_args(self, capsys):
+        for index in range(2):
+            save_config(
+                {"model": {"dim": index}, "seed": 1},
+                self.TEST_DIR.joinpath(f"config_{index}.json"),
+            )
+
+        parser = argparse.ArgumentParser(description="Testing")
+        subparsers = parser.add_subparsers(title="Commands", metavar="")
+        config_diff.DiffConfigs().add_subparser(subparsers)
+
+        args = parser.parse_args(["config-diff", str(self.TEST_DIR), "--json"])
+        assert args.func == config_diff.config_diff_from_args
+
+        diff = args.func(args)
+        assert diff.varying_keys == ["model.dim"]
+        assert json.loads(capsys.readouterr().out) == {
+            "varying_keys": ["model.dim"],
+            "configs": {"config_0": {"model.dim": 0}, "config_1": {"model.dim": 1}},
+        }
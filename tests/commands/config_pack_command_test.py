@@ -0,0 +1,39 @@
+import argparse
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.commands import config_pack
+from allennlp_hydra.config.compose import compose_config
+
+
+class TestConfigPackCommand(BaseTestCase):
+    """
+    Tests for the config-pack command.
+    """
+
+    def test_cli_args(self):
+        config_dir = self.FIXTURES_ROOT.joinpath("conf")
+        pack_path = self.TEST_DIR.joinpath("conf.pack")
+
+        parser = argparse.ArgumentParser(description="Testing")
+        subparsers = parser.add_subparsers(title="Commands", metavar="")
+        config_pack.PackConfigs().add_subparser(subparsers)
+
+        args = parser.parse_args(["config-pack", str(config_dir), str(pack_path)])
+        assert args.func == config_pack.config_pack_from_args
+        assert args.func(args) == 11
+
+        assert compose_config(pack_path, "simple_config", "test") == compose_config(
+            config_dir, "simple_config", "test"
+        )
+
+    def test_pack_suffix(self):
+        args = argparse.Namespace(
+            config_path=str(self.FIXTURES_ROOT.joinpath("conf")),
+            pack_path=str(self.TEST_DIR.joinpath("conf.db")),
+        )
+        try:
+            config_pack.config_pack_from_args(args)
+        except ValueError as e:
+            assert ".pack" in str(e)
+        else:
+            raise AssertionError("The suffix of the pack was not checked")
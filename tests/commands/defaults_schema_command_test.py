@@ -0,0 +1,41 @@
+import argparse
+
+import pytest
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.commands import defaults_schema
+from allennlp_hydra.config.defaults_schema import DefaultsSchema
+
+
+class TestDefaultsSchemaCommand(BaseTestCase):
+    """
+    Tests for the defaults-schema command.
+    """
+
+    @pytest.mark.parametrize("output_arg", ["-o", "--output-file", None])
+    def test_cli_args(self, output_arg):
+        parser = argparse.ArgumentParser(description="Testing")
+        subparsers = parser.add_subparsers(title="Commands", metavar="")
+        defaults_schema.BuildDefaultsSchema().add_subparser(subparsers)
+
+        raw_args = ["defaults-schema", "--force"]
+        if output_arg is not None:
+            raw_args.extend([output_arg, "schema.json"])
+
+        args = parser.parse_args(raw_args)
+
+        assert args.func == defaults_schema.build_defaults_schema_from_args
+        assert args.output_file == ("schema.json" if output_arg else None)
+        assert args.force
+
+    def test_output_file(self):
+        args = argparse.Namespace(
+            output_file=str(self.TEST_DIR.joinpath("schema.json")),
+            force=False,
+            include_package=[],
+        )
+        schema = defaults_schema.build_defaults_schema_from_args(args)
+
+        loaded = DefaultsSchema.from_file(self.TEST_DIR.joinpath("schema.json"))
+        assert loaded.classes == schema.classes
+        assert len(loaded) > 0
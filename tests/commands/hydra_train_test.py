@@ -7,9 +7,11 @@ from unittest.mock import patch
 import pytest
 from allennlp.common import Params
 from allennlp.commands.train import train_model
+from omegaconf import OmegaConf
 
 from allennlp_hydra.utils.testing import BaseTestCase, assert_models_weights_equal
-from allennlp_hydra.commands import hydra_train
+from allennlp_hydra.commands import compose_config, hydra_train
+from allennlp_hydra.config.config_formats import save_config
 
 
 class TestHydraTrainCommand(BaseTestCase):
@@ -53,6 +55,84 @@ class TestHydraTrainCommand(BaseTestCase):
             assert isinstance(params, Params)
             assert params.params == expected
 
+    def test_mock_call_fill_defaults(self, train_args):
+        train_args.fill_defaults = True
+
+        expected = compose_config.compose_config(
+            config_path=train_args.config_path,
+            config_name=train_args.config_name,
+            job_name=train_args.job_name,
+            fill_defaults=True,
+        )
+
+        with patch("allennlp_hydra.commands.hydra_train.train_model") as mock_train:
+            hydra_train.hydra_train_model_from_args(train_args)
+            assert mock_train.call_count == 1
+
+            params = mock_train.call_args.kwargs["params"]
+            assert isinstance(params, Params)
+            assert params.params == expected
+
+    def test_mock_call_configs_in_memory(self, simple_config, train_args):
+        config_dir = train_args.config_path
+        train_args.config_path = None
+        train_args.config_name = "simple_config"
+        train_args.configs = {
+            str(yaml_path.relative_to(config_dir).with_suffix("")): OmegaConf.load(yaml_path)
+            for yaml_path in config_dir.rglob("*.yaml")
+        }
+
+        with patch("allennlp_hydra.commands.hydra_train.train_model") as mock_train:
+            hydra_train.hydra_train_model_from_args(train_args)
+            assert mock_train.call_count == 1
+            assert mock_train.call_args.kwargs["params"].params == simple_config
+
+    def test_mock_call_saved_config(self, simple_config, train_args):
+        saved_config_path = self.TEST_DIR.joinpath("simple_config.pkl")
+        save_config(simple_config, saved_config_path, "pickle")
+        train_args.config_path = str(saved_config_path)
+        train_args.config_name = None
+        train_args.job_name = None
+
+        with patch("allennlp_hydra.commands.hydra_train.train_model") as mock_train:
+            hydra_train.hydra_train_model_from_args(train_args)
+            assert mock_train.call_count == 1
+            assert mock_train.call_args.kwargs["params"].params == simple_config
+
+        train_args.overrides = ["+trainer.grad_clipping=1.0"]
+        with pytest.raises(ValueError):
+            hydra_train.hydra_train_model_from_args(train_args)
+
+    def test_mock_call_multirun(self, train_args):
+        train_args.multirun = True
+        train_args.shard = None
+        train_args.sample = None
+        train_args.sample_seed = None
+        train_args.overrides = [
+            "trainer.num_epochs=1,2",
+            "dataset_reader.word_tag_delimiter=_,__",
+        ]
+
+        with patch("allennlp_hydra.commands.hydra_train.train_model") as mock_train:
+            hydra_train.hydra_train_model_from_args(train_args)
+            assert mock_train.call_count == 4
+
+            for index, call in enumerate(mock_train.call_args_list):
+                epochs, delimiter = divmod(index, 2)
+                expected = compose_config.compose_config(
+                    config_path=train_args.config_path,
+                    config_name=train_args.config_name,
+                    job_name=train_args.job_name,
+                    config_overrides=[
+                        f"trainer.num_epochs={epochs + 1}",
+                        f"dataset_reader.word_tag_delimiter={'_' * (delimiter + 1)}",
+                    ],
+                )
+                assert call.kwargs["params"].params == expected
+                assert call.kwargs["serialization_dir"] == str(
+                    train_args.serialization_dir.joinpath(str(index))
+                )
+
     def test_call_with_args(self, simple_tagger_config, train_args):
         if os.getcwd() != str(self.PROJECT_ROOT.absolute()):
             os.chdir(self.PROJECT_ROOT)
@@ -0,0 +1,122 @@
+import shutil
+
+import pytest
+from filelock import FileLock
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config.compose import compose_config
+from allennlp_hydra.config.compose_cache import ComposeCache, get_resolver_names
+
+
+class TestComposeCache(BaseTestCase):
+    """
+    Tests for `allennlp_hydra.config.compose_cache`.
+    """
+
+    @pytest.fixture()
+    def config_dir(self):
+        config_dir = self.TEST_DIR.joinpath("conf")
+        shutil.copytree(self.FIXTURES_ROOT.joinpath("conf"), config_dir)
+        yield config_dir
+
+    @pytest.fixture()
+    def cache(self):
+        yield ComposeCache(self.TEST_DIR.joinpath("cache"))
+
+    def test_put_get(self, cache, config_dir):
+        key = cache.get_key(config_dir, "simple_config", ["model=simple_tagger"])
+        assert cache.get(key) is None
+
+        cache.put(
+            key,
+            {"model": {"type": "simple_tagger"}},
+            config_dir,
+            ["simple_config", "model/simple_tagger", "hydra/config"],
+        )
+        assert cache.get(key) == {"model": {"type": "simple_tagger"}}
+
+    def test_absent_dependency_created(self, cache, config_dir):
+        key = cache.get_key(config_dir, "simple_config", [])
+        cache.put(key, {"a": 1}, config_dir, ["simple_config", "model/optional"])
+        assert cache.get(key) == {"a": 1}
+
+        # The config was not in the config dir when the entry was stored.
+        config_dir.joinpath("model", "optional.yaml").write_text("dropout: 0.1\n")
+        assert cache.get(key) is None
+
+    def test_compose_optional_default_created(self, cache, config_dir):
+        config_dir.joinpath("optional_config.yaml").write_text(
+            "defaults:\n  - simple_config\n  - optional extra: a\n  - _self_\n"
+        )
+        assert compose_config(
+            config_dir, "optional_config", "test", compose_cache=cache
+        ) == compose_config(config_dir, "optional_config", "test")
+
+        config_dir.joinpath("extra").mkdir()
+        config_dir.joinpath("extra", "a.yaml").write_text("size: 2\n")
+        assert compose_config(config_dir, "optional_config", "test", compose_cache=cache)[
+            "extra"
+        ] == {"size": 2}
+
+    def test_uncacheable_resolvers(self, cache, config_dir, monkeypatch):
+        monkeypatch.setenv("COMPOSE_CACHE_TEST", "a")
+        overrides = ["+env=${oc.env:COMPOSE_CACHE_TEST}"]
+        cfg = compose_config(
+            config_dir, "simple_config", "test", config_overrides=overrides, compose_cache=cache
+        )
+        assert cfg["env"] == "a"
+        assert list(cache.cache_dir.rglob("*.json")) == []
+
+        monkeypatch.setenv("COMPOSE_CACHE_TEST", "b")
+        cfg = compose_config(
+            config_dir, "simple_config", "test", config_overrides=overrides, compose_cache=cache
+        )
+        assert cfg["env"] == "b"
+
+        # Only resolvers whose value depends on the config are cached.
+        overrides = ["+decoded=${oc.decode:'1'}"]
+        compose_config(
+            config_dir, "simple_config", "test", config_overrides=overrides, compose_cache=cache
+        )
+        assert len(list(cache.cache_dir.rglob("*.json"))) == 1
+
+    def test_get_resolver_names(self):
+        config = {"a": "${oc.env:A}", "b": ["${now:%H} ${ oc.decode :${c}}", 1], "${x:y}": None}
+        assert get_resolver_names(config) == {"oc.env", "now", "oc.decode", "x"}
+        assert get_resolver_names({"a": "${b}", "c": "d"}) == set()
+
+    def test_dependency_changed(self, cache, config_dir):
+        key = cache.get_key(config_dir, "simple_config", [])
+        cache.put(key, {"a": 1}, config_dir, ["simple_config", "model/basic_classifier"])
+
+        model_config = config_dir.joinpath("model", "basic_classifier.yaml")
+        model_config.write_text(model_config.read_text("utf-8") + "\n# Changed\n")
+        assert cache.get(key) is None
+
+        cache.put(key, {"a": 2}, config_dir, ["simple_config", "model/basic_classifier"])
+        assert cache.get(key) == {"a": 2}
+
+        model_config.unlink()
+        assert cache.get(key) is None
+
+    def test_get_key(self, cache, config_dir):
+        key = cache.get_key(config_dir, "simple_config", ["a=1"])
+        assert key == cache.get_key(config_dir, "simple_config", ["a=1"])
+        assert key != cache.get_key(config_dir, "simple_config", ["a=2"])
+        assert key != cache.get_key(config_dir, "simple_config", ["a=1", "b=2"])
+        assert key != cache.get_key(config_dir, "simple_tagger", ["a=1"])
+        assert key != cache.get_key(config_dir, "simple_config", ["a=1"], fill_defaults=True)
+        assert key != cache.get_key(config_dir, "simple_config", ["a=1"], prune_defaults=True)
+
+    def test_invalid_entry(self, cache, config_dir):
+        key = cache.get_key(config_dir, "simple_config", [])
+        cache.put(key, {"a": 1}, config_dir, [])
+        cache.get_entry_path(key).write_text("{not json", "utf-8")
+        assert cache.get(key) is None
+
+    def test_lock(self, cache, config_dir):
+        key = cache.get_key(config_dir, "simple_config", [])
+        with cache.lock(key):
+            other_lock = FileLock(str(cache.get_entry_path(key)) + ".lock", timeout=0)
+            with pytest.raises(TimeoutError):
+                other_lock.acquire()
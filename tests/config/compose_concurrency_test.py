@@ -0,0 +1,91 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import json
+
+import hydra
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config.compose import ComposeSession, compose_config, compose_config_async
+
+NUM_THREADS = 8
+
+VARIANTS = [
+    [
+        f"model={model}",
+        f"trainer.num_epochs={index}",
+        f"trainer/learning_rate_scheduler={scheduler}",
+    ]
+    for index in range(2)
+    for model in ["basic_classifier", "simple_tagger"]
+    for scheduler in ["noam", "polynomial_decay"]
+]
+
+
+class TestComposeConcurrency(BaseTestCase):
+    """
+    Tests for composing configs from many threads at once.
+    """
+
+    def get_expected(self):
+        session = ComposeSession(self.FIXTURES_ROOT.joinpath("conf"), job_name="test")
+        return [
+            json.dumps(session.compose("simple_config", overrides)) for overrides in VARIANTS
+        ]
+
+    def test_compose_config_from_threads(self):
+        def compose(overrides):
+            return json.dumps(
+                compose_config(
+                    self.FIXTURES_ROOT.joinpath("conf"),
+                    "simple_config",
+                    "test",
+                    config_overrides=overrides,
+                )
+            )
+
+        with ThreadPoolExecutor(NUM_THREADS) as executor:
+            results = list(executor.map(compose, VARIANTS * 2))
+        assert results == self.get_expected() * 2
+
+    def test_shared_session_from_threads(self):
+        session = ComposeSession(self.FIXTURES_ROOT.joinpath("conf"), job_name="test")
+        with ThreadPoolExecutor(NUM_THREADS) as executor:
+            results = list(
+                executor.map(
+                    lambda overrides: json.dumps(session.compose("simple_config", overrides)),
+                    VARIANTS * 4,
+                )
+            )
+        assert results == self.get_expected() * 4
+
+    def test_compose_async(self):
+        session = ComposeSession(self.FIXTURES_ROOT.joinpath("conf"), job_name="test")
+
+        async def compose_all():
+            return await asyncio.gather(
+                *(session.compose_async("simple_config", overrides) for overrides in VARIANTS),
+                compose_config_async(
+                    self.FIXTURES_ROOT.joinpath("conf"),
+                    "simple_config",
+                    "test",
+                    config_overrides=VARIANTS[0],
+                ),
+            )
+
+        results = [json.dumps(cfg) for cfg in asyncio.run(compose_all())]
+        expected = self.get_expected()
+        assert results == [*expected, expected[0]]
+
+    def test_inside_hydra(self):
+        # Hydra's global state is not used, so configs can be composed inside
+        # of an initialized Hydra.
+        with hydra.initialize_config_dir(
+            config_dir=str(self.FIXTURES_ROOT.joinpath("conf")), job_name="other"
+        ):
+            cfg = compose_config(
+                self.FIXTURES_ROOT.joinpath("conf"),
+                "simple_config",
+                "test",
+                config_overrides=VARIANTS[0],
+            )
+        assert json.dumps(cfg) == self.get_expected()[0]
@@ -0,0 +1,84 @@
+import json
+import sqlite3
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config import config_diff
+from allennlp_hydra.config.config_diff import MISSING
+from allennlp_hydra.config.config_formats import save_config
+
+
+class TestConfigDiff(BaseTestCase):
+    """
+    Tests for `allennlp_hydra.config.config_diff`.
+    """
+
+    def test_iter_leaves(self):
+        config = {"a": {"b": 1, "c": [2, {"d": 3}]}, "e": {}, "f": []}
+        assert dict(config_diff.iter_leaves(config)) == {
+            "a.b": 1,
+            "a.c.0": 2,
+            "a.c.1.d": 3,
+            "e": {},
+            "f": [],
+        }
+
+    def test_diff_configs(self):
+        diff = config_diff.diff_configs(
+            {
+                "0": {"model": {"dim": 1, "layers": [1, 2]}, "lr": 0.1, "seed": 1},
+                "1": {"model": {"dim": 2, "layers": [1, 2]}, "lr": 0.1, "seed": 1},
+                "2": {"model": {"dim": 1, "layers": [1]}, "lr": 0.1, "seed": True},
+            }
+        )
+        assert diff.names == ["0", "1", "2"]
+        assert diff.varying_keys == ["model.dim", "model.layers.1", "seed"]
+        assert diff.values == [
+            {"model.dim": 1, "model.layers.1": 2, "seed": 1},
+            {"model.dim": 2, "model.layers.1": 2, "seed": 1},
+            {"model.dim": 1, "model.layers.1": MISSING, "seed": True},
+        ]
+        assert diff.to_json()["configs"]["2"] == {"model.dim": 1, "seed": True}
+
+        table = config_diff.format_diff_table(diff).splitlines()
+        assert table[0].split() == ["name", "model.dim", "model.layers.1", "seed"]
+        assert table[3].split() == ["2", "1", "-", "true"]
+
+        assert config_diff.diff_configs([("a", {"x": 1}), ("b", {"x": 1})]).varying_keys == []
+
+    def test_load_configs(self):
+        sweep_dir = self.TEST_DIR.joinpath("sweep")
+        for index in range(2):
+            sweep_dir.joinpath(str(index)).mkdir(parents=True)
+            save_config({"lr": index}, sweep_dir.joinpath(str(index), "config.json"))
+
+        composed_dir = self.TEST_DIR.joinpath("composed")
+        composed_dir.mkdir()
+        save_config({"lr": 2}, composed_dir.joinpath("config_0.yaml"), "yaml")
+        composed_dir.joinpath("errors.jsonl").write_text("", "utf-8")
+
+        jsonl_path = self.TEST_DIR.joinpath("batch.jsonl")
+        jsonl_path.write_text(
+            json.dumps({"name": "jsonl", "config": {"lr": 3}})
+            + "\n"
+            + json.dumps({"name": "error", "error": "Failed"})
+            + "\n",
+            "utf-8",
+        )
+
+        sqlite_path = self.TEST_DIR.joinpath("batch.db")
+        connection = sqlite3.connect(str(sqlite_path))
+        with connection:
+            connection.execute("CREATE TABLE configs (name, overrides, config, error)")
+            connection.execute(
+                "INSERT INTO configs VALUES ('sqlite', '[]', ?, NULL)", (json.dumps({"lr": 4}),)
+            )
+        connection.close()
+
+        configs = config_diff.load_configs([sweep_dir, composed_dir, jsonl_path, sqlite_path])
+        assert configs == [
+            ("0", {"lr": 0}),
+            ("1", {"lr": 1}),
+            ("config_0", {"lr": 2}),
+            ("jsonl", {"lr": 3}),
+            ("sqlite", {"lr": 4}),
+        ]
@@ -0,0 +1,80 @@
+import pytest
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config import config_formats
+from allennlp_hydra.config.fill_defaults import LazyConfig
+
+
+class Unserializable:
+    pass
+
+
+class TestConfigFormats(BaseTestCase):
+    """
+    Tests for `allennlp_hydra.config.config_formats`.
+    """
+
+    @pytest.mark.parametrize("config_format", list(config_formats.CONFIG_FORMATS))
+    def test_round_trip(self, simple_config, config_format):
+        path = self.TEST_DIR.joinpath(
+            config_formats.get_config_file_name("simple_config", config_format)
+        )
+        config_formats.save_config(simple_config, path, config_format)
+        assert config_formats.load_config(path) == simple_config
+        assert config_formats.load_config(path, config_format) == simple_config
+
+    def test_tuples(self):
+        config = {"betas": (0.9, 0.999), "nested": LazyConfig(betas=(0.1, 0.2))}
+
+        pickle_path = self.TEST_DIR.joinpath("config.pkl")
+        config_formats.save_config(config, pickle_path, "pickle")
+        loaded = config_formats.load_config(pickle_path)
+        assert loaded == config
+        assert type(loaded["nested"]) is dict
+
+        # Hydra cannot load Python specific YAML tags.
+        yaml_path = self.TEST_DIR.joinpath("config.yaml")
+        config_formats.save_config(config, yaml_path, "yaml")
+        assert "python" not in yaml_path.read_text("utf-8")
+        assert config_formats.load_config(yaml_path) == {
+            "betas": [0.9, 0.999],
+            "nested": {"betas": [0.1, 0.2]},
+        }
+
+    def test_compact_json(self):
+        path = self.TEST_DIR.joinpath("config.json")
+        config_formats.save_config({"a": [1, 2], "b": "c"}, path, "compact-json")
+        assert path.read_text("utf-8") == '{"a":[1,2],"b":"c"}'
+
+    def test_failed_save_keeps_config(self):
+        path = self.TEST_DIR.joinpath("config.json")
+        config_formats.save_config({"a": 1}, path)
+
+        with pytest.raises(TypeError):
+            config_formats.save_config({"a": Unserializable()}, path)
+        assert config_formats.load_config(path) == {"a": 1}
+        assert list(self.TEST_DIR.iterdir()) == [path]
+
+    def test_saved_config_permissions(self):
+        path = self.TEST_DIR.joinpath("config.json")
+        reference_path = self.TEST_DIR.joinpath("reference.json")
+        config_formats.save_config({"a": 1}, path)
+        reference_path.write_text("{}", "utf-8")
+        assert path.stat().st_mode == reference_path.stat().st_mode
+
+    def test_jsonnet(self, monkeypatch):
+        monkeypatch.setenv("CONFIG_FORMATS_TEST_DIM", "3")
+        path = self.TEST_DIR.joinpath("config.jsonnet")
+        path.write_text(
+            'local dim = std.parseInt(std.extVar("CONFIG_FORMATS_TEST_DIM"));\n'
+            '{model: {input_dim: dim, output_dim: dim * 2}}\n',
+            "utf-8",
+        )
+        assert config_formats.is_config_file(path)
+        assert config_formats.load_config(path) == {"model": {"input_dim": 3, "output_dim": 6}}
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            config_formats.save_config({}, self.TEST_DIR.joinpath("config.txt"), "txt")
+        with pytest.raises(ValueError):
+            config_formats.load_config(self.TEST_DIR.joinpath("config.txt"))
@@ -0,0 +1,159 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config import config_index
+from allennlp_hydra.config.config_index import load_config_index
+from allennlp_hydra.config.config_pack import pack_config_dir
+
+
+class TestConfigIndex(BaseTestCase):
+    """
+    Tests for `allennlp_hydra.config.config_index`.
+    """
+
+    @pytest.fixture()
+    def config_dir(self):
+        config_dir = self.TEST_DIR.joinpath("conf")
+        shutil.copytree(self.FIXTURES_ROOT.joinpath("conf"), config_dir)
+        yield config_dir
+
+    def test_index(self, config_dir):
+        index = load_config_index(config_dir)
+        assert index.groups[""] == ["simple_config", "simple_tagger"]
+        assert index.get_options("model") == ["basic_classifier", "simple_tagger"]
+        assert index.get_options("trainer/learning_rate_scheduler") == [
+            "noam",
+            "polynomial_decay",
+        ]
+        assert index.configs["simple_tagger"].keys == ["train_data_path", "validation_data_path"]
+        assert index.configs["simple_config"].default_keys == [
+            "dataset_reader",
+            "trainer",
+            "model",
+            "data_loader",
+        ]
+        with pytest.raises(ValueError, match="did you mean 'model'"):
+            index.get_options("modle")
+
+        # A pack has the same index.
+        pack_path = self.TEST_DIR.joinpath("conf.pack")
+        pack_config_dir(config_dir, pack_path)
+        assert load_config_index(pack_path) == index
+
+    def test_only_changed_files_are_read(self, config_dir, monkeypatch):
+        load_config_index(config_dir)
+
+        read = []
+        read_config_info = config_index._read_config_info
+        monkeypatch.setattr(
+            config_index,
+            "_read_config_info",
+            lambda path: read.append(path.name) or read_config_info(path),
+        )
+        assert load_config_index(config_dir).groups["model"] == [
+            "basic_classifier",
+            "simple_tagger",
+        ]
+        assert read == []
+
+        model_path = config_dir.joinpath("model", "basic_classifier.yaml")
+        model_path.write_text("type: basic_classifier\ndropout: 0.1\n")
+        stat = os.stat(model_path)
+        os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        config_dir.joinpath("model", "new.yaml").write_text("type: new\n")
+        index = load_config_index(config_dir)
+        assert sorted(read) == ["basic_classifier.yaml", "new.yaml"]
+        assert index.configs["model/basic_classifier"].keys == ["type", "dropout"]
+        assert index.groups["model"] == ["basic_classifier", "new", "simple_tagger"]
+
+    @pytest.mark.parametrize(
+        "override, problem",
+        [
+            ("model=simple_tager", "did you mean 'simple_tagger'?"),
+            ("trainer/learning_rate_scheduler=noam,polynomial", "did you mean 'polynomial_decay'?"),
+            ("trainer/optimzer=adadelta", "not a config group, did you mean 'trainer/optimizer'?"),
+            ("trainr.num_epochs=3", "use '+trainr.num_epochs=3' to add it, did you mean 'trainer'?"),
+            ("seed=1", "'seed' is not a key of 'simple_config'"),
+        ],
+    )
+    def test_check_overrides_problems(self, config_dir, override, problem):
+        (message,) = load_config_index(config_dir).check_overrides("simple_config", [override])
+        assert message.startswith(f"'{override}'")
+        assert problem in message
+
+    def test_check_overrides_valid(self, config_dir):
+        overrides = [
+            "model=simple_tagger",
+            "model=basic_classifier,simple_tagger",
+            "model=glob(*)",
+            "model=null",
+            "model.encoder.input_size=9",
+            "trainer=optimizer/adadelta",
+            "+seed=1",
+            "++trainer.num_epochs=2",
+            "~model",
+            "hydra.job.name=test",
+            "data_loader/batch_sampler=bucket_batch_sampler",
+        ]
+        index = load_config_index(config_dir)
+        assert index.check_overrides("simple_config", overrides) == []
+        assert index.check_overrides("simple_tagger", ["train_data_path=x"]) == []
+        assert index.check_overrides("simple_confg", []) == [
+            "'simple_confg' is not a config, did you mean 'simple_config'?"
+        ]
+
+    def test_unknown_keys_are_not_checked(self, config_dir):
+        config_dir.joinpath("global.yaml").write_text("# @package _global_\nseed: 1\n")
+        config_dir.joinpath("config.yaml").write_text("defaults:\n  - base\n  - _self_\n")
+        index = load_config_index(config_dir)
+        assert index.check_overrides("simple_config", ["seed=2"]) == []
+        # `base` is not in the directory, e.g. it is in Hydra's `ConfigStore`.
+        assert index.get_top_level_keys("config") is None
+        assert index.check_overrides("config", ["anything=1"]) == []
+
+    def test_package_headers(self, config_dir):
+        config_dir.joinpath("model", "packaged.yaml").write_text(
+            "# @package encoder\nhidden_size: 3\n"
+        )
+        config_dir.joinpath("nested.yaml").write_text(
+            "# @package _global_.extra.nested\nvalue: 1\n"
+        )
+        index = load_config_index(config_dir)
+        keys = index.get_top_level_keys("simple_config")
+        assert {"encoder", "extra"} <= keys
+        assert "hidden_size" not in keys
+        assert index.check_overrides("simple_config", ["encoder.hidden_size=4"]) == []
+
+        config_dir.joinpath("model", "packaged.yaml").write_text(
+            "# @package _group_\nhidden_size: 3\n"
+        )
+        assert load_config_index(config_dir).get_top_level_keys("simple_config") is None
+
+    def test_complete_override(self, config_dir):
+        index = load_config_index(config_dir)
+        assert index.complete_override("simple_config", "mo") == ["model="]
+        assert index.complete_override("simple_config", "model=s") == ["model=simple_tagger"]
+        assert index.complete_override(None, "+trainer/l") == [
+            "+trainer/learning_rate_scheduler="
+        ]
+        assert index.complete_override("simple_config", "model.en") == ["model.encoder="]
+        assert index.complete_override("simple_config", "seed=") == []
+
+    def test_main(self, config_dir, capsys):
+        config_index.main([str(config_dir), "simple_config", "trainer/learning_rate_scheduler="])
+        assert capsys.readouterr().out.split() == [
+            "trainer/learning_rate_scheduler=noam",
+            "trainer/learning_rate_scheduler=polynomial_decay",
+        ]
+
+    def test_invalid_cache(self, config_dir):
+        load_config_index(config_dir)
+        cache_path = config_index._get_cache_path(config_dir.absolute())
+        assert json.loads(cache_path.read_text())["config_dir"] == str(config_dir.absolute())
+
+        cache_path.write_text("{")
+        assert load_config_index(config_dir).groups[""] == ["simple_config", "simple_tagger"]
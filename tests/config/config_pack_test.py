@@ -0,0 +1,127 @@
+import json
+import shutil
+
+import pytest
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config.compose import ComposeSession, compose_config, watch_config
+from allennlp_hydra.config.compose_cache import ComposeCache
+from allennlp_hydra.config.config_pack import (
+    PACK_FORMAT_VERSION,
+    is_config_pack,
+    load_config_pack,
+    pack_config_dir,
+)
+
+VARIANTS = [
+    [],
+    ["model=simple_tagger", "model.encoder.input_size=9"],
+    ["trainer/learning_rate_scheduler=polynomial_decay"],
+    ["+model.new_key=1"],
+]
+
+
+class TestConfigPack(BaseTestCase):
+    """
+    Tests for `allennlp_hydra.config.config_pack`.
+    """
+
+    @pytest.fixture()
+    def pack_path(self):
+        pack_path = self.TEST_DIR.joinpath("conf.pack")
+        assert pack_config_dir(self.FIXTURES_ROOT.joinpath("conf"), pack_path) == 11
+        yield pack_path
+
+    def test_pack_contents(self, pack_path):
+        assert is_config_pack(pack_path)
+        assert not is_config_pack(self.FIXTURES_ROOT.joinpath("conf"))
+
+        pack = load_config_pack(pack_path)
+        assert pack.groups[""] == ["data_loader", "dataset_reader", "model", "trainer"]
+        assert pack.groups["trainer"] == ["learning_rate_scheduler", "optimizer"]
+        assert pack.group_configs["model"] == ["basic_classifier", "simple_tagger"]
+        assert "data_loader/batch_sampler/bucket_batch_sampler" in pack.configs
+
+        # The pack is only read once.
+        assert load_config_pack(pack_path) is pack
+
+    @pytest.mark.parametrize("overrides", VARIANTS)
+    def test_same_as_config_dir(self, pack_path, overrides):
+        config_dir = self.FIXTURES_ROOT.joinpath("conf")
+        expected = compose_config(config_dir, "simple_config", "test_pack", config_overrides=overrides)
+        result = compose_config(pack_path, "simple_config", "test_pack", config_overrides=overrides)
+        assert json.dumps(result) == json.dumps(expected)
+
+        session = ComposeSession(pack_path, job_name="test_pack")
+        assert session.compose("simple_config", overrides) == expected
+
+    def test_sweep_groups(self, pack_path):
+        session = ComposeSession(pack_path)
+        sweep = session.sweep(["model=glob(*)"])
+        assert [list(overrides) for overrides in sweep] == [
+            ["model=basic_classifier"],
+            ["model=simple_tagger"],
+        ]
+
+    def test_missing_config(self, pack_path):
+        session = ComposeSession(pack_path)
+        with pytest.raises(Exception, match="missing"):
+            session.compose("simple_config", ["model=missing"])
+
+    def test_compose_cache(self, pack_path):
+        cache = ComposeCache(self.TEST_DIR.joinpath("cache"))
+        compose_config(pack_path, "simple_config", "test_pack", compose_cache=cache)
+        config_dir = self.TEST_DIR.joinpath("conf")
+        shutil.copytree(self.FIXTURES_ROOT.joinpath("conf"), config_dir)
+        with config_dir.joinpath("simple_config.yaml").open("a") as config_file:
+            config_file.write("new_key: 1\n")
+
+        # The cached config is used until the pack changes.
+        cfg = compose_config(pack_path, "simple_config", "test_pack", compose_cache=cache)
+        assert "new_key" not in cfg
+        pack_config_dir(config_dir, pack_path)
+        cfg = compose_config(pack_path, "simple_config", "test_pack", compose_cache=cache)
+        assert cfg["new_key"] == 1
+
+    def test_invalid_packs(self, pack_path):
+        with pytest.raises(ValueError, match="not a directory"):
+            pack_config_dir(pack_path, self.TEST_DIR.joinpath("other.pack"))
+
+        other_path = self.TEST_DIR.joinpath("other.pack")
+        other_path.write_text("not a pack")
+        with pytest.raises(ValueError, match="is not a config pack"):
+            load_config_pack(other_path)
+
+        with pytest.raises(ValueError, match="cannot be watched"):
+            next(watch_config(pack_path, "simple_config", "test_pack", self.TEST_DIR))
+
+    def test_format_version(self, pack_path, monkeypatch):
+        from allennlp_hydra.config import config_pack
+
+        monkeypatch.setattr(config_pack, "PACK_FORMAT_VERSION", PACK_FORMAT_VERSION + 1)
+        with pytest.raises(ValueError, match="another version"):
+            load_config_pack(pack_path)
+
+    def test_invalid_yaml(self):
+        config_dir = self.TEST_DIR.joinpath("conf")
+        config_dir.mkdir()
+        config_dir.joinpath("config.yaml").write_text("a: [")
+        with pytest.raises(ValueError, match="Could not parse"):
+            pack_config_dir(config_dir, self.TEST_DIR.joinpath("conf.pack"))
+        assert list(self.TEST_DIR.glob("*.pack*")) == []
+
+    def test_configs_not_in_json(self):
+        config_dir = self.TEST_DIR.joinpath("conf")
+        config_dir.mkdir()
+        config_dir.joinpath("config.yaml").write_text("a: 1\nb: [x, 2.5]\n")
+        config_dir.joinpath("int_keys.yaml").write_text("1: a\n2: b\n")
+        config_dir.joinpath("empty.yaml").write_text("")
+        pack_path = self.TEST_DIR.joinpath("conf.pack")
+        pack_config_dir(config_dir, pack_path)
+
+        # Only the configs that JSON cannot represent are stored as yaml.
+        pack = load_config_pack(pack_path)
+        assert pack.yaml_paths == {"int_keys"}
+        assert pack.load_object("config") == {"a": 1, "b": ["x", 2.5]}
+        assert pack.load_object("int_keys") == {1: "a", 2: "b"}
+        assert pack.load_object("empty") is None
@@ -0,0 +1,190 @@
+from typing import Optional, Tuple
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from allennlp.common import FromParams, Lazy, Registrable
+from allennlp.data import DataLoader
+from allennlp.training import Trainer
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config import defaults_schema, fill_defaults
+
+
+class SchemaBase(Registrable):
+    default_implementation = "plain"
+
+
+@SchemaBase.register("plain")
+class Plain(SchemaBase):
+    def __init__(self, arg: int, betas: Tuple[float, float] = (0.9, 0.999), name: str = "x"):
+        self.arg = arg
+
+
+class NotRegistrable(FromParams):
+    def __init__(self, size: int = 2):
+        self.size = size
+
+
+@SchemaBase.register("nested")
+class Nested(SchemaBase):
+    def __init__(
+            self,
+            child: SchemaBase = Plain(1),
+            lazy_child: Lazy[SchemaBase] = Lazy(Plain),
+            not_registrable: Optional[NotRegistrable] = NotRegistrable(),
+            mapping: dict = None,
+    ):
+        self.child = child
+
+
+@SchemaBase.register("unencodable")
+class Unencodable(SchemaBase):
+    def __init__(self, value: object = object()):
+        self.value = value
+
+
+@SchemaBase.register("broken")
+class Broken(SchemaBase):
+    def __init__(self, value: int = 1):
+        self.value = value
+
+
+class TestDefaultsSchema(BaseTestCase):
+    """
+    Tests for `allennlp_hydra.config.defaults_schema`.
+    """
+
+    @pytest.fixture()
+    def schema(self):
+        yield defaults_schema.build_defaults_schema("testing")
+
+    @pytest.mark.parametrize(
+        "base_class, config",
+        [
+            [SchemaBase, {"type": "nested"}],
+            [SchemaBase, {"type": "nested", "child": {"type": "plain", "arg": 2}}],
+            [SchemaBase, {"type": "unencodable"}],
+            [DataLoader, {"batch_sampler": {"type": "bucket", "batch_size": 2}}],
+            [Trainer, {"num_epochs": 1, "optimizer": {"type": "adam"}}],
+        ],
+        ids=["nested", "nested_config", "unencodable", "data_loader", "trainer"],
+    )
+    def test_same_as_inspect(self, schema, base_class, config):
+        expected = fill_defaults.fill_config_with_default_values(base_class, config)
+
+        fill_defaults.set_defaults_schema(schema)
+        result = fill_defaults.fill_config_with_default_values(base_class, config)
+        assert result == expected
+
+    def test_does_not_inspect(self, schema):
+        fill_defaults.set_defaults_schema(schema)
+        with patch.object(fill_defaults.inspect, "signature", side_effect=AssertionError):
+            result = fill_defaults.fill_config_with_default_values(
+                SchemaBase, {"type": "nested"}
+            )
+            positional = list(fill_defaults.get_positional_arguments(Plain))
+
+        assert result == {
+            "type"           : "nested",
+            "child"          : {"type": "plain", "betas": (0.9, 0.999), "name": "x"},
+            "lazy_child"     : {"type": "plain", "betas": (0.9, 0.999), "name": "x"},
+            "not_registrable": {"size": 2},
+            "mapping"        : None,
+        }
+        assert positional == ["arg"]
+
+    def test_unencodable_left_out(self, schema):
+        assert defaults_schema.get_qualified_name(Nested) in schema.classes
+        assert defaults_schema.get_qualified_name(NotRegistrable) in schema.classes
+        assert defaults_schema.get_qualified_name(Unencodable) not in schema.classes
+        assert schema.get_fill_plan(Unencodable) is None
+
+    def test_broken_class_left_out(self):
+        compile_fill_plan = fill_defaults.compile_fill_plan_from_signature
+
+        def compile_or_raise(class_to_use):
+            if class_to_use is Broken:
+                raise AttributeError("broken")
+            return compile_fill_plan(class_to_use)
+
+        with patch.object(
+                fill_defaults, "compile_fill_plan_from_signature", side_effect=compile_or_raise
+        ):
+            schema = defaults_schema.build_defaults_schema("testing")
+        assert defaults_schema.get_qualified_name(Broken) not in schema.classes
+        assert defaults_schema.get_qualified_name(Plain) in schema.classes
+
+        fill_defaults.set_defaults_schema(schema)
+        assert fill_defaults.fill_config_with_default_values(
+            SchemaBase, {"type": "broken"}
+        ) == {"type": "broken", "value": 1}
+
+    def test_to_from_file(self, schema):
+        schema.to_file(self.TEST_DIR.joinpath("schema.json"))
+        loaded = defaults_schema.DefaultsSchema.from_file(
+            self.TEST_DIR.joinpath("schema.json")
+        )
+
+        assert loaded.fingerprint == "testing"
+        assert loaded.classes == schema.classes
+        assert loaded.get_fill_plan(Plain) == schema.get_fill_plan(Plain)
+
+    def test_load_only_builds_once(self):
+        schema = defaults_schema.load_defaults_schema(schema_dir=self.TEST_DIR)
+        assert fill_defaults._DEFAULTS_SCHEMA is schema
+        assert self.TEST_DIR.joinpath(f"{schema.fingerprint}.json").exists()
+
+        with patch.object(
+                defaults_schema, "build_defaults_schema", side_effect=AssertionError
+        ):
+            loaded = defaults_schema.load_defaults_schema(schema_dir=self.TEST_DIR)
+        assert loaded.fingerprint == schema.fingerprint
+        assert loaded.classes == schema.classes
+
+    def test_load_lazily(self):
+        # Nothing is hashed or loaded until a config is filled.
+        with patch.object(defaults_schema, "get_schema_fingerprint", side_effect=AssertionError):
+            defaults_schema.load_defaults_schema_lazily(schema_dir=self.TEST_DIR)
+        assert list(self.TEST_DIR.glob("*.json")) == []
+
+        try:
+            result = fill_defaults.fill_config_with_default_values(
+                SchemaBase, {"type": "nested"}
+            )
+            assert result["child"] == {"type": "plain", "betas": (0.9, 0.999), "name": "x"}
+            assert fill_defaults._DEFAULTS_SCHEMA is not None
+            assert len(list(self.TEST_DIR.glob("*.json"))) == 1
+        finally:
+            fill_defaults.set_defaults_schema(None)
+
+    def test_fingerprint(self):
+        fingerprint = defaults_schema.get_schema_fingerprint()
+        assert fingerprint == defaults_schema.get_schema_fingerprint([])
+        assert fingerprint != defaults_schema.get_schema_fingerprint(["my_package"])
+        assert defaults_schema.get_schema_fingerprint(
+            ["a", "b"]
+        ) == defaults_schema.get_schema_fingerprint(["b", "a"])
+
+    def test_fingerprint_included_sources(self):
+        package_dir = self.TEST_DIR.joinpath("schema_package")
+        package_dir.mkdir()
+        package_dir.joinpath("__init__.py").write_text("")
+        module_path = package_dir.joinpath("model.py")
+        module_path.write_text("SIZE = 1\n")
+
+        sys.path.insert(0, str(self.TEST_DIR))
+        try:
+            import schema_package.model  # noqa: F401
+
+            fingerprint = defaults_schema.get_schema_fingerprint(["schema_package"])
+            assert fingerprint == defaults_schema.get_schema_fingerprint(["schema_package"])
+
+            # Editing a module of an included package changes the fingerprint.
+            module_path.write_text("SIZE = 2\n")
+            assert fingerprint != defaults_schema.get_schema_fingerprint(["schema_package"])
+        finally:
+            sys.path.remove(str(self.TEST_DIR))
+            sys.modules.pop("schema_package.model", None)
+            sys.modules.pop("schema_package", None)
@@ -1,11 +1,17 @@
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+from copy import deepcopy
+import inspect
+import json
 
 import pytest
 
-from allennlp.common import Registrable, Params
+from allennlp.common import Registrable, Params, Lazy
+from allennlp.common.checks import ConfigurationError
 from allennlp.data import DataLoader, DatasetReader
 from allennlp.training import Trainer
 from allennlp.models import Model
+from omegaconf import OmegaConf
 
 from allennlp_hydra.utils.testing import BaseTestCase
 from allennlp_hydra.config import fill_defaults
@@ -274,6 +280,10 @@ class TestFillDefaults(BaseTestCase):
             "b"   : None
         }
 
+    def test_no_type_or_default_implementation(self):
+        with pytest.raises(ConfigurationError, match="needs a 'type'"):
+            fill_defaults.fill_config_with_default_values(Model, {})
+
     def test_nested_params_object(self):
         result = fill_defaults.fill_config_with_default_values(A, {
             "type": "no-annotation-class", "a": {"B": {"C": {"D": "E"}}}
@@ -308,6 +318,405 @@ class TestFillDefaults(BaseTestCase):
             }
         }
 
+    def test_fill_config_share_structure(self):
+        cfg = {"type": "no-annotation-class", "a": {"B": ["C"]}}
+        result = fill_defaults.fill_config_with_default_values(
+            A, cfg, share_structure=True
+        )
+
+        assert result == {
+            "type": "no-annotation-class",
+            "a"   : {"B": ["C"]},
+            "b"   : None
+        }
+        assert cfg == {"type": "no-annotation-class", "a": {"B": ["C"]}}
+        assert result["a"] is cfg["a"]
+
+        # A config that is already complete is returned as is.
+        assert fill_defaults.fill_config_with_default_values(
+            A, result, share_structure=True
+        ) is result
+
+    def test_fill_config_copies_by_default(self):
+        cfg = {
+            "type"   : "D",
+            "arg_a"  : "test",
+            "arg_b"  : "nest",
+            "kwarg_a": 2,
+            "kwarg_b": {"type": "E"},
+        }
+        result = fill_defaults.fill_config_with_default_values(A, cfg)
+
+        assert result == cfg
+        assert result is not cfg
+        assert result["kwarg_b"] is not cfg["kwarg_b"]
+
+    def test_optional_registered_default(self):
+        result = fill_defaults.fill_config_with_default_values(
+            A, {"type": "optional-registered-default"}
+        )
+        assert result == {
+            "type" : "optional-registered-default",
+            "child": {"type": "C", "kwarg_a": 1},
+            "other": None
+        }
+
+    def test_default_subtree_cache(self):
+        fill_defaults.clear_fill_caches()
+
+        result = fill_defaults.fill_config_with_default_values(
+            A, {"type": "registered-default"}
+        )
+        assert result == {
+            "type" : "registered-default",
+            "child": {"type": "C", "kwarg_a": 1}
+        }
+        assert (A, "C") in fill_defaults._DEFAULT_SUBTREE_CACHE
+
+        # Mutating the result must not change the cached subtree.
+        result["child"]["kwarg_a"] = 10
+        assert fill_defaults.get_default_subtree(A, "C") == {
+            "type": "C", "kwarg_a": 1
+        }
+
+    def test_default_subtree_cache_invalidated(self):
+        fill_defaults.get_default_subtree(A, "C")
+        assert (A, "C") in fill_defaults._DEFAULT_SUBTREE_CACHE
+
+        @A.register("cache-invalidation", exist_ok=True)
+        class CacheInvalidation(A):
+            def __init__(self, kwarg_a: int = 2):
+                super(CacheInvalidation, self).__init__("cache", "invalidation", kwarg_a)
+
+        # Registering a new class clears the cache on the next lookup.
+        assert fill_defaults.get_default_subtree(A, "cache-invalidation") == {
+            "type": "cache-invalidation", "kwarg_a": 2
+        }
+        assert (A, "C") not in fill_defaults._DEFAULT_SUBTREE_CACHE
+
+    def test_default_subtree_cache_replaced_class(self):
+        for kwarg_a in [3, 4]:
+
+            @A.register("cache-replaced", exist_ok=True)
+            class CacheReplaced(A):
+                def __init__(self, kwarg_a: int = kwarg_a):
+                    super(CacheReplaced, self).__init__("cache", "replaced", kwarg_a)
+
+            # Registering another class with the same name does not change the
+            # size of the registry, but still clears the cache.
+            assert fill_defaults.fill_config_with_default_values(
+                A, {"type": "cache-replaced"}
+            ) == {"type": "cache-replaced", "kwarg_a": kwarg_a}
+
+    def test_fill_config_lazy(self):
+        fill_defaults.clear_fill_caches()
+
+        result = fill_defaults.fill_config_with_default_values(
+            A, {"type": "registered-default"}, lazy=True
+        )
+        assert isinstance(result, fill_defaults.LazyConfig)
+        assert "child" in result
+        assert not result.is_resolved("child")
+        assert (A, "C") not in fill_defaults._DEFAULT_SUBTREE_CACHE
+
+        assert result["child"] == {"type": "C", "kwarg_a": 1}
+        assert result.is_resolved("child")
+
+    def test_fill_config_lazy_equal(self):
+        fill_defaults.clear_fill_caches()
+        config = {"type": "registered-default"}
+        expected = fill_defaults.fill_config_with_default_values(A, config)
+
+        # Comparing two lazy configs fills in the defaults of both.
+        first = fill_defaults.fill_config_with_default_values(A, config, lazy=True)
+        second = fill_defaults.fill_config_with_default_values(A, config, lazy=True)
+        assert first == second
+        assert not first != second
+        assert second == expected
+
+    @pytest.mark.parametrize(
+        "convert",
+        [
+            dict,
+            lambda x: x.to_dict(),
+            lambda x: json.loads(json.dumps(x)),
+            lambda x: Params(x).as_dict(quiet=True),
+            deepcopy,
+        ],
+        ids=["dict", "to_dict", "json", "params", "deepcopy"],
+    )
+    def test_fill_config_lazy_conversion(self, convert):
+        cfg = {
+            "type"   : "D",
+            "arg_a"  : "test",
+            "arg_b"  : "nest",
+            "kwarg_b": {"type": "registered-default"},
+        }
+        expected = fill_defaults.fill_config_with_default_values(A, cfg)
+
+        result = convert(fill_defaults.fill_config_with_default_values(A, cfg, lazy=True))
+        assert result == expected
+        assert json.dumps(result, sort_keys=True) == json.dumps(expected, sort_keys=True)
+
+    def test_recursive_default(self):
+        result = fill_defaults.fill_config_with_default_values(
+            RecursiveBase, {"type": "recursive"}
+        )
+        # The default of `inner` is expanded once, its own `inner` is not.
+        assert result == {
+            "type" : "recursive",
+            "inner": {
+                "type" : "recursive",
+                "inner": {"type": "recursive"},
+                "size" : 1
+            },
+            "size" : 1
+        }
+
+    def test_max_default_depth(self):
+        fill_defaults.set_max_default_depth(1)
+        try:
+            result = fill_defaults.get_default_subtree(A, "registered-default")
+        finally:
+            fill_defaults.set_max_default_depth(fill_defaults.DEFAULT_MAX_DEFAULT_DEPTH)
+
+        assert result == {
+            "type" : "registered-default",
+            "child": {"type": "C"}
+        }
+
+        with pytest.raises(ValueError):
+            fill_defaults.set_max_default_depth(0)
+
+    @pytest.mark.parametrize("max_depth", [2, fill_defaults.DEFAULT_MAX_DEFAULT_DEPTH])
+    def test_cut_off_defaults_independent_of_order(self, max_depth):
+        fills = {
+            "a"     : lambda: fill_defaults.fill_config_with_default_values(
+                PBase, {"type": "a"}
+            ),
+            "b"     : lambda: fill_defaults.fill_config_with_default_values(
+                QBase, {"type": "b"}
+            ),
+            "inner" : lambda: fill_defaults.get_default_subtree(A, "registered-default"),
+            "nested": lambda: fill_defaults.get_default_subtree(
+                A, "nested-registered-default"
+            ),
+        }
+
+        fill_defaults.set_max_default_depth(max_depth)
+        try:
+            results = []
+            for order in [list(fills), list(reversed(list(fills)))]:
+                fill_defaults.clear_fill_caches()
+                results.append({name: fills[name]() for name in order})
+        finally:
+            fill_defaults.set_max_default_depth(fill_defaults.DEFAULT_MAX_DEFAULT_DEPTH)
+
+        assert results[0] == results[1]
+        assert results[0]["b"] == {
+            "type": "b",
+            "p"   : {"type": "a", "q": {"type": "b", "p": {"type": "a"}}},
+        }
+        if max_depth == 2:
+            assert results[0]["nested"] == {
+                "type" : "nested-registered-default",
+                "child": {"type": "registered-default", "child": {"type": "C"}},
+            }
+
+    def test_shared_default_subtrees_copied(self):
+        fill_defaults.clear_fill_caches()
+
+        result = fill_defaults.get_default_subtree(A, "two-defaults")
+        assert result == {
+            "type"  : "two-defaults",
+            "first" : {"type": "C", "kwarg_a": 1},
+            "second": {"type": "C", "kwarg_a": 1},
+        }
+
+        result["first"]["kwarg_a"] = 10
+        assert result["second"]["kwarg_a"] == 1
+        assert fill_defaults.get_default_subtree(A, "two-defaults")["first"] == {
+            "type": "C", "kwarg_a": 1
+        }
+
+    @pytest.mark.parametrize("share_structure", [False, True], ids=["copy", "shared"])
+    def test_fill_configs(self, share_structure):
+        cfgs = [
+            {
+                "type"   : "D",
+                "arg_a"  : "test",
+                "arg_b"  : "nest",
+                "kwarg_b": {"type": "C", "arg_a": "nested", "arg_b": "class"},
+            },
+            {
+                "type"   : "D",
+                "arg_a"  : "other",
+                "arg_b"  : "nest",
+                "kwarg_b": {"type": "C", "arg_a": "nested", "arg_b": "class"},
+            },
+            {"type": "B", "arg_a": "test", "arg_c": False},
+            {"type": "registered-default"},
+            {"type": "registered-default"},
+            {"type": "unhashable", "values": {1, 2}},
+        ]
+        expected = [fill_defaults.fill_config_with_default_values(A, cfg) for cfg in cfgs]
+
+        result = fill_defaults.fill_configs_with_default_values(
+            A, iter(cfgs), share_structure=share_structure
+        )
+        assert inspect.isgenerator(result)
+        result = list(result)
+        assert result == expected
+
+        if share_structure:
+            # The sub-config is only filled once.
+            assert result[1]["kwarg_b"] is result[0]["kwarg_b"]
+        else:
+            assert result[1]["kwarg_b"] is not result[0]["kwarg_b"]
+            assert result[1]["kwarg_b"] is not cfgs[1]["kwarg_b"]
+            result[3]["child"]["kwarg_a"] = 10
+            assert result[4]["child"]["kwarg_a"] == 1
+
+    @pytest.mark.parametrize("in_place", [False, True], ids=["copy", "in_place"])
+    def test_fill_params(self, in_place):
+        cfg = {"type": "D", "arg_a": "test", "arg_b": "nest", "kwarg_b": {"type": "C"}}
+        params = Params(deepcopy(cfg))
+
+        result = fill_defaults.fill_config_with_default_values(A, params, in_place=in_place)
+
+        assert isinstance(result, Params)
+        assert (result is params) == in_place
+        assert result.as_dict(quiet=True) == fill_defaults.fill_config_with_default_values(A, cfg)
+        if not in_place:
+            assert params.as_dict(quiet=True) == cfg
+
+    def test_fill_dict_config(self):
+        cfg = {"type": "D", "arg_a": "test", "arg_b": "nest", "kwarg_b": {"type": "C"}}
+        dict_config = OmegaConf.create(cfg)
+        OmegaConf.set_struct(dict_config, True)
+
+        result = fill_defaults.fill_config_with_default_values(A, dict_config, in_place=True)
+
+        assert result is dict_config
+        assert OmegaConf.is_struct(result)
+        assert OmegaConf.to_container(result) == fill_defaults.fill_config_with_default_values(
+            A, cfg
+        )
+
+    def test_fill_dict_in_place(self):
+        cfg = {"type": "registered-default"}
+        result = fill_defaults.fill_config_with_default_values(A, cfg, in_place=True)
+
+        assert result is cfg
+        assert cfg == {"type": "registered-default", "child": {"type": "C", "kwarg_a": 1}}
+
+        with pytest.raises(ValueError):
+            fill_defaults.fill_config_with_default_values(A, cfg, in_place=True, lazy=True)
+
+    def test_prune_default_values(self):
+        cfg = {
+            "type"   : "D",
+            "arg_a"  : "test",
+            "arg_b"  : "nest",
+            "kwarg_a": 5,
+            "kwarg_b": {
+                "type"   : "registered-default",
+                "child"  : {"type": "C", "kwarg_a": 1},
+            },
+        }
+        result = fill_defaults.prune_default_values(A, cfg)
+        assert result == {
+            "type"   : "D",
+            "arg_a"  : "test",
+            "arg_b"  : "nest",
+            "kwarg_b": {"type": "registered-default"},
+        }
+        assert cfg["kwarg_a"] == 5
+
+        result = fill_defaults.prune_default_values(
+            A, {"type": "registered-default", "child": {"type": "C", "kwarg_a": 2}}
+        )
+        assert result == {
+            "type" : "registered-default",
+            "child": {"type": "C", "kwarg_a": 2}
+        }
+
+    @pytest.mark.parametrize(
+        "base_class, cfg",
+        [
+            [A, {"type": "B", "arg_a": "test", "arg_c": False, "kwarg_b": True}],
+            [A, {"type": "optional-registered-default", "other": {"type": "C"}}],
+            [DataLoader, {"batch_sampler": {"type": "bucket", "batch_size": 2}}],
+            [Trainer, {"num_epochs": 1, "optimizer": {"type": "adam", "lr": 0.1}}],
+        ],
+        ids=["simple", "optional", "data_loader", "trainer"],
+    )
+    def test_prune_fill_round_trip(self, base_class, cfg):
+        filled = fill_defaults.fill_config_with_default_values(base_class, cfg)
+
+        # Round trip through JSON like a saved config.
+        filled = json.loads(json.dumps(filled))
+        pruned = fill_defaults.prune_default_values(base_class, filled)
+        assert len(json.dumps(pruned)) < len(json.dumps(filled))
+
+        result = fill_defaults.fill_config_with_default_values(base_class, pruned)
+        assert json.loads(json.dumps(result)) == filled
+
+    def test_compile_fill_plan(self):
+        result = fill_defaults.compile_fill_plan(RegisteredDefault)
+        assert result == (
+            fill_defaults.ParameterSpec(
+                name="child",
+                default=(A, "C"),
+                annotation_class=A,
+                action=fill_defaults.USE_DEFAULT_SUBTREE
+            ),
+        )
+
+        result = fill_defaults.compile_fill_plan(D)
+        assert result == (
+            fill_defaults.ParameterSpec(
+                name="kwarg_a",
+                default=5,
+                annotation_class=int,
+                action=fill_defaults.USE_DEFAULT
+            ),
+            fill_defaults.ParameterSpec(
+                name="kwarg_b",
+                default=None,
+                annotation_class=A,
+                action=fill_defaults.USE_DEFAULT
+            ),
+        )
+
+    def test_fill_plan_cached(self):
+        fill_defaults.clear_fill_caches()
+
+        result = fill_defaults.get_fill_plan(A, "D")
+        assert fill_defaults.get_fill_plan(A, "D") is result
+        assert fill_defaults._FILL_PLAN_CACHE[(A, "D")] is result
+
+    def test_fill_plan_error_only_when_needed(self):
+        class NotRegistered(A):
+            def __init__(self):
+                super(NotRegistered, self).__init__("NOT", "REGISTERED")
+
+        @A.register("unregistered-default", exist_ok=True)
+        class UnregisteredDefault(A):
+            def __init__(self, child: A = NotRegistered()):
+                super(UnregisteredDefault, self).__init__("UNREGISTERED", "DEFAULT")
+                self.child = child
+
+        (parameter,) = fill_defaults.get_fill_plan(A, "unregistered-default")
+        assert parameter.action == fill_defaults.RAISE_ERROR
+
+        cfg = {"type": "unregistered-default", "child": {"type": "E"}}
+        assert fill_defaults.fill_config_with_default_values(A, cfg) == cfg
+        with pytest.raises(KeyError):
+            fill_defaults.fill_config_with_default_values(
+                A, {"type": "unregistered-default"}
+            )
+
 
 #####################################################################
 # Helper Classes                                                    #
@@ -374,3 +783,71 @@ class NoAnnotationClassFound(A):
         super(NoAnnotationClassFound, self).__init__("NO", "ANNOTATION")
         self.a = a or {}
         self.b = b or []
+
+
+@A.register("registered-default")
+class RegisteredDefault(A):
+    def __init__(self, child: A = C("default", "instance")):
+        super(RegisteredDefault, self).__init__("REGISTERED", "DEFAULT")
+        self.child = child
+
+
+@A.register("optional-registered-default")
+class OptionalRegisteredDefault(A):
+    def __init__(self, child: Optional[A] = C("default", "instance"), other: Optional[A] = None):
+        super(OptionalRegisteredDefault, self).__init__("OPTIONAL", "DEFAULT")
+        self.child = child
+        self.other = other
+
+
+@A.register("two-defaults")
+class TwoDefaults(A):
+    def __init__(self, first: A = C("first", "default"), second: A = C("second", "default")):
+        super(TwoDefaults, self).__init__("TWO", "DEFAULTS")
+        self.first = first
+        self.second = second
+
+
+class RecursiveBase(Registrable):
+    default_implementation = "recursive"
+
+
+@RecursiveBase.register("recursive")
+class Recursive(RecursiveBase):
+    def __init__(self, inner: Lazy[RecursiveBase] = Lazy(RecursiveBase), size: int = 1):
+        self.inner = inner
+        self.size = size
+
+
+@A.register("unhashable")
+class Unhashable(A):
+    def __init__(self, values: set = None, kwarg_a: int = 2):
+        super(Unhashable, self).__init__("UN", "HASHABLE", kwarg_a)
+        self.values = values
+
+
+class PBase(Registrable):
+    default_implementation = "a"
+
+
+class QBase(Registrable):
+    default_implementation = "b"
+
+
+@PBase.register("a")
+class PA(PBase):
+    def __init__(self, q: Lazy[QBase] = Lazy(QBase)):
+        self.q = q
+
+
+@QBase.register("b")
+class QB(QBase):
+    def __init__(self, p: Lazy[PBase] = Lazy(PBase)):
+        self.p = p
+
+
+@A.register("nested-registered-default")
+class NestedRegisteredDefault(A):
+    def __init__(self, child: A = RegisteredDefault()):
+        super(NestedRegisteredDefault, self).__init__("NESTED", "DEFAULT")
+        self.child = child
@@ -0,0 +1,81 @@
+import json
+import threading
+
+from allennlp.common import Registrable
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config import fill_defaults, fill_stats
+
+
+class StatsBase(Registrable):
+    pass
+
+
+@StatsBase.register("leaf")
+class StatsLeaf(StatsBase):
+    def __init__(self, size: int = 1):
+        self.size = size
+
+
+@StatsBase.register("node")
+class StatsNode(StatsBase):
+    def __init__(self, child: StatsBase = StatsLeaf(), other: StatsBase = None):
+        self.child = child
+        self.other = other
+
+
+class TestFillStats(BaseTestCase):
+    """
+    Tests for `allennlp_hydra.config.fill_stats`.
+    """
+
+    def test_collect_fill_stats(self):
+        fill_defaults.clear_fill_caches()
+
+        with fill_stats.collect_fill_stats() as stats:
+            fill_defaults.fill_config_with_default_values(
+                StatsBase, {"type": "node", "other": {"type": "node"}}
+            )
+            assert fill_stats.get_active_stats() is stats
+        assert fill_stats.get_active_stats() is None
+
+        assert stats.classes_visited == {
+            "StatsBase:node": 2,
+            "StatsBase:leaf": 1,
+        }
+        assert stats.signature_calls == 2
+        assert stats.fill_plan_misses == 2
+        assert stats.fill_plan_hits == 1
+        assert stats.default_subtree_misses == 1
+        assert stats.default_subtree_hits == 1
+        assert stats.max_depth == 2
+        assert set(stats.class_seconds) == {"StatsBase:node", "StatsBase:leaf"}
+        assert stats.total_seconds > 0
+
+    def test_stats_not_collected_outside(self):
+        with fill_stats.collect_fill_stats() as stats:
+            pass
+
+        fill_defaults.fill_config_with_default_values(StatsBase, {"type": "node"})
+        assert stats.classes_visited == {}
+
+    def test_stats_not_collected_from_other_threads(self):
+        with fill_stats.collect_fill_stats() as stats:
+            thread = threading.Thread(
+                target=fill_defaults.fill_config_with_default_values,
+                args=(StatsBase, {"type": "node"}),
+            )
+            thread.start()
+            thread.join()
+        assert stats.classes_visited == {}
+
+    def test_write_fill_stats(self, capsys):
+        with fill_stats.collect_fill_stats() as stats:
+            fill_defaults.fill_config_with_default_values(StatsBase, {"type": "leaf"})
+
+        output_path = self.TEST_DIR.joinpath("stats.json")
+        fill_stats.write_fill_stats(stats, output_path)
+        assert json.loads(output_path.read_text("utf-8")) == stats.to_dict()
+
+        fill_stats.write_fill_stats(stats, "-")
+        assert json.loads(capsys.readouterr().out) == stats.to_dict()
@@ -0,0 +1,113 @@
+import json
+import sys
+
+import pytest
+from omegaconf import OmegaConf
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config.compose import ComposeSession, compose_config
+from allennlp_hydra.config.compose_cache import ComposeCache
+from allennlp_hydra.config.memory_source import MemoryConfigs
+
+
+class TestMemorySource(BaseTestCase):
+    """
+    Tests for `allennlp_hydra.config.memory_source`.
+    """
+
+    def load_fixture_configs(self):
+        config_dir = self.FIXTURES_ROOT.joinpath("conf")
+        return {
+            str(yaml_path.relative_to(config_dir).with_suffix("")): OmegaConf.load(yaml_path)
+            for yaml_path in config_dir.rglob("*.yaml")
+        }
+
+    @pytest.mark.parametrize(
+        "overrides",
+        [[], ["model=simple_tagger", "model.encoder.input_size=9"], ["+model.new_key=1"]],
+    )
+    def test_same_as_config_dir(self, overrides):
+        expected = compose_config(
+            self.FIXTURES_ROOT.joinpath("conf"), "simple_config", "test", config_overrides=overrides
+        )
+        result = compose_config(
+            None,
+            "simple_config",
+            "test",
+            config_overrides=overrides,
+            configs=self.load_fixture_configs(),
+        )
+        assert json.dumps(result) == json.dumps(expected)
+
+    def test_layered_on_config_dir(self):
+        configs = {
+            "model/simple_tagger": {"type": "in_memory"},
+            "trainer/learning_rate_scheduler/constant.yaml": {"type": "constant"},
+        }
+        session = ComposeSession(self.FIXTURES_ROOT.joinpath("conf"), configs=configs)
+
+        # Changing the configs after passing them does not change the session.
+        configs["model/simple_tagger"]["type"] = "changed"
+
+        cfg = session.compose(
+            "simple_config",
+            ["model=simple_tagger", "trainer/learning_rate_scheduler=constant"],
+        )
+        assert cfg["model"] == {"type": "in_memory"}
+        assert cfg["trainer"]["learning_rate_scheduler"] == {"type": "constant"}
+        assert cfg["dataset_reader"] == session.compose("simple_config")["dataset_reader"]
+
+        # The groups of both sources are swept.
+        sweep = session.sweep(["trainer/learning_rate_scheduler=glob(*)"])
+        assert [list(overrides) for overrides in sweep] == [
+            ["trainer/learning_rate_scheduler=constant"],
+            ["trainer/learning_rate_scheduler=noam"],
+            ["trainer/learning_rate_scheduler=polynomial_decay"],
+        ]
+
+    def test_no_file_io(self):
+        configs = self.load_fixture_configs()
+        compose_config(None, "simple_config", "test", configs=configs)
+
+        # Audit hooks cannot be removed, so the hook only records the files
+        # opened while `opened` is not `None`.
+        opened = []
+        sys.addaudithook(
+            lambda event, args: opened is not None and event == "open" and opened.append(args[0])
+        )
+        try:
+            session = ComposeSession(configs=configs)
+            for index in range(5):
+                session.compose("simple_config", [f"trainer.num_epochs={index}"])
+                compose_config(None, "simple_config", "test", configs=configs)
+            assert opened == []
+        finally:
+            opened = None
+
+    def test_groups(self):
+        memory_configs = MemoryConfigs(
+            {"config": {}, "a/b/c": {"x": 1}, "a/d": [1], "e/f": None}
+        )
+        assert memory_configs.groups == {"": ["a", "e"], "a": ["b"], "a/b": [], "e": []}
+        assert memory_configs.group_configs == {
+            "": ["config"],
+            "a": ["d"],
+            "a/b": ["c"],
+            "e": ["f"],
+        }
+
+    def test_errors(self):
+        with pytest.raises(ValueError, match="config path or configs"):
+            ComposeSession()
+        with pytest.raises(ValueError, match="must be dicts or lists"):
+            ComposeSession(configs={"config": "a: 1"})
+        with pytest.raises(ValueError, match="cannot be cached"):
+            compose_config(
+                None,
+                "config",
+                "test",
+                configs={"config": {}},
+                compose_cache=ComposeCache(self.TEST_DIR),
+            )
+        with pytest.raises(Exception, match="missing"):
+            compose_config(None, "missing", "test", configs={"config": {}})
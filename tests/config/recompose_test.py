@@ -0,0 +1,71 @@
+import json
+
+import pytest
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config.compose import ComposeSession
+from allennlp_hydra.config.recompose import Recomposer
+
+VARIANTS = [
+    [],
+    ["model=simple_tagger"],
+    ["model=simple_tagger", "model.encoder.hidden_size=7"],
+    # `projection_dim` is an interpolation of `input_size`.
+    ["model=simple_tagger", "model.encoder.input_size=9"],
+    ["model=simple_tagger", "model.text_field_embedder.token_embedders.tokens.projection_dim=1"],
+    ["model.text_field_embedder.0.token_embedders.0.tokens.2.embedding_dim=3"],
+    ["trainer.num_epochs=5", "trainer.grad_norm=null", "trainer.patience=[1,2]"],
+    ["trainer.num_epochs='5'", "trainer.num_epochs=6"],
+    ["trainer/learning_rate_scheduler=polynomial_decay", "trainer.num_epochs=2"],
+]
+
+
+class TestRecomposer(BaseTestCase):
+    """
+    Tests for `allennlp_hydra.config.recompose`.
+    """
+
+    @pytest.fixture()
+    def session(self):
+        yield ComposeSession(self.FIXTURES_ROOT.joinpath("conf"), job_name="test_recompose")
+
+    def test_same_as_compose(self, session):
+        recomposer = Recomposer(session, "simple_config")
+        for overrides in VARIANTS:
+            expected = session.compose("simple_config", overrides)
+            assert json.dumps(recomposer.compose(overrides)) == json.dumps(expected)
+
+        # Only the group overrides are composed by Hydra.
+        assert recomposer.num_patched == len(VARIANTS)
+        assert recomposer.num_composed == 0
+        assert len(recomposer._bases) == 3
+
+    @pytest.mark.parametrize(
+        "overrides",
+        [
+            ["model=simple_tagger", "+model.new=1"],
+            ["model=simple_tagger", "model.encoder={num_layers:2}"],
+            ["model=simple_tagger", "~model.encoder.num_layers"],
+        ],
+    )
+    def test_composed_by_hydra(self, session, overrides):
+        recomposer = Recomposer(session, "simple_config")
+        assert recomposer.compose(overrides) == session.compose("simple_config", overrides)
+        assert recomposer.num_composed == 1
+
+    @pytest.mark.parametrize(
+        "overrides", [["model.missing=1"], ["model=missing"], ["trainer.num_epochs=${"]]
+    )
+    def test_errors(self, session, overrides):
+        recomposer = Recomposer(session, "simple_config")
+        with pytest.raises(Exception) as expected:
+            session.compose("simple_config", overrides)
+        with pytest.raises(type(expected.value)):
+            recomposer.compose(overrides)
+
+    def test_copies(self, session):
+        recomposer = Recomposer(session, "simple_config")
+        cfg = recomposer.compose(["trainer.num_epochs=3"])
+        cfg["trainer"]["num_epochs"] = 10
+        assert recomposer.compose(["trainer.num_epochs=3"])["trainer"]["num_epochs"] == 3
+        assert recomposer.compose([])["trainer"]["num_epochs"] == 1
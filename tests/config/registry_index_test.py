@@ -0,0 +1,62 @@
+from allennlp.common import Registrable
+from allennlp.data import DatasetReader
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config import registry_index
+
+
+class IndexBase(Registrable):
+    pass
+
+
+@IndexBase.register("first")
+@IndexBase.register("second")
+class Indexed(IndexBase):
+    pass
+
+
+class TestRegistryIndex(BaseTestCase):
+    """
+    Tests for the reverse index in `allennlp_hydra.config.registry_index`.
+    """
+
+    def test_get_registered_name(self):
+        # Decorators are applied bottom up, so `second` is registered first.
+        assert registry_index.get_registered_name(Indexed, IndexBase) == "second"
+        assert registry_index.get_registered_name(Indexed, DatasetReader) is None
+        assert registry_index.get_registered_name(IndexBase, IndexBase) is None
+
+    def test_refreshes_on_register(self):
+        registry_index.refresh_registry_index()
+
+        @IndexBase.register("registered-later", exist_ok=True)
+        class RegisteredLater(IndexBase):
+            pass
+
+        assert (
+            registry_index.get_registered_name(RegisteredLater, IndexBase)
+            == "registered-later"
+        )
+
+    def test_refreshes_on_register_again(self):
+        for _ in range(2):
+
+            @IndexBase.register("registered-again", exist_ok=True)
+            class RegisteredAgain(IndexBase):
+                pass
+
+            assert (
+                registry_index.get_registered_name(RegisteredAgain, IndexBase)
+                == "registered-again"
+            )
+        assert registry_index.get_registered_name(Indexed, IndexBase) == "second"
+
+    def test_get_base_class_by_name(self):
+        assert registry_index.get_base_class_by_name("IndexBase") == IndexBase
+        assert registry_index.get_base_class_by_name("DatasetReader") == DatasetReader
+        assert registry_index.get_base_class_by_name("NotABaseClass") is None
+
+    def test_clear(self):
+        registry_index.refresh_registry_index()
+        registry_index.clear_registry_index()
+        assert registry_index.get_registered_name(Indexed, IndexBase) == "second"
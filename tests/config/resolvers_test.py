@@ -0,0 +1,75 @@
+import gzip
+from unittest.mock import patch
+
+import pytest
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config import compose, resolvers
+
+
+class TestResolvers(BaseTestCase):
+    """
+    Tests for `allennlp_hydra.config.resolvers`.
+    """
+
+    @pytest.fixture()
+    def embeddings_file(self):
+        yield self.FIXTURES_ROOT.joinpath("embeddings", "glove.6B.100d.sample.txt.gz")
+
+    def test_count_lines(self):
+        lines_path = self.TEST_DIR.joinpath("lines.txt")
+        lines_path.write_bytes(b"")
+        assert resolvers.count_lines(lines_path) == 0
+        lines_path.write_bytes(b"a\nb\n")
+        assert resolvers.count_lines(lines_path) == 2
+        lines_path.write_bytes(b"a\nb\nc")
+        assert resolvers.count_lines(lines_path) == 3
+
+        gzip_path = self.TEST_DIR.joinpath("lines.txt.gz")
+        with gzip.open(gzip_path, "wb") as gzip_file:
+            gzip_file.write(b"a\n" * 10)
+        assert resolvers.count_lines(gzip_path) == 10
+
+    def test_get_embedding_dim(self, embeddings_file):
+        assert resolvers.get_embedding_dim(embeddings_file) == 100
+
+        word2vec_path = self.TEST_DIR.joinpath("word2vec.txt")
+        word2vec_path.write_text("2 3\na 0.1 0.2 0.3\nb 0.4 0.5 0.6\n", "utf-8")
+        assert resolvers.get_embedding_dim(word2vec_path) == 3
+
+        word2vec_path.write_text("not_embeddings\n", "utf-8")
+        with pytest.raises(ValueError):
+            resolvers.get_embedding_dim(word2vec_path)
+
+    def test_memoized(self, isolated_cache):
+        lines_path = self.TEST_DIR.joinpath("lines.txt")
+        lines_path.write_text("a\nb\n", "utf-8")
+        assert resolvers.resolve_file_value("file_lines", str(lines_path)) == 2
+
+        with patch.dict(resolvers.FILE_RESOLVERS, {"file_lines": pytest.fail}):
+            # From memory.
+            assert resolvers.resolve_file_value("file_lines", str(lines_path)) == 2
+
+            # From disk.
+            resolvers.clear_resolver_cache()
+            assert resolvers.resolve_file_value("file_lines", str(lines_path)) == 2
+        assert list(isolated_cache.joinpath("resolvers").rglob("*.json"))
+
+        # Changing the file computes the value again.
+        lines_path.write_text("a\nb\nc\n", "utf-8")
+        assert resolvers.resolve_file_value("file_lines", str(lines_path)) == 3
+
+    def test_compose(self, embeddings_file):
+        config_dir = self.TEST_DIR.joinpath("conf")
+        config_dir.mkdir()
+        data_path = self.FIXTURES_ROOT.joinpath("data", "sequence_tagging.tsv")
+        config_dir.joinpath("config.yaml").write_text(
+            f"train_data_path: {data_path}\n"
+            "num_train: ${file_lines:${train_data_path}}\n"
+            f"embedding_dim: ${{embedding_dim:{embeddings_file}}}\n",
+            "utf-8",
+        )
+
+        cfg = compose.compose_config(config_dir, "config", "test_resolvers")
+        assert cfg["num_train"] == 5
+        assert cfg["embedding_dim"] == 100
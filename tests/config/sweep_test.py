@@ -0,0 +1,68 @@
+import itertools
+
+import pytest
+from hydra.errors import HydraException
+
+from allennlp_hydra.utils.testing import BaseTestCase
+from allennlp_hydra.config.sweep import Sweep
+
+
+class TestSweep(BaseTestCase):
+    """
+    Tests for `allennlp_hydra.config.sweep`.
+    """
+
+    def test_points(self):
+        sweep = Sweep(["model=C,D", "~trainer.grad_norm", "trainer.num_epochs=range(1,4)"])
+
+        assert sweep.is_sweep
+        assert len(sweep) == 6
+        assert sweep[0] == ["model=C", "~trainer.grad_norm", "trainer.num_epochs=1"]
+        assert sweep[1] == ["model=C", "~trainer.grad_norm", "trainer.num_epochs=2"]
+        assert sweep[-1] == ["model=D", "~trainer.grad_norm", "trainer.num_epochs=3"]
+        assert list(sweep) == [
+            [f"model={model}", "~trainer.grad_norm", f"trainer.num_epochs={epochs}"]
+            for model, epochs in itertools.product("CD", [1, 2, 3])
+        ]
+
+        with pytest.raises(IndexError):
+            sweep[6]
+
+        assert sweep[4:] == [sweep[4], sweep[5]]
+        assert sweep[::3] == [sweep[0], sweep[3]]
+        assert sweep.dimensions[2][1:] == ["trainer.num_epochs=2", "trainer.num_epochs=3"]
+
+    def test_no_sweep(self):
+        sweep = Sweep(["a=1", "+b=c"])
+        assert not sweep.is_sweep
+        assert list(sweep) == [["a=1", "+b=c"]]
+
+        assert list(Sweep([])) == [[]]
+
+    def test_large_sweep(self):
+        sweep = Sweep(["a=range(0,1000000)", "b=range(0,1000000)", "c=x,y"])
+        assert len(sweep) == 2 * 10 ** 12
+        assert sweep[123456789] == ["a=61", "b=728394", "c=y"]
+
+        shard = sweep.get_shard(3, 1000)
+        assert len(shard) == 2 * 10 ** 9
+        assert shard[1] == 1003
+
+        sample = sweep.sample_indices(5, seed=1)
+        assert sample == sorted(sample)
+        assert len(set(sample)) == 5
+        assert sample == sweep.sample_indices(5, seed=1)
+        shard_sample = sweep.sample_indices(5, seed=1, indices=shard)
+        assert all(index % 1000 == 3 for index in shard_sample)
+
+    def test_shards_cover_sweep(self):
+        sweep = Sweep(["a=1,2,3", "b=range(0,5)"])
+        shards = [list(sweep.get_shard(index, 4)) for index in range(4)]
+        assert sorted(itertools.chain(*shards)) == list(range(len(sweep)))
+
+        with pytest.raises(ValueError):
+            sweep.get_shard(4, 4)
+
+    def test_interval_sweep(self):
+        with pytest.raises(HydraException):
+            Sweep(["a=interval(0,1)"])